@@ -112,6 +112,24 @@ DATABASES = {
 }
 
 
+# Cache
+# Set CACHE_REDIS_URL to share the cache between gunicorn workers and the
+# worker processes; without it every process has its own in-memory cache.
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', '')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -172,6 +190,83 @@ TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID', '')
 TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN', '')
 TWILIO_WHATSAPP_FROM = os.environ.get('TWILIO_WHATSAPP_FROM', '')
 TWILIO_TEST_TO_NUMBER = os.environ.get('TWILIO_TEST_TO_NUMBER', '')
+# Twilio REST timeout in seconds and concurrent sends per TwilioService.send_batch
+TWILIO_TIMEOUT = float(os.environ.get('TWILIO_TIMEOUT', 10))
+TWILIO_BATCH_CONCURRENCY = int(os.environ.get('TWILIO_BATCH_CONCURRENCY', 8))
+
+# Department ticket/SLA metrics cache lifetime in seconds (0 disables caching)
+DEPARTMENT_METRICS_CACHE_TIMEOUT = int(os.environ.get('DEPARTMENT_METRICS_CACHE_TIMEOUT', 0))
+
+# Cached user principal (role, groups, department) lifetime in seconds. Only
+# safe with a shared cache, so 0 (built once per request) unless CACHE_REDIS_URL is set.
+PRINCIPAL_CACHE_TIMEOUT = int(os.environ.get('PRINCIPAL_CACHE_TIMEOUT', 300 if CACHE_REDIS_URL else 0))
+
+# Seconds a process reuses its compiled SLA policy matrix before reloading it
+SLA_POLICY_MAX_AGE = int(os.environ.get('SLA_POLICY_MAX_AGE', 60))
+# SLA scheduler: seconds each refresh re-reads before the newest updated_at it has seen
+# (catches late commits), and seconds between full reloads of open tickets
+SLA_SCHEDULER_OVERLAP_SECONDS = int(os.environ.get('SLA_SCHEDULER_OVERLAP_SECONDS', 60))
+SLA_SCHEDULER_RELOAD_SECONDS = int(os.environ.get('SLA_SCHEDULER_RELOAD_SECONDS', 600))
+
+# Maximum number of tickets accepted by the bulk ticket creation API
+BULK_TICKET_MAX_ITEMS = int(os.environ.get('BULK_TICKET_MAX_ITEMS', 200))
+
+# Realtime event stream (served by config.asgi, the `stream` service). Events are
+# saved in the WSGI workers, so with REALTIME_REDIS_URL set they go through Redis;
+# the in-process broker only works when one ASGI process does everything.
+REALTIME_REDIS_URL = os.environ.get('REALTIME_REDIS_URL', '')
+REALTIME_BROKER = os.environ.get(
+    'REALTIME_BROKER',
+    'hotel_app.realtime.RedisBroker' if REALTIME_REDIS_URL else 'hotel_app.realtime.InProcessBroker',
+)
+# Seconds between keep-alive comments and before a stream is closed for the browser to reconnect
+SSE_HEARTBEAT_SECONDS = int(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+SSE_MAX_SECONDS = int(os.environ.get('SSE_MAX_SECONDS', 300))
+
+# Default and maximum page size of the notification list endpoints
+NOTIFICATION_PAGE_SIZE = int(os.environ.get('NOTIFICATION_PAGE_SIZE', 50))
+NOTIFICATION_PAGE_MAX = int(os.environ.get('NOTIFICATION_PAGE_MAX', 200))
+# Seconds between re-counting a user's unread notifications to correct their counter (0 disables)
+NOTIFICATION_COUNTER_RECONCILE_SECONDS = int(os.environ.get('NOTIFICATION_COUNTER_RECONCILE_SECONDS', 600))
+
+# Recipients written per INSERT when one notification fans out to many users
+NOTIFICATION_FANOUT_BATCH_SIZE = int(os.environ.get('NOTIFICATION_FANOUT_BATCH_SIZE', 1000))
+
+# Repeats of an unread notification about the same object within this many
+# seconds update the existing row instead of adding one (0 disables coalescing)
+NOTIFICATION_COALESCE_SECONDS = int(os.environ.get('NOTIFICATION_COALESCE_SECONDS', 300))
+
+# Outbound message worker (manage.py run_message_worker): concurrent sends,
+# messages claimed per batch, retries and per-provider send rates (messages/second, 0 = unlimited)
+MESSAGE_WORKER_THREADS = int(os.environ.get('MESSAGE_WORKER_THREADS', 8))
+MESSAGE_WORKER_BATCH_SIZE = int(os.environ.get('MESSAGE_WORKER_BATCH_SIZE', 100))
+MESSAGE_MAX_ATTEMPTS = int(os.environ.get('MESSAGE_MAX_ATTEMPTS', 5))
+MESSAGE_RETRY_BASE_SECONDS = int(os.environ.get('MESSAGE_RETRY_BASE_SECONDS', 30))
+MESSAGE_RETRY_MAX_SECONDS = int(os.environ.get('MESSAGE_RETRY_MAX_SECONDS', 3600))
+MESSAGE_CLAIM_TIMEOUT_SECONDS = int(os.environ.get('MESSAGE_CLAIM_TIMEOUT_SECONDS', 300))
+WHATSAPP_RATE_PER_SECOND = float(os.environ.get('WHATSAPP_RATE_PER_SECOND', 20))
+TWILIO_RATE_PER_SECOND = float(os.environ.get('TWILIO_RATE_PER_SECOND', 10))
+
+# WhatsApp Graph API HTTP client: keep-alive pool size (match MESSAGE_WORKER_THREADS),
+# timeouts in seconds and retries of connection failures
+WHATSAPP_HTTP_POOL_SIZE = int(os.environ.get('WHATSAPP_HTTP_POOL_SIZE', 20))
+WHATSAPP_CONNECT_TIMEOUT = float(os.environ.get('WHATSAPP_CONNECT_TIMEOUT', 3.05))
+WHATSAPP_READ_TIMEOUT = float(os.environ.get('WHATSAPP_READ_TIMEOUT', 10))
+WHATSAPP_HTTP_RETRIES = int(os.environ.get('WHATSAPP_HTTP_RETRIES', 2))
+# Uploaded WhatsApp media ids are reused for this many days (the Graph API keeps media for 30)
+WHATSAPP_MEDIA_TTL_DAYS = int(os.environ.get('WHATSAPP_MEDIA_TTL_DAYS', 29))
+
+# Messaging circuit breakers: open when this share of calls fails within the
+# window (over at least CIRCUIT_MINIMUM_CALLS calls); probe again after CIRCUIT_RESET_SECONDS
+CIRCUIT_FAILURE_RATE = float(os.environ.get('CIRCUIT_FAILURE_RATE', 0.5))
+CIRCUIT_MINIMUM_CALLS = int(os.environ.get('CIRCUIT_MINIMUM_CALLS', 5))
+CIRCUIT_WINDOW_SECONDS = int(os.environ.get('CIRCUIT_WINDOW_SECONDS', 60))
+CIRCUIT_RESET_SECONDS = int(os.environ.get('CIRCUIT_RESET_SECONDS', 30))
+
+# Read notifications older than this are moved to the archive by
+# `manage.py archive_notifications`, in batches of NOTIFICATION_ARCHIVE_BATCH_SIZE
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 30))
+NOTIFICATION_ARCHIVE_BATCH_SIZE = int(os.environ.get('NOTIFICATION_ARCHIVE_BATCH_SIZE', 1000))
 
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
@@ -1,9 +1,11 @@
 from django.urls import path
-from . import api_views
+from . import api_views, stream_views
 
 urlpatterns = [
     # Notification Management
     path('notifications/', api_views.get_notifications, name='get-notifications'),
+    path('notifications/stream/', stream_views.event_stream, name='notification-stream'),
+    path('notifications/unread-count/', api_views.get_unread_notification_count, name='notification-unread-count'),
     path('notifications/all/', api_views.get_all_notifications, name='get-all-notifications'),
     path('notifications/<int:notification_id>/read/', api_views.mark_notification_as_read, name='mark-notification-as-read'),
     path('notifications/read-all/', api_views.mark_all_notifications_as_read, name='mark-all-notifications-as-read'),
@@ -1,12 +1,18 @@
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from .models import Notification
+from .notification_counters import mark_all_read, unread_count
 from .serializers import NotificationSerializer
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 User = get_user_model()
 
@@ -23,34 +29,100 @@ def current_user(request):
         'email': user.email,
     })
 
+def _notification_page(request, queryset):
+    """
+    Apply the ``since``/``before`` id cursors and ``limit`` to a notification queryset.
+    ``since`` returns the oldest notifications newer than the client's last seen
+    id, so a client that advances to the newest id it got misses nothing;
+    ``before`` pages back through older ones. Newest first either way.
+    With ``since``, ``updated_since`` (the newest ``updated_at`` the client has)
+    also returns older notifications that coalesced repeats have updated since.
+    Returns the page and whether more notifications match.
+    """
+    default_limit = getattr(settings, 'NOTIFICATION_PAGE_SIZE', 50)
+    max_limit = getattr(settings, 'NOTIFICATION_PAGE_MAX', 200)
+    try:
+        limit = min(max(int(request.query_params.get('limit', default_limit)), 1), max_limit)
+    except (TypeError, ValueError):
+        limit = default_limit
+    
+    cursors = {}
+    for param in ('since', 'before'):
+        value = request.query_params.get(param)
+        if value:
+            try:
+                cursors[param] = int(value)
+            except (TypeError, ValueError):
+                raise ValidationError({param: 'Must be a notification id.'})
+    if 'before' in cursors:
+        queryset = queryset.filter(pk__lt=cursors['before'])
+    
+    if 'since' in cursors:
+        changed = Q(pk__gt=cursors['since'])
+        updated_since = request.query_params.get('updated_since')
+        if updated_since:
+            try:
+                updated_since = parse_datetime(updated_since)
+            except ValueError:
+                updated_since = None
+            if updated_since is None:
+                raise ValidationError({'updated_since': 'Must be an ISO 8601 timestamp.'})
+            if timezone.is_naive(updated_since):
+                updated_since = timezone.make_aware(updated_since)
+            changed |= Q(updated_at__gt=updated_since)
+        # updated_at is the insert time of a new notification, so this is id
+        # order for new ones and puts updated ones after everything they replace
+        page = list(queryset.filter(changed).order_by('updated_at', 'id')[:limit + 1])
+        has_more = len(page) > limit
+        return page[:limit][::-1], has_more
+    page = list(queryset.order_by('-created_at', '-id')[:limit + 1])
+    return page[:limit], len(page) > limit
+
 @api_view(['GET'])
 @authentication_classes([SessionAuthentication, TokenAuthentication])
 @permission_classes([IsAuthenticated])
 def get_notifications(request):
     """
-    Get unread notifications for the current user
+    Get unread notifications for the current user.
+    Accepts ``since``, ``updated_since``, ``before`` and ``limit``; the unread total is sent in the
+    ``X-Unread-Count`` header and ``X-Has-More`` is 1 when the page was cut at ``limit``.
     """
-    notifications = Notification.objects.filter(
+    notifications, has_more = _notification_page(request, Notification.objects.filter(
         recipient=request.user,
         is_read=False
-    ).order_by('-created_at')
+    ))
     
     serializer = NotificationSerializer(notifications, many=True)
-    return Response(serializer.data)
+    response = Response(serializer.data)
+    response['X-Unread-Count'] = unread_count(request.user)
+    response['X-Has-More'] = int(has_more)
+    return response
 
 @api_view(['GET'])
 @authentication_classes([SessionAuthentication, TokenAuthentication])
 @permission_classes([IsAuthenticated])
 def get_all_notifications(request):
     """
-    Get all notifications for the current user
+    Get notifications for the current user, one page at a time.
+    Pass the id of the last item as ``before`` to get the next page.
     """
-    notifications = Notification.objects.filter(
+    notifications, has_more = _notification_page(request, Notification.objects.filter(
         recipient=request.user
-    ).order_by('-created_at')
+    ))
     
     serializer = NotificationSerializer(notifications, many=True)
-    return Response(serializer.data)
+    response = Response(serializer.data)
+    response['X-Has-More'] = int(has_more)
+    return response
+
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication, TokenAuthentication])
+@permission_classes([IsAuthenticated])
+def get_unread_notification_count(request):
+    """
+    Get the number of unread notifications for the current user
+    """
+    return Response({'unread_count': unread_count(request.user)})
 
 @api_view(['POST'])
 @authentication_classes([SessionAuthentication, TokenAuthentication])
@@ -75,10 +147,7 @@ def mark_all_notifications_as_read(request):
     """
     Mark all notifications as read for the current user
     """
-    Notification.objects.filter(
-        recipient=request.user,
-        is_read=False
-    ).update(is_read=True)
+    mark_all_read(request.user)
     
     return Response({'status': 'success'})
 
@@ -0,0 +1,174 @@
+"""
+Circuit breakers for the external messaging providers.
+Each provider (``whatsapp``, ``twilio``) has one breaker per process. Once the
+share of failed calls in the last CIRCUIT_WINDOW_SECONDS reaches
+CIRCUIT_FAILURE_RATE (over at least CIRCUIT_MINIMUM_CALLS calls) the circuit
+opens and calls fail fast; after CIRCUIT_RESET_SECONDS a single probe call is
+let through (half-open) and its outcome closes or re-opens the circuit.
+
+Every breaker mirrors its state into the cache, so pages can show the
+provider health without calling the provider. That only reflects the process
+that actually sends (``run_message_worker``) when the cache is shared between
+processes (CACHE_REDIS_URL).
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+HEALTH_KEY = 'hotel_app:circuit:{}'
+HEALTH_TIMEOUT = 60 * 60
+# Health is re-written at most this often while the state does not change
+HEALTH_REFRESH_SECONDS = 10
+
+
+def is_provider_failure(status):
+    """True for HTTP statuses that mean the provider cannot serve us.
+
+    Rejected credentials (401/403), throttling and server errors count against
+    the provider; other 4xx answers reject a single request.
+    """
+    return status in (401, 403, 429) or status >= 500
+
+
+class CircuitOpenError(Exception):
+    """Raised by CircuitBreaker.call while the circuit is open."""
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker with half-open probing; safe to share between threads."""
+
+    def __init__(self, name, failure_rate=None, minimum_calls=None, window_seconds=None, reset_seconds=None,
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate if failure_rate is not None else getattr(settings, 'CIRCUIT_FAILURE_RATE', 0.5)
+        self.minimum_calls = minimum_calls or getattr(settings, 'CIRCUIT_MINIMUM_CALLS', 5)
+        self.window_seconds = window_seconds or getattr(settings, 'CIRCUIT_WINDOW_SECONDS', 60)
+        self.reset_seconds = reset_seconds or getattr(settings, 'CIRCUIT_RESET_SECONDS', 30)
+        self.clock = clock
+        self.state = CLOSED
+        self._calls = deque()  # (time, succeeded)
+        self._opened_at = None
+        self._probing = False
+        self._last_error = None
+        self._health_written_at = None
+        self._lock = threading.Lock()
+
+    def _trim(self, now):
+        while self._calls and self._calls[0][0] < now - self.window_seconds:
+            self._calls.popleft()
+
+    def _failures(self):
+        return sum(1 for _, succeeded in self._calls if not succeeded)
+
+    def allow(self):
+        """True if a call may go ahead now; an open circuit lets one probe through after the reset timeout."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.clock() - self._opened_at >= self.reset_seconds:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            now = self.clock()
+            if self.state == HALF_OPEN:
+                self._calls.clear()
+                self._probing = False
+                self._set_state(CLOSED)
+                return
+            self._calls.append((now, True))
+            self._trim(now)
+            self._write_health()
+
+    def record_failure(self, error=None):
+        with self._lock:
+            now = self.clock()
+            self._last_error = str(error) if error else self._last_error
+            if self.state == HALF_OPEN:
+                self._probing = False
+                self._open(now)
+                return
+            self._calls.append((now, False))
+            self._trim(now)
+            if (self.state == CLOSED and len(self._calls) >= self.minimum_calls
+                    and self._failures() / len(self._calls) >= self.failure_rate):
+                self._open(now)
+            else:
+                self._write_health(force=True)
+
+    def call(self, func, *args, **kwargs):
+        """Run ``func`` through the breaker; any exception counts as a failure."""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def _open(self, now):
+        self._opened_at = now
+        self._set_state(OPEN)
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.warning(f"Messaging circuit '{self.name}' {self.state} -> {state}")
+        self.state = state
+        self._write_health(force=True)
+
+    def _write_health(self, force=False):
+        now = self.clock()
+        if not force and self._health_written_at is not None and now - self._health_written_at < HEALTH_REFRESH_SECONDS:
+            return
+        self._health_written_at = now
+        try:
+            cache.set(HEALTH_KEY.format(self.name), {
+                'state': self.state,
+                'calls': len(self._calls),
+                'failures': self._failures(),
+                'last_error': self._last_error,
+                'updated_at': timezone.now().isoformat(),
+            }, HEALTH_TIMEOUT)
+        except Exception as e:
+            logger.error(f"Failed to cache {self.name} circuit health: {str(e)}")
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """The process-wide breaker for provider ``name``."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def provider_health(name):
+    """Last known health of provider ``name`` from the cache (``None`` if it was never called)."""
+    return cache.get(HEALTH_KEY.format(name))
+
+
+def health_is_shared():
+    """True when cached health is shared between processes, so it shows the message worker's view."""
+    return bool(getattr(settings, 'CACHE_REDIS_URL', ''))
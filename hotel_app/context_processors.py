@@ -1,20 +1,12 @@
 from django.conf import settings
+from .principal import get_principal
 
 def nav_permissions(request):
-    user = request.user
-    is_admin = (
-        user.is_authenticated
-        and (user.is_superuser or user.groups.filter(name=getattr(settings, "ADMINS_GROUP", "Admins")).exists())
-    )
-    
-    # Get user role
-    user_role = None
-    if user.is_authenticated and hasattr(user, 'userprofile'):
-        user_role = user.userprofile.role
+    principal = get_principal(getattr(request, 'user', None))
     
     return {
-        "is_admin": is_admin,
+        "is_admin": principal.is_admin,
         "ADMINS_GROUP": getattr(settings, "ADMINS_GROUP", "Admins"),
         "USERS_GROUP": getattr(settings, "USERS_GROUP", "Users"),
-        "user_role": user_role,
+        "user_role": principal.role,
     }
\ No newline at end of file
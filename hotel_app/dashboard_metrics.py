@@ -0,0 +1,197 @@
+"""
+Dashboard KPI aggregation service.
+Computes every home-page metric from a small, fixed number of aggregate queries
+so the cost of rendering the dashboard does not grow with the number of request
+types or chart days.
+"""
+
+import datetime
+import json
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db.models import Avg, Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import (
+    Complaint, Department, Guest, Location, RequestType, Review, Voucher,
+)
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+OPEN_COMPLAINT_STATUSES = ('pending', 'in_progress')
+
+
+class DashboardMetrics:
+    """Lazily computed home-page KPIs.
+
+    Each property issues at most one query and caches its result, so a view can
+    read any subset of metrics and pay only for the groups it touches.
+    """
+
+    FEEDBACK_DAYS = 7
+
+    def __init__(self, today=None):
+        self.today = today or timezone.localdate()
+
+    # ---- Entity counts ----
+
+    @cached_property
+    def total_users(self):
+        return self._safe_count(User)
+
+    @cached_property
+    def total_departments(self):
+        return self._safe_count(Department)
+
+    @cached_property
+    def total_locations(self):
+        return self._safe_count(Location)
+
+    # ---- Complaints ----
+
+    @cached_property
+    def complaint_trends(self):
+        """Complaint counts grouped by status (one GROUP BY query)."""
+        try:
+            return list(Complaint.objects.order_by().values('status').annotate(count=Count('id')))
+        except Exception as e:
+            logger.error(f"Failed to aggregate complaints: {str(e)}")
+            return []
+
+    @cached_property
+    def open_complaints(self):
+        return sum(row['count'] for row in self.complaint_trends if row['status'] in OPEN_COMPLAINT_STATUSES)
+
+    @cached_property
+    def resolved_complaints(self):
+        return sum(row['count'] for row in self.complaint_trends if row['status'] == 'resolved')
+
+    # ---- Vouchers ----
+
+    @cached_property
+    def voucher_stats(self):
+        """Issued, redeemed and expired voucher counts from one conditional aggregate."""
+        try:
+            stats = Voucher.objects.aggregate(
+                issued_count=Count('id'),
+                redeemed_count=Count('id', filter=Q(redeemed=True)),
+                expired_count=Count('id', filter=Q(redeemed=False, expiry_date__lt=self.today)),
+            )
+            return {
+                'issued': stats['issued_count'],
+                'redeemed': stats['redeemed_count'],
+                'expired': stats['expired_count'],
+            }
+        except Exception as e:
+            logger.error(f"Failed to aggregate vouchers: {str(e)}")
+            return {'issued': 0, 'redeemed': 0, 'expired': 0}
+
+    # ---- Reviews ----
+
+    @cached_property
+    def average_review_rating(self):
+        try:
+            return Review.objects.aggregate(avg=Avg('rating'))['avg'] or 0
+        except Exception as e:
+            logger.error(f"Failed to aggregate review rating: {str(e)}")
+            return 0
+
+    @cached_property
+    def feedback_by_day(self):
+        """Positive/neutral/negative review counts for the last FEEDBACK_DAYS days.
+
+        A single query grouped by calendar day; days without reviews are filled
+        with zeros so the chart always has FEEDBACK_DAYS buckets.
+        """
+        days = [self.today - datetime.timedelta(days=i) for i in range(self.FEEDBACK_DAYS - 1, -1, -1)]
+        buckets = {}
+        try:
+            rows = (
+                Review.objects.filter(created_at__date__gte=days[0], created_at__date__lte=days[-1])
+                .annotate(day=TruncDate('created_at'))
+                .order_by()
+                .values('day')
+                .annotate(
+                    positive=Count('id', filter=Q(rating__gte=4)),
+                    neutral=Count('id', filter=Q(rating=3)),
+                    negative=Count('id', filter=Q(rating__lte=2)),
+                )
+            )
+            buckets = {row['day']: row for row in rows}
+        except Exception as e:
+            logger.error(f"Failed to aggregate daily feedback: {str(e)}")
+
+        empty = {'positive': 0, 'neutral': 0, 'negative': 0}
+        return {
+            'labels': [day.strftime('%a') for day in days],
+            'positive': [buckets.get(day, empty)['positive'] for day in days],
+            'neutral': [buckets.get(day, empty)['neutral'] for day in days],
+            'negative': [buckets.get(day, empty)['negative'] for day in days],
+        }
+
+    # ---- Service requests ----
+
+    @cached_property
+    def requests_by_type(self):
+        """Ticket counts per RequestType from one LEFT JOIN ... GROUP BY query."""
+        try:
+            rows = list(
+                RequestType.objects.order_by('id')
+                .annotate(ticket_count=Count('servicerequest'))
+                .values_list('name', 'ticket_count')
+            )
+        except Exception as e:
+            logger.error(f"Failed to aggregate requests by type: {str(e)}")
+            rows = []
+        return {
+            'labels': [name for name, _ in rows],
+            'values': [count for _, count in rows],
+        }
+
+    # ---- Occupancy ----
+
+    @cached_property
+    def occupancy(self):
+        try:
+            occupied = Guest.objects.filter(
+                Q(checkin_date__lte=self.today, checkout_date__gte=self.today) |
+                Q(checkin_datetime__date__lte=self.today, checkout_datetime__date__gte=self.today)
+            ).count()
+        except Exception as e:
+            logger.error(f"Failed to count occupancy: {str(e)}")
+            occupied = 0
+        rate = float(occupied) / max(1, self.total_locations) * 100 if self.total_locations else 0
+        return {'occupied': occupied, 'rate': round(rate, 1)}
+
+    # ---- Helpers ----
+
+    def _safe_count(self, model):
+        try:
+            return model.objects.count()
+        except Exception as e:
+            logger.error(f"Failed to count {model.__name__}: {str(e)}")
+            return 0
+
+    def legacy_context(self):
+        """Context for the legacy ``dashboard/dashboard.html`` fallback render."""
+        average = self.average_review_rating
+        return {
+            'total_users': self.total_users,
+            'total_departments': self.total_departments,
+            'total_locations': self.total_locations,
+            'open_complaints': self.open_complaints,
+            'resolved_complaints': self.resolved_complaints,
+            'vouchers_issued': self.voucher_stats['issued'],
+            'vouchers_redeemed': self.voucher_stats['redeemed'],
+            'vouchers_expired': self.voucher_stats['expired'],
+            'average_review_rating': round(average, 1) if average else 0,
+            'complaint_trends': json.dumps(self.complaint_trends),
+            'requests_data': json.dumps(self.requests_by_type),
+            'feedback_data': json.dumps(self.feedback_by_day),
+            'occupancy_data': json.dumps(self.occupancy),
+        }
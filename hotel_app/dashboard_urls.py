@@ -73,6 +73,7 @@ urlpatterns = [
     # API endpoints for groups dashboard
     path('api/groups/notify-all/', dashboard_views.api_notify_all_groups, name='api_groups_notify_all'),
     path('api/departments/<int:dept_id>/notify/', dashboard_views.api_notify_department, name='api_department_notify'),
+    path('api/messages/jobs/<int:job_id>/', dashboard_views.api_message_job_status, name='api_message_job_status'),
     path('api/departments/<int:dept_id>/members/', dashboard_views.api_department_members, name='api_department_members'),
     path('manage-users/departments/<int:dept_id>/assign-lead/', dashboard_views.assign_department_lead, name='assign_department_lead'),
     path('api/departments/create/', dashboard_views.department_create, name='department_create'),
@@ -85,6 +86,7 @@ urlpatterns = [
     path('my-tickets/', dashboard_views.my_tickets, name='my_tickets'),
     path('tickets/<int:ticket_id>/', dashboard_views.ticket_detail, name='ticket_detail'),
     path('api/tickets/create/', dashboard_views.create_ticket_api, name='api_create_ticket'),
+    path('api/tickets/bulk-create/', dashboard_views.bulk_create_tickets_api, name='api_bulk_create_tickets'),
     path('api/tickets/<int:ticket_id>/assign/', dashboard_views.assign_ticket_api, name='api_assign_ticket'),
     # Removed claim_ticket_api as we're removing the claim functionality
     path('api/tickets/<int:ticket_id>/accept/', dashboard_views.accept_ticket_api, name='api_accept_ticket'),
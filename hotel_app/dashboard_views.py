@@ -29,7 +29,8 @@ from hotel_app.models import (
     Department, Location, RequestType, Checklist,
     Complaint, BreakfastVoucher, Review, Guest,
     Voucher, VoucherScan, ServiceRequest, UserProfile, UserGroup, UserGroupMembership,
-    Notification, GymMember, SLAConfiguration, DepartmentRequestSLA  # Add SLAConfiguration and DepartmentRequestSLA models
+    Notification, GymMember, SLAConfiguration, DepartmentRequestSLA,  # Add SLAConfiguration and DepartmentRequestSLA models
+    OutboundMessageJob
 )
 
 # Import all forms from the local forms.py
@@ -42,7 +43,17 @@ from .forms import (
 # Import local utils and services
 from .utils import user_in_group, create_notification
 from hotel_app.whatsapp_service import WhatsAppService
+from hotel_app.message_queue import enqueue as enqueue_messages, job_summary as message_job_summary
 from .rbac_services import get_accessible_sections, can_access_section
+from .principal import get_principal
+from .dashboard_metrics import DashboardMetrics
+from .ticket_listing import (
+    TICKET_LIST_FIELDS, decorate_ticket, sla_percentage_from_fraction, ticket_rows,
+)
+from .department_metrics import DepartmentMetrics, sla_compliance_color
+from .managers import ServiceRequestQuerySet
+from .pagination import CursorPaginator, pagination_query
+from .ticket_search import search_tickets
 
 # Import export/import utilities
 from .export_import_utils import create_export_file, import_all_data, validate_import_data
@@ -193,10 +204,8 @@ def require_role(roles):
         @login_required
         def wrapper(request, *args, **kwargs):
             # Check if user has the required role
-            if hasattr(request.user, 'userprofile'):
-                user_role = request.user.userprofile.role
-                if user_role in roles or request.user.is_superuser:
-                    return view_func(request, *args, **kwargs)
+            if get_principal(request.user).role in roles or request.user.is_superuser:
+                return view_func(request, *args, **kwargs)
             
             # Fallback to group-based permissions for backward compatibility
             if request.user.is_superuser or any(user_in_group(request.user, role) for role in roles):
@@ -299,124 +308,14 @@ from django.contrib.auth.decorators import login_required
 def dashboard_view(request):
     """Render the dashboard with live metrics for users, departments and open complaints.
 
-    - total_users: count of User objects
-    - total_departments: count of Department objects
-    - open_complaints: count of Complaint objects with pending/open status
+    Metrics are computed by DashboardMetrics; this view only seeds demo data in
+    DEBUG and delegates to dashboard2_view, falling back to the legacy template.
     """
     today = timezone.localdate()
 
-    # Live counts (defensive)
-    try:
-        total_users = User.objects.count()
-    except Exception:
-        total_users = 0
-
-    try:
-        total_departments = Department.objects.count()
-    except Exception:
-        total_departments = 0
-
-    try:
-        total_locations = Location.objects.count()
-    except Exception:
-        total_locations = 0
-
-    try:
-        open_complaints = Complaint.objects.filter(status__in=["pending", "in_progress"]).count()
-    except Exception:
-        try:
-            open_complaints = Complaint.objects.count()
-        except Exception:
-            open_complaints = 0
-
-    try:
-        resolved_complaints = Complaint.objects.filter(status="resolved").count()
-    except Exception:
-        resolved_complaints = 0
-
-    # Vouchers
-    try:
-        vouchers_issued = Voucher.objects.count()
-        vouchers_redeemed = Voucher.objects.filter(status="redeemed").count()
-        vouchers_expired = Voucher.objects.filter(status="expired").count()
-    except Exception:
-        vouchers_issued = vouchers_redeemed = vouchers_expired = 0
-
-    # Reviews
-    try:
-        average_review_rating = Review.objects.aggregate(avg=Avg("rating"))["avg"] or 0
-    except Exception:
-        average_review_rating = 0
-
-    # Complaint trends for charting
-    try:
-        complaint_trends = list(Complaint.objects.values("status").annotate(count=Count("id")))
-    except Exception:
-        complaint_trends = []
-
-    # Requests chart data (try to derive from RequestType + ServiceRequest if available)
-    try:
-        request_types = list(RequestType.objects.all())
-        requests_labels = [rt.name for rt in request_types]
-        try:
-            from hotel_app.models import ServiceRequest
-            requests_values = [ServiceRequest.objects.filter(request_type=rt).count() for rt in request_types]
-        except Exception:
-            requests_values = [1 for _ in requests_labels]
-    except Exception:
-        requests_labels = ['Housekeeping', 'Maintenance', 'Concierge', 'F&B', 'IT Support', 'Other']
-        requests_values = [95, 75, 45, 35, 25, 15]
-
-    requests_data = {
-        'labels': requests_labels,
-        'values': requests_values,
-    }
-
-    # Feedback chart data (7-day buckets using Review if possible)
-    try:
-        labels = []
-        positive = []
-        neutral = []
-        negative = []
-        for i in range(6, -1, -1):
-            day = today - datetime.timedelta(days=i)
-            labels.append(day.strftime('%a'))
-            reviews_on_day = Review.objects.filter(created_at__date=day)
-            positive.append(reviews_on_day.filter(rating__gte=4).count())
-            neutral.append(reviews_on_day.filter(rating=3).count())
-            negative.append(reviews_on_day.filter(rating__lte=2).count())
-        feedback_data = {
-            'labels': labels,
-            'positive': positive,
-            'neutral': neutral,
-            'negative': negative,
-        }
-    except Exception:
-        feedback_data = {
-            'labels': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
-            'positive': [70, 80, 75, 90, 85, 95, 100],
-            'neutral': [20, 25, 30, 25, 35, 30, 25],
-            'negative': [15, 10, 20, 15, 12, 10, 8],
-        }
-
-    # Occupancy
-    try:
-        # Prefer datetime fields if set, otherwise use date fields
-        occupancy_qs = Guest.objects.filter(
-            Q(checkin_date__lte=today, checkout_date__gte=today) |
-            Q(checkin_datetime__date__lte=today, checkout_datetime__date__gte=today)
-        )
-        occupancy_today = occupancy_qs.count()
-        occupancy_rate = float(occupancy_today) / max(1, total_locations) * 100 if total_locations else 0
-    except Exception:
-        occupancy_today = 0
-        occupancy_rate = 0
-
-    occupancy_data = {'occupied': occupancy_today, 'rate': round(occupancy_rate, 1)}
-
     # DEBUG-only: seed minimal demo data if site is empty so dashboard looks functional locally
     try:
-        if getattr(settings, 'DEBUG', False) and (total_users == 0 or Guest.objects.count() == 0):
+        if getattr(settings, 'DEBUG', False) and (not User.objects.exists() or not Guest.objects.exists()):
             # Create demo department
             demo_dept, _ = Department.objects.get_or_create(name='Demo Department')
 
@@ -469,35 +368,10 @@ def dashboard_view(request):
                 Review.objects.get_or_create(guest=guest, defaults={'rating': 4, 'comment': 'Demo review'})
             except Exception:
                 pass
-
-            # Recompute counts
-            total_users = User.objects.count()
-            total_departments = Department.objects.count()
-            total_locations = Location.objects.count()
-            vouchers_issued = Voucher.objects.count()
-            vouchers_redeemed = Voucher.objects.filter(status='redeemed').count()
-            open_complaints = Complaint.objects.filter(status__in=['pending', 'in_progress']).count()
-            average_review_rating = Review.objects.aggregate(avg=Avg('rating'))['avg'] or 0
     except Exception:
         # Do not let seeding errors break the dashboard
         pass
 
-    context = {
-        'total_users': total_users,
-        'total_departments': total_departments,
-        'total_locations': total_locations,
-        'open_complaints': open_complaints,
-        'resolved_complaints': resolved_complaints,
-        'vouchers_issued': vouchers_issued,
-        'vouchers_redeemed': vouchers_redeemed,
-        'vouchers_expired': vouchers_expired,
-        'average_review_rating': round(average_review_rating, 1) if average_review_rating else 0,
-        'complaint_trends': json.dumps(complaint_trends),
-        'requests_data': json.dumps(requests_data),
-        'feedback_data': json.dumps(feedback_data),
-        'occupancy_data': json.dumps(occupancy_data),
-    }
-
     # The project now uses the new dashboard2 design as the primary dashboard.
     # Reuse the existing dashboard2_view to render the latest dashboard template
     # and context so we keep a single source of truth for the dashboard output.
@@ -507,147 +381,39 @@ def dashboard_view(request):
         # rendering the legacy dashboard template.
         return dashboard2_view(request)
     except Exception:
-        return render(request, 'dashboard/dashboard.html', context)
+        return render(request, 'dashboard/dashboard.html', DashboardMetrics(today=today).legacy_context())
 
 
 @login_required
 def dashboard2_view(request):
     """Render the new dashboard2 with the provided design using dynamic data."""
-    from django.db.models import Count, Avg, Q
-    from django.utils import timezone
-    from django.contrib.auth import get_user_model
-    import json
-    import datetime
-    
-    User = get_user_model()
-    today = timezone.localdate()
-
-    # Live counts (defensive)
-    try:
-        total_users = User.objects.count()
-    except Exception:
-        total_users = 0
-
-    try:
-        total_departments = Department.objects.count()
-    except Exception:
-        total_departments = 0
-
-    try:
-        total_locations = Location.objects.count()
-    except Exception:
-        total_locations = 0
-
-    try:
-        open_complaints = Complaint.objects.filter(status__in=["pending", "in_progress"]).count()
-    except Exception:
-        try:
-            open_complaints = Complaint.objects.count()
-        except Exception:
-            open_complaints = 0
-
-    try:
-        resolved_complaints = Complaint.objects.filter(status="resolved").count()
-    except Exception:
-        resolved_complaints = 0
-
-    # Vouchers
-    try:
-        vouchers_issued = Voucher.objects.count()
-        vouchers_redeemed = Voucher.objects.filter(status="redeemed").count()
-        vouchers_expired = Voucher.objects.filter(status="expired").count()
-    except Exception:
-        vouchers_issued = vouchers_redeemed = vouchers_expired = 0
-
-    # Reviews
-    try:
-        average_review_rating = Review.objects.aggregate(avg=Avg("rating"))["avg"] or 0
-    except Exception:
-        average_review_rating = 0
-
-    # Complaint trends for charting
-    try:
-        complaint_trends = list(Complaint.objects.values("status").annotate(count=Count("id")))
-    except Exception:
-        complaint_trends = []
-
-    # Requests chart data (try to derive from RequestType + ServiceRequest if available)
-    try:
-        request_types = list(RequestType.objects.all())
-        requests_labels = [rt.name for rt in request_types]
-        try:
-            requests_values = [ServiceRequest.objects.filter(request_type=rt).count() for rt in request_types]
-        except Exception:
-            requests_values = [1 for _ in requests_labels]
-    except Exception:
-        requests_labels = ['Housekeeping', 'Maintenance', 'Concierge', 'F&B', 'IT Support', 'Other']
-        requests_values = [95, 75, 45, 35, 25, 15]
-
-    requests_data = {
-        'labels': requests_labels,
-        'values': requests_values,
-    }
-
-    # Feedback chart data (7-day buckets using Review if possible)
-    try:
-        labels = []
-        positive = []
-        neutral = []
-        negative = []
-        for i in range(6, -1, -1):
-            day = today - datetime.timedelta(days=i)
-            labels.append(day.strftime('%a'))
-            reviews_on_day = Review.objects.filter(created_at__date=day)
-            positive.append(reviews_on_day.filter(rating__gte=4).count())
-            neutral.append(reviews_on_day.filter(rating=3).count())
-            negative.append(reviews_on_day.filter(rating__lte=2).count())
-        feedback_data = {
-            'labels': labels,
-            'positive': positive,
-            'neutral': neutral,
-            'negative': negative,
-        }
-    except Exception:
-        feedback_data = {
-            'labels': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
-            'positive': [70, 80, 75, 90, 85, 95, 100],
-            'neutral': [20, 25, 30, 25, 35, 30, 25],
-            'negative': [15, 10, 20, 15, 12, 10, 8],
-        }
-
-    # Occupancy
-    try:
-        # Prefer datetime fields if set, otherwise use date fields
-        occupancy_qs = Guest.objects.filter(
-            Q(checkin_date__lte=today, checkout_date__gte=today) |
-            Q(checkin_datetime__date__lte=today, checkout_datetime__date__gte=today)
-        )
-        occupancy_today = occupancy_qs.count()
-        occupancy_rate = float(occupancy_today) / max(1, total_locations) * 100 if total_locations else 0
-    except Exception:
-        occupancy_today = 0
-        occupancy_rate = 0
-
-    occupancy_data = {'occupied': occupancy_today, 'rate': round(occupancy_rate, 1)}
-
-    # Fetch actual critical tickets (high priority service requests)
+    # All KPIs come from a fixed number of aggregate queries, independent of
+    # how many request types or chart days are displayed.
+    metrics = DashboardMetrics()
+
+    open_complaints = metrics.open_complaints
+    vouchers_redeemed = metrics.voucher_stats['redeemed']
+    average_review_rating = metrics.average_review_rating
+    requests_values = metrics.requests_by_type['values']
+    feedback_data = metrics.feedback_by_day
+    occupancy_today = metrics.occupancy['occupied']
+
+    # Fetch actual critical tickets (high priority service requests), most at-risk first
     try:
         critical_tickets = ServiceRequest.objects.filter(
             priority__in=['high', 'critical']
-        ).select_related('requester_user', 'department', 'location').order_by('-created_at')[:4]
+        ).select_related('request_type', 'requester_user', 'department', 'location').by_sla_risk()[:4]
         
         # Process tickets for display
         critical_tickets_data = []
         for ticket in critical_tickets:
-            # Calculate time left based on SLA
+            # Time left and progress come from the SLA annotations
             time_left = "Unknown"
             progress = 0
             if ticket.due_at and ticket.created_at:
-                total_time = (ticket.due_at - ticket.created_at).total_seconds()
-                elapsed_time = (timezone.now() - ticket.created_at).total_seconds()
-                if total_time > 0:
-                    progress = min(100, max(0, int((elapsed_time / total_time) * 100)))
-                    remaining_seconds = total_time - elapsed_time
+                if ticket.sla_elapsed_fraction is not None:
+                    progress = sla_percentage_from_fraction(ticket.sla_elapsed_fraction)
+                    remaining_seconds = ticket.sla_seconds_to_breach
                     if remaining_seconds > 0:
                         hours = int(remaining_seconds // 3600)
                         if hours > 0:
@@ -975,6 +741,12 @@ def messaging_setup(request):
     except Exception:
         pass
     
+    # Last known provider health from the circuit breakers (no live API call); only
+    # meaningful when the cache is shared with the message worker that sends
+    from hotel_app.circuit_breaker import health_is_shared, provider_health
+    shared_health = health_is_shared()
+    twilio_health = provider_health('twilio') if shared_health else None
+    
     # Get Twilio settings from environment
     from django.conf import settings
     twilio_account_sid = getattr(settings, 'TWILIO_ACCOUNT_SID', '')
@@ -986,6 +758,8 @@ def messaging_setup(request):
         'templates': templates,
         'stats': stats,
         'twilio_configured': twilio_configured,
+        'twilio_health': twilio_health,
+        'whatsapp_health': provider_health('whatsapp') if shared_health else None,
         'twilio_account_sid': twilio_account_sid,
         'twilio_auth_token': twilio_auth_token,
         'twilio_whatsapp_from': twilio_whatsapp_from,
@@ -1407,7 +1181,8 @@ def api_notify_all_groups(request):
     """POST endpoint to notify all groups (bulk notify).
 
     Expects JSON body: { "message": "..." } or will use a default message.
-    Uses WhatsAppService.send_text as a best-effort mock integration.
+    Messages are queued for the message worker (manage.py run_message_worker);
+    poll /dashboard/api/messages/jobs/<job_id>/ for progress.
     """
     if request.method != 'POST':
         return JsonResponse({'error': 'POST required'}, status=405)
@@ -1417,25 +1192,10 @@ def api_notify_all_groups(request):
         body = {}
     message = body.get('message') or 'This is a bulk notification from Hotel Admin.'
 
-    # Attempt to collect phone numbers from UserProfile and send messages
-    sent = 0
-    failed = 0
-    try:
-        from hotel_app.models import UserProfile
-        profiles = UserProfile.objects.filter(enabled=True).exclude(phone__isnull=True).exclude(phone__exact='')
-        phones = [p.phone for p in profiles]
-    except Exception:
-        phones = []
+    phones = UserProfile.objects.filter(enabled=True).exclude(phone__isnull=True).exclude(phone__exact='').values_list('phone', flat=True)
 
-    service = WhatsAppService()
-    for phone in phones:
-        ok = service.send_text(phone, message)
-        if ok:
-            sent += 1
-        else:
-            failed += 1
-
-    return JsonResponse({'sent': sent, 'failed': failed, 'attempted': len(phones)})
+    job = enqueue_messages(phones, message, description='Bulk notify all groups', created_by=request.user)
+    return JsonResponse({'job_id': job.pk, 'queued': job.messages.count()}, status=202)
 
 
 @login_required
@@ -1445,6 +1205,7 @@ def api_notify_department(request, dept_id):
 
     URL: /dashboard/api/departments/<dept_id>/notify/
     Body: { "message": "..." }
+    Messages are queued for the message worker; returns the job id.
     """
     if request.method != 'POST':
         return JsonResponse({'error': 'POST required'}, status=405)
@@ -1454,25 +1215,19 @@ def api_notify_department(request, dept_id):
         body = {}
     message = body.get('message') or f'Notification for department {dept_id}.'
 
-    sent = 0
-    failed = 0
-    try:
-        from hotel_app.models import UserProfile, Department
-        dept = get_object_or_404(Department, pk=dept_id)
-        profiles = UserProfile.objects.filter(department=dept).exclude(phone__isnull=True).exclude(phone__exact='')
-        phones = [p.phone for p in profiles]
-    except Exception:
-        phones = []
+    dept = get_object_or_404(Department, pk=dept_id)
+    phones = UserProfile.objects.filter(department=dept).exclude(phone__isnull=True).exclude(phone__exact='').values_list('phone', flat=True)
+
+    job = enqueue_messages(phones, message, description=f'Notify department {dept.name}', created_by=request.user)
+    return JsonResponse({'job_id': job.pk, 'queued': job.messages.count()}, status=202)
 
-    service = WhatsAppService()
-    for phone in phones:
-        ok = service.send_text(phone, message)
-        if ok:
-            sent += 1
-        else:
-            failed += 1
 
-    return JsonResponse({'sent': sent, 'failed': failed, 'attempted': len(phones)})
+@login_required
+@require_permission([ADMINS_GROUP, STAFF_GROUP])
+def api_message_job_status(request, job_id):
+    """Return per-status message counts of a queued messaging job."""
+    job = get_object_or_404(OutboundMessageJob, pk=job_id)
+    return JsonResponse({'job_id': job.pk, 'description': job.description, **message_job_summary(job)})
 
 
 @login_required
@@ -1824,6 +1579,37 @@ def test_twilio_connection(request):
     if not account_sid or not auth_token or not whatsapp_from:
         return JsonResponse({'error': 'Missing required parameters'}, status=400)
     
+    # For the configured account, answer from the breaker's cached health unless a
+    # live check is asked for (live=1) or a test message is to be sent; other
+    # credentials are always checked live
+    from django.conf import settings
+    from hotel_app.circuit_breaker import get_breaker, is_provider_failure, provider_health
+    configured = (account_sid == getattr(settings, 'TWILIO_ACCOUNT_SID', '')
+                  and auth_token == getattr(settings, 'TWILIO_AUTH_TOKEN', ''))
+    health = provider_health('twilio') if configured else None
+    if health and not test_to_number and request.POST.get('live') != '1':
+        if health['state'] == 'open':
+            return JsonResponse({
+                'success': False,
+                'error': f"Twilio is failing: {health.get('last_error') or 'circuit open'}",
+                'cached': True,
+                'checked_at': health['updated_at']
+            }, status=503)
+        return JsonResponse({
+            'success': True,
+            'message': 'Twilio connection healthy',
+            'account_sid': account_sid,
+            'failures': health.get('failures', 0),
+            'cached': True,
+            'checked_at': health['updated_at']
+        })
+    breaker = get_breaker('twilio') if configured else None
+    if breaker and not breaker.allow():
+        return JsonResponse({
+            'success': False,
+            'error': 'Twilio is unavailable (circuit open); try again shortly'
+        }, status=503)
+    
     try:
         # Test Twilio connection by creating a client and fetching account info
         from twilio.rest import Client
@@ -1832,7 +1618,18 @@ def test_twilio_connection(request):
         client = Client(account_sid, auth_token)
         
         # Try to fetch account details to verify credentials
-        account = client.api.accounts(account_sid).fetch()
+        try:
+            account = client.api.accounts(account_sid).fetch()
+        except Exception as e:
+            # Record the live result for the configured account; refused credentials count as failures
+            if breaker:
+                if is_provider_failure(getattr(e, 'status', None) or 500):
+                    breaker.record_failure(e)
+                else:
+                    breaker.record_success()
+            raise
+        if breaker:
+            breaker.record_success()
         
         # If we have a test number, try to send a test message using our improved service
         if test_to_number:
@@ -1917,65 +1714,12 @@ def tickets(request):
     priority_filter = request.GET.get('priority', '')
     status_filter = request.GET.get('status', '')
     search_query = request.GET.get('search', '')
+    sort_filter = request.GET.get('sort', '')
+    risk_filter = request.GET.get('risk', '')
     
-    # Get departments with active ticket counts and dynamic SLA compliance
-    departments_data = []
-    departments = Department.objects.all()
-    for dept in departments:
-        # Count active tickets for this department
-        active_tickets_count = ServiceRequest.objects.filter(
-            department=dept
-        ).exclude(
-            status__in=['completed', 'closed']
-        ).count()
-        
-        # Calculate SLA compliance: (tickets that have NOT breached SLA) / (total tickets) * 100
-        # If no tickets, SLA compliance is 100%
-        total_tickets = ServiceRequest.objects.filter(department=dept).count()
-        
-        if total_tickets > 0:
-            # Count tickets that have breached SLA
-            breached_tickets = ServiceRequest.objects.filter(
-                department=dept,
-                sla_breached=True
-            ).count()
-            
-            # SLA compliance = (total - breached) / total * 100
-            sla_compliance = int(((total_tickets - breached_tickets) / total_tickets) * 100)
-        else:
-            # If no tickets, 100% SLA compliance
-            sla_compliance = 100
-            
-        # Determine color based on SLA compliance percentage
-        if sla_compliance >= 90:
-            sla_color = '#22c55e'  # green-500
-        elif sla_compliance >= 70:
-            sla_color = '#facc15'  # yellow-400
-        else:
-            sla_color = '#ef4444'  # red-500
-            
-        color_mapping = {
-            'Housekeeping': {'color': 'sky-600', 'icon_color': 'sky-600'},
-            'Maintenance': {'color': 'yellow-400', 'icon_color': 'sky-600'},
-            'Guest Services': {'color': 'green-500', 'icon_color': 'sky-600'},
-        }
-        
-        dept_colors = color_mapping.get(dept.name, {'color': 'blue-500', 'icon_color': 'sky-600'})
-        
-        # Get logo URL if available using the new method
-        logo_url = dept.get_logo_url() if dept.get_logo_url() else f'/static/images/manage_users/{dept.name.lower().replace(" ", "_")}.svg'
-        
-        departments_data.append({
-            'id': dept.id,
-            'name': dept.name,
-            'active_tickets_count': active_tickets_count,
-            'sla_compliance': sla_compliance,
-            'sla_color': sla_color,  # Using hex values for CSS compatibility
-            'icon_url': logo_url,
-        })
-    
-    # Get all service requests with filters applied
-    tickets_queryset = ServiceRequest.objects.select_related(
+    # Get all service requests with filters applied; SLA progress and risk are
+    # annotated by the database so they can be sorted and filtered on
+    tickets_queryset = ServiceRequest.objects.with_sla_metrics().select_related(
         'request_type', 'location', 'requester_user', 'assignee_user', 'department'
     ).all().order_by('-id')
     
@@ -2016,88 +1760,93 @@ def tickets(request):
             tickets_queryset = tickets_queryset.filter(status=model_status)
     
     if search_query:
-        tickets_queryset = tickets_queryset.filter(
-            Q(request_type__name__icontains=search_query) |
-            Q(location__name__icontains=search_query) |
-            Q(notes__icontains=search_query)
-        )
+        # Full-text search, ordered by relevance
+        tickets_queryset = search_tickets(tickets_queryset, search_query)
+
+    if risk_filter in ServiceRequestQuerySet.RISK_CHOICES:
+        tickets_queryset = tickets_queryset.at_risk(risk_filter)
+
+    if sort_filter == 'risk':
+        tickets_queryset = tickets_queryset.by_sla_risk()
     
-    # Process tickets to add color attributes
-    processed_tickets = []
-    for ticket in tickets_queryset:
-        # Map priority to display values
-        priority_mapping = {
-            'critical': {'label': 'Critical', 'color': 'red'},
-            'high': {'label': 'High', 'color': 'red'},
-            'normal': {'label': 'Medium', 'color': 'sky'},
-            'low': {'label': 'Low', 'color': 'gray'},
-        }
-        
-        priority_data = priority_mapping.get(ticket.priority, {'label': 'Medium', 'color': 'sky'})
-        
-        # Map status to display values
-        status_mapping = {
-            'pending': {'label': 'Pending', 'color': 'yellow'},
-            'assigned': {'label': 'Assigned', 'color': 'yellow'},
-            'accepted': {'label': 'Accepted', 'color': 'blue'},
-            'in_progress': {'label': 'In Progress', 'color': 'sky'},
-            'completed': {'label': 'Completed', 'color': 'green'},
-            'closed': {'label': 'Closed', 'color': 'green'},
-            'escalated': {'label': 'Escalated', 'color': 'red'},
-            'rejected': {'label': 'Rejected', 'color': 'red'},
+    page_number = request.GET.get('page')
+    cursor = request.GET.get('cursor')
+    # Risk order depends on the current time and search results are ordered by
+    # relevance, so neither can use the (created_at, id) cursor; those views keep
+    # numbered pages. Everything else seeks on the cursor and never counts the table.
+    use_cursor = sort_filter != 'risk' and not search_query
+
+    # JSON clients get a lean values() projection of the requested page only
+    if request.GET.get('format') == 'json':
+        rows_queryset = tickets_queryset.values(*TICKET_LIST_FIELDS)
+        if use_cursor:
+            rows_page = CursorPaginator(rows_queryset, 10).get_page(cursor)
+            return JsonResponse({
+                'results': ticket_rows(rows_page.object_list),
+                'next_cursor': rows_page.next_cursor,
+                'previous_cursor': rows_page.previous_cursor,
+            })
+        rows_page = Paginator(rows_queryset, 10).get_page(page_number)
+        return JsonResponse({
+            'results': ticket_rows(rows_page.object_list),
+            'page': rows_page.number,
+            'num_pages': rows_page.paginator.num_pages,
+            'count': rows_page.paginator.count,
+        })
+
+    # Get departments with active ticket counts and dynamic SLA compliance
+    # (one grouped query for all departments)
+    department_metrics = DepartmentMetrics()
+    departments_data = []
+    departments = Department.objects.all()
+    for dept in departments:
+        dept_stats = department_metrics.for_department(dept.id)
+        active_tickets_count = dept_stats['open']
+        sla_compliance = dept_stats['compliance']
+        sla_color = sla_compliance_color(sla_compliance)
+
+        color_mapping = {
+            'Housekeeping': {'color': 'sky-600', 'icon_color': 'sky-600'},
+            'Maintenance': {'color': 'yellow-400', 'icon_color': 'sky-600'},
+            'Guest Services': {'color': 'green-500', 'icon_color': 'sky-600'},
         }
         
-        status_data = status_mapping.get(ticket.status, {'label': 'Pending', 'color': 'yellow'})
-        
-        # Calculate SLA percentage
-        sla_percentage = 0
-        sla_color = '#22c55e'  # green-500
-        if ticket.created_at and ticket.due_at:
-            # Calculate time taken so far or total time if completed
-            if ticket.completed_at:
-                time_taken = ticket.completed_at - ticket.created_at
-            else:
-                time_taken = timezone.now() - ticket.created_at
-            
-            # Calculate SLA percentage (time taken / total allowed time)
-            total_allowed_time = ticket.due_at - ticket.created_at
-            if total_allowed_time.total_seconds() > 0:
-                sla_percentage = min(100, int((time_taken.total_seconds() / total_allowed_time.total_seconds()) * 100))
-            
-            # Determine color based on SLA
-            if sla_percentage > 90:
-                sla_color = '#ef4444'  # red-500
-            elif sla_percentage > 70:
-                sla_color = '#facc15'  # yellow-400
-            else:
-                sla_color = '#22c55e'  # green-500
+        dept_colors = color_mapping.get(dept.name, {'color': 'blue-500', 'icon_color': 'sky-600'})
         
-        # Add attributes to the ticket object
-        ticket.priority_label = priority_data['label']
-        ticket.priority_color = priority_data['color']
-        ticket.status_label = status_data['label']
-        ticket.status_color = status_data['color']
-        ticket.sla_percentage = sla_percentage
-        ticket.sla_color = sla_color
-        ticket.owner_avatar = 'https://placehold.co/24x24'
+        # Get logo URL if available using the new method
+        logo_url = dept.get_logo_url() if dept.get_logo_url() else f'/static/images/manage_users/{dept.name.lower().replace(" ", "_")}.svg'
         
-        processed_tickets.append(ticket)
+        departments_data.append({
+            'id': dept.id,
+            'name': dept.name,
+            'active_tickets_count': active_tickets_count,
+            'sla_compliance': sla_compliance,
+            'sla_color': sla_color,  # Using hex values for CSS compatibility
+            'icon_url': logo_url,
+        })
     
     # --- Pagination Logic ---
-    paginator = Paginator(processed_tickets, 10)  # Show 10 tickets per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginate in the database and decorate only the rows on the current page
+    if use_cursor:
+        page_obj = CursorPaginator(tickets_queryset, 10).get_page(cursor)  # Show 10 tickets per page
+    else:
+        page_obj = Paginator(tickets_queryset, 10).get_page(page_number)
+    now = timezone.now()
+    page_obj.object_list = [decorate_ticket(ticket, now) for ticket in page_obj.object_list]
     
     context = {
         'departments': departments_data,
         'tickets': page_obj,  # Pass the page_obj to the template
         'page_obj': page_obj,  # Pass it again as page_obj for clarity
-        'total_tickets': tickets_queryset.count(),
+        'cursor_pagination': use_cursor,
+        'pagination_query': pagination_query(request),
         # Pass filter values back to template
         'department_filter': department_filter,
         'priority_filter': priority_filter,
         'status_filter': status_filter,
         'search_query': search_query,
+        'sort_filter': sort_filter,
+        'risk_filter': risk_filter,
     }
     return render(request, 'dashboard/tickets.html', context)
 
@@ -2164,8 +1913,8 @@ def ticket_detail(request, ticket_id):
     from django.utils import timezone
     from django.db.models import Q
     
-    # Get the service request
-    service_request = get_object_or_404(ServiceRequest, id=ticket_id)
+    # Get the service request with SLA progress annotated by the database
+    service_request = get_object_or_404(ServiceRequest.objects.with_sla_metrics(), id=ticket_id)
     
     # Check SLA breaches to ensure status is up to date
     service_request.check_sla_breaches()
@@ -2177,16 +1926,7 @@ def ticket_detail(request, ticket_id):
         if service_request.status in ['completed', 'closed']:
             sla_progress_percent = 100
         else:
-            # Calculate time taken so far or total time if completed
-            if service_request.completed_at:
-                time_taken = service_request.completed_at - service_request.created_at
-            else:
-                time_taken = timezone.now() - service_request.created_at
-            
-            # Calculate SLA percentage (time taken / total allowed time)
-            total_allowed_time = service_request.sla_hours * 3600  # Convert hours to seconds
-            if total_allowed_time > 0:
-                sla_progress_percent = min(100, int((time_taken.total_seconds() / total_allowed_time) * 100))
+            sla_progress_percent = sla_percentage_from_fraction(service_request.sla_elapsed_fraction)
     
     # Map priority to display values
     priority_mapping = {
@@ -2523,7 +2263,7 @@ def my_tickets(request):
     
     # Get service requests assigned to the current user (either as assignee or requester)
     # Also include pending tickets in the user's department that are not yet assigned
-    user_tickets = ServiceRequest.objects.filter(
+    user_tickets = ServiceRequest.objects.with_sla_metrics().filter(
         Q(assignee_user=request.user) | 
         Q(requester_user=request.user) |
         (Q(department=user_department) & Q(status='pending') & Q(assignee_user=None))
@@ -2533,6 +2273,7 @@ def my_tickets(request):
     
     # Calculate status counts for the status cards
     status_counts = user_tickets.aggregate(
+        total=Count('id'),
         pending=Count('id', filter=Q(status='pending')),
         accepted=Count('id', filter=Q(status='accepted')),
         in_progress=Count('id', filter=Q(status='in_progress')),
@@ -2552,6 +2293,7 @@ def my_tickets(request):
     priority_filter = request.GET.get('priority', '')
     status_filter = request.GET.get('status', '')
     search_query = request.GET.get('search', '')
+    sort_filter = request.GET.get('sort', '')
     
     # Convert display status values to database status values
     status_mapping = {
@@ -2573,15 +2315,24 @@ def my_tickets(request):
         user_tickets = user_tickets.filter(status=db_status)
     
     if search_query:
-        user_tickets = user_tickets.filter(
-            Q(notes__icontains=search_query) |
-            Q(request_type__name__icontains=search_query) |
-            Q(location__name__icontains=search_query)
-        )
+        # Full-text search, ordered by relevance
+        user_tickets = search_tickets(user_tickets, search_query)
+
+    if sort_filter == 'risk':
+        user_tickets = user_tickets.by_sla_risk()
+    
+    # --- Pagination Logic ---
+    # Seek on (created_at, id); the time-dependent risk order and relevance-ordered
+    # search results keep numbered pages
+    use_cursor = sort_filter != 'risk' and not search_query
+    if use_cursor:
+        page_obj = CursorPaginator(user_tickets, 10).get_page(request.GET.get('cursor'))  # Show 10 tickets per page
+    else:
+        page_obj = Paginator(user_tickets, 10).get_page(request.GET.get('page'))
     
-    # Process tickets to add color attributes and workflow permissions
+    # Process the current page's tickets to add color attributes and workflow permissions
     processed_tickets = []
-    for ticket in user_tickets:
+    for ticket in page_obj.object_list:
         # Map priority to display values
         priority_mapping = {
             'high': {'label': 'High', 'color': 'red'},
@@ -2608,19 +2359,8 @@ def my_tickets(request):
         # Check SLA breaches
         ticket.check_sla_breaches()
         
-        # Calculate SLA progress percentage
-        sla_progress_percent = 0
-        if ticket.created_at and ticket.due_at:
-            # Calculate time taken so far or total time if completed
-            if ticket.completed_at:
-                time_taken = ticket.completed_at - ticket.created_at
-            else:
-                time_taken = timezone.now() - ticket.created_at
-            
-            # Calculate SLA percentage (time taken / total allowed time)
-            total_allowed_time = ticket.due_at - ticket.created_at
-            if total_allowed_time.total_seconds() > 0:
-                sla_progress_percent = min(100, int((time_taken.total_seconds() / total_allowed_time.total_seconds()) * 100))
+        # SLA progress percentage (computed by the database)
+        sla_progress_percent = sla_percentage_from_fraction(ticket.sla_elapsed_fraction)
         
         # Add attributes to the ticket object
         ticket.priority_label = priority_data['label']
@@ -2657,20 +2397,19 @@ def my_tickets(request):
                 ticket.can_close = True
         
         processed_tickets.append(ticket)
-    
-    # --- Pagination Logic ---
-    paginator = Paginator(processed_tickets, 10)  # Show 10 tickets per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj.object_list = processed_tickets
     
     context = {
         'tickets': page_obj,
         'page_obj': page_obj,
+        'cursor_pagination': use_cursor,
+        'pagination_query': pagination_query(request),
         'status_counts': status_counts,
         'overdue_count': overdue_count,
         'priority_filter': priority_filter,
         'status_filter': status_filter,
         'search_query': search_query,
+        'sort_filter': sort_filter,
         'user_department': user_department,
     }
     
@@ -3546,10 +3285,10 @@ def manage_users_profiles(request):
     if request.user.is_superuser:
         # Superuser has all permissions
         user_permissions = ['manage_users', 'manage_groups', 'system_config', 'view_reports', 'manage_departments', 'full_access']
-    elif request.user.groups.filter(name='Admins').exists():
+    elif user_in_group(request.user, 'Admins'):
         # Admin permissions
         user_permissions = ['manage_users', 'manage_groups', 'view_reports', 'manage_departments']
-    elif request.user.groups.filter(name='Staff').exists():
+    elif user_in_group(request.user, 'Staff'):
         # Staff permissions
         user_permissions = ['view_team_reports', 'manage_team', 'assign_requests', 'view_dept_data']
     else:
@@ -4087,7 +3826,8 @@ def dashboard_departments(request):
     # Build a serializable list for the template with featured_group (matching the template expectations)
     departments = []
     try:
-        from hotel_app.models import UserProfile, ServiceRequest
+        from hotel_app.models import UserProfile
+        department_metrics = DepartmentMetrics()
         for index, d in enumerate(depts_page):
             profiles = UserProfile.objects.filter(department=d)
             members = []
@@ -4128,34 +3868,13 @@ def dashboard_departments(request):
             icon_color = 'gray-500'
             dot_bg = 'bg-gray-500'
 
-            # Calculate SLA compliance: (tickets that have NOT breached SLA) / (total tickets) * 100
-            # If no tickets, SLA compliance is 100%
-            total_tickets = ServiceRequest.objects.filter(department=d).count()
-            
-            if total_tickets > 0:
-                # Count tickets that have breached SLA
-                breached_tickets = ServiceRequest.objects.filter(
-                    department=d,
-                    sla_breached=True
-                ).count()
-                
-                # SLA compliance = (total - breached) / total * 100
-                sla_compliance = int(((total_tickets - breached_tickets) / total_tickets) * 100)
-            else:
-                # If no tickets, 100% SLA compliance
-                sla_compliance = 100
-                
-            # Determine color based on SLA compliance percentage
-            if sla_compliance >= 90:
-                sla_color = '#22c55e'  # green-500
-            elif sla_compliance >= 70:
-                sla_color = '#facc15'  # yellow-400
-            else:
-                sla_color = '#ef4444'  # red-500
+            # SLA compliance and open tickets from the shared grouped aggregation
+            dept_stats = department_metrics.for_department(d.pk)
+            sla_compliance = dept_stats['compliance']
+            sla_color = sla_compliance_color(sla_compliance)
 
-            # Dummy metrics
             members_count = profiles.count()
-            open_tickets = 0
+            open_tickets = dept_stats['open']
             performance_pct = f"{sla_compliance}%"
             performance_color = sla_color
             performance_width = '8' if sla_compliance > 70 else '4'
@@ -4842,31 +4561,25 @@ def analytics_dashboard(request):
         satisfaction_weeks.append(f'Week {i+1}')
         satisfaction_scores.append(round(avg_rating, 1))
     
-    # Department performance data
+    # Department performance data (one grouped query for all departments)
     departments = Department.objects.all()
+    department_metrics = DepartmentMetrics()
     dept_performance = []
     
+    # Since there's no direct relationship between ServiceRequest and Review,
+    # we'll use all reviews for now. In a real implementation, you would need
+    # to establish a proper relationship between requests and reviews.
+    overall_satisfaction = Review.objects.aggregate(Avg('rating'))['rating__avg'] or 0
+    
     for dept in departments:
-        dept_requests = ServiceRequest.objects.filter(department=dept)
+        dept_stats = department_metrics.for_department(dept.id)
         avg_resolution_time = 0
         avg_satisfaction = 0
         
-        if dept_requests.exists():
-            # Calculate average resolution time
-            resolved_requests = dept_requests.filter(status='completed')
-            if resolved_requests.exists():
-                total_resolution_time = timedelta()
-                for req in resolved_requests:
-                    if req.completed_at and req.created_at:
-                        total_resolution_time += (req.completed_at - req.created_at)
-                avg_resolution_time = total_resolution_time.total_seconds() / 3600 / resolved_requests.count()  # in hours
-            
-            # Calculate average satisfaction
-            # Since there's no direct relationship between ServiceRequest and Review,
-            # we'll use all reviews for now. In a real implementation, you would need
-            # to establish a proper relationship between requests and reviews.
-            dept_reviews = Review.objects.all()
-            avg_satisfaction = dept_reviews.aggregate(Avg('rating'))['rating__avg'] or 0
+        if dept_stats['total']:
+            # Average resolution time of completed tickets, in hours
+            avg_resolution_time = dept_stats['avg_resolution_hours']
+            avg_satisfaction = overall_satisfaction
         
         dept_performance.append({
             'name': dept.name,
@@ -5320,8 +5033,13 @@ def dashboard_guests(request):
         elif status_filter == 'future':
             guests = guests.filter(checkin_date__gt=today)
     
+    # Seek on (created_at, id) so deep pages cost the same as the first one
+    page_obj = CursorPaginator(guests, 25).get_page(request.GET.get('cursor'))
+    
     context = {
-        "guests": guests,
+        "guests": page_obj,
+        "page_obj": page_obj,
+        "pagination_query": pagination_query(request),
         "search": search,
         "breakfast_filter": breakfast_filter,
         "status_filter": status_filter,
@@ -5457,8 +5175,11 @@ def guest_qr_codes(request):
 def sla_configuration(request):
     """SLA Configuration page with pagination and filtering."""
     # Get page and page size from query parameters
-    page = int(request.GET.get('page', 1))
-    page_size = int(request.GET.get('page_size', 20))
+    page = request.GET.get('page', 1)
+    try:
+        page_size = min(max(int(request.GET.get('page_size', 20)), 1), 100)
+    except (TypeError, ValueError):
+        page_size = 20
     
     # Get filter parameters
     search_query = request.GET.get('search', '')
@@ -5470,47 +5191,14 @@ def sla_configuration(request):
     # Get all departments for the new configuration section
     departments = Department.objects.all().order_by('name')
     
-    # Get distinct department/request combinations
-    # We need to get one entry per department/request_type combination
-    department_sla_configs = DepartmentRequestSLA.objects.select_related(
-        'department', 'request_type'
-    ).order_by('department__name', 'request_type__name')
-    
-    # Since we can't use distinct() with select_related in PostgreSQL, we'll handle this in Python
-    # Get all entries and then filter to unique combinations
-    all_configs = list(department_sla_configs)
-    unique_configs = []
-    seen_combinations = set()
-    
-    for config in all_configs:
-        combination = (config.department_id, config.request_type_id)
-        if combination not in seen_combinations:
-            unique_configs.append(config)
-            seen_combinations.add(combination)
-    
-    department_sla_configs = unique_configs
-    
-    # Apply filters
-    if search_query:
-        department_sla_configs = [config for config in department_sla_configs 
-                                 if search_query.lower() in config.department.name.lower() or 
-                                    search_query.lower() in config.request_type.name.lower()]
-    
+    # One row per department/request type combination, grouped and pivoted by the database
+    department_sla_configs = DepartmentRequestSLA.objects.search(search_query)
     if department_filter:
-        department_sla_configs = [config for config in department_sla_configs 
-                                 if config.department.name == department_filter]
-    
-    # Convert to a format that can be paginated
-    # Since we're working with a list, we need to manually handle pagination
-    from django.core.paginator import Paginator as ListPaginator
+        department_sla_configs = department_sla_configs.filter(department__name=department_filter)
+    department_sla_configs = department_sla_configs.priority_matrix()
     
-    paginator = ListPaginator(department_sla_configs, page_size)
-    try:
-        department_sla_page = paginator.page(page)
-    except PageNotAnInteger:
-        department_sla_page = paginator.page(1)
-    except EmptyPage:
-        department_sla_page = paginator.page(paginator.num_pages)
+    paginator = Paginator(department_sla_configs, page_size)
+    department_sla_page = paginator.get_page(page)
     
     context = {
         'active_tab': 'sla_configuration',
@@ -5548,42 +5236,22 @@ def api_sla_configuration_update(request):
             # Handle import data request
             import_data = data.get('import_data', [])
             if import_data:
-                imported_count = 0
-                for item in import_data:
-                    department_name = item.get('department')
-                    request_type_name = item.get('request_type')
-                    response_time = item.get('response_time', 30)
-                    resolution_time = item.get('resolution_time', 120)
-                    
-                    if department_name and request_type_name:
-                        # Get or create the department
-                        department, dept_created = Department.objects.get_or_create(
-                            name=department_name,
-                            defaults={'description': f'Department for {department_name}'}
-                        )
-                        
-                        # Get or create the request type
-                        request_type, req_created = RequestType.objects.get_or_create(
-                            name=request_type_name,
-                            defaults={'description': f'Request type for {request_type_name}'}
-                        )
-                        
-                        # For each priority level, create or update the SLA configuration
-                        for priority in ['critical', 'high', 'normal', 'low']:
-                            DepartmentRequestSLA.objects.update_or_create(
-                                department=department,
-                                request_type=request_type,
-                                priority=priority,
-                                defaults={
-                                    'response_time_minutes': response_time,
-                                    'resolution_time_minutes': resolution_time
-                                }
-                            )
-                        imported_count += 1
+                from hotel_app.sla_import import SLAImportError, import_department_slas
                 
+                try:
+                    summary = import_department_slas(import_data, dry_run=bool(data.get('dry_run')))
+                except SLAImportError as e:
+                    return JsonResponse({'error': str(e)}, status=400)
+                
+                if summary['dry_run']:
+                    message = (f"Dry run: {summary['created']} SLA rules would be created "
+                               f"and {summary['updated']} updated")
+                else:
+                    message = f"Successfully imported {summary['rows']} SLA configurations"
                 return JsonResponse({
                     'success': True,
-                    'message': f'Successfully imported {imported_count} SLA configurations'
+                    'message': message,
+                    **summary
                 })
             
             # Handle add department config request
@@ -5724,25 +5392,24 @@ def api_sla_configuration_update(request):
                 })
             
             # Department/request-specific SLA configurations (distinct combinations)
-            all_department_configs = DepartmentRequestSLA.objects.select_related(
-                'department', 'request_type'
-            ).order_by('department_id', 'request_type_id')
-            
-            # Get unique combinations
-            unique_department_configs = []
-            seen_combinations = set()
-            
-            for config in all_department_configs:
-                combination = (config.department_id, config.request_type_id)
-                if combination not in seen_combinations:
-                    unique_department_configs.append({
-                        'department_id': config.department_id,
-                        'request_type_id': config.request_type_id,
-                        'request_type_name': config.request_type.name,
-                        'response_time_minutes': config.response_time_minutes,
-                        'resolution_time_minutes': config.resolution_time_minutes
-                    })
-                    seen_combinations.add(combination)
+            unique_department_configs = [
+                {
+                    'department_id': row['department_id'],
+                    'request_type_id': row['request_type_id'],
+                    'request_type_name': row['request_type_name'],
+                    'response_time_minutes': row['response_minutes'],
+                    'resolution_time_minutes': row['resolution_minutes'],
+                    'priorities': {
+                        priority: {
+                            'response_time_minutes': row[f'{priority}_response'],
+                            'resolution_time_minutes': row[f'{priority}_resolution'],
+                        }
+                        for priority in ('critical', 'high', 'normal', 'low')
+                        if row[f'{priority}_response'] is not None
+                    },
+                }
+                for row in DepartmentRequestSLA.objects.priority_matrix()
+            ]
             
             return JsonResponse({
                 'success': True,
@@ -5991,10 +5658,8 @@ def feedback_inbox(request):
             Q(guest__room_number__icontains=search_query)
         )
     
-    # Pagination - Show 10 entries per page
-    paginator = Paginator(reviews, 10)  # Show 10 feedback entries per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination - Show 10 entries per page, seeking on (created_at, id)
+    page_obj = CursorPaginator(reviews, 10).get_page(request.GET.get('cursor'))
     
     # Convert to the format expected by the template
     feedback_data = []
@@ -6045,7 +5710,7 @@ def feedback_inbox(request):
         },
         'form': form,
         'page_obj': page_obj,
-        'paginator': paginator,
+        'pagination_query': pagination_query(request),
         'is_paginated': page_obj.has_other_pages(),
         'search_query': search_query
     }
@@ -6207,6 +5872,47 @@ def create_ticket_api(request):
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
 
+@login_required
+@require_permission([ADMINS_GROUP, STAFF_GROUP])
+def bulk_create_tickets_api(request):
+    """API endpoint to create many tickets in one call.
+
+    Expects ``{"tickets": [...]}`` where each item has the fields accepted by
+    create_ticket_api. Returns a result per item in request order.
+    """
+    if request.method == 'POST':
+        try:
+            from hotel_app.ticket_bulk import create_tickets_bulk
+            import json
+
+            data = json.loads(request.body.decode('utf-8'))
+            items = data.get('tickets') if isinstance(data, dict) else None
+            if not isinstance(items, list) or not items:
+                return JsonResponse({'error': 'A non-empty "tickets" list is required'}, status=400)
+
+            max_items = getattr(settings, 'BULK_TICKET_MAX_ITEMS', 200)
+            if len(items) > max_items:
+                return JsonResponse({'error': f'At most {max_items} tickets can be created per request'}, status=400)
+
+            results = create_tickets_bulk(items, request.user)
+            created = sum(1 for result in results if result['success'])
+
+            return JsonResponse({
+                'success': created == len(results),
+                'message': f'Created {created} of {len(results)} tickets',
+                'created': created,
+                'failed': len(results) - created,
+                'results': results,
+            })
+
+        except ValueError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
+    return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+
 @login_required
 @require_permission([ADMINS_GROUP, STAFF_GROUP])
 def assign_ticket_api(request, ticket_id):
@@ -6344,19 +6050,15 @@ def performance_dashboard(request):
     # Active Staff
     active_staff = User.objects.filter(is_active=True).count()
     
-    # Completion Rates by Department
+    # Completion Rates by Department (one grouped query for all departments)
     departments = Department.objects.all()
+    department_metrics = DepartmentMetrics()
     department_completion_data = []
     department_labels = []
     
     for dept in departments:
-        dept_requests = ServiceRequest.objects.filter(department=dept)
-        total_dept_requests = dept_requests.count()
-        completed_dept_requests = dept_requests.filter(status='completed').count()
-        dept_completion_rate = round((completed_dept_requests / total_dept_requests * 100), 1) if total_dept_requests > 0 else 0
-        
         department_labels.append(dept.name)
-        department_completion_data.append(dept_completion_rate)
+        department_completion_data.append(department_metrics.for_department(dept.id)['completion_rate'])
     
     # SLA Breach Trends (last 7 days)
     sla_breach_trends = []
@@ -6394,21 +6096,21 @@ def performance_dashboard(request):
     top_performers = sorted(top_performers, key=lambda x: x['completion_rate'], reverse=True)[:5]
     
     # Department Rankings
+    staff_counts = dict(
+        UserProfile.objects.filter(department__isnull=False)
+        .order_by()
+        .values('department_id')
+        .annotate(count=Count('user'))
+        .values_list('department_id', 'count')
+    )
     department_rankings = []
     for dept in departments:
-        dept_requests = ServiceRequest.objects.filter(department=dept)
-        total_dept_requests = dept_requests.count()
-        completed_dept_requests = dept_requests.filter(status='completed').count()
-        dept_completion_rate = round((completed_dept_requests / total_dept_requests * 100), 1) if total_dept_requests > 0 else 0
-        
-        # Count staff in department
-        staff_count = UserProfile.objects.filter(department=dept).count()
-        
+        dept_stats = department_metrics.for_department(dept.id)
         department_rankings.append({
             'department': dept,
-            'completion_rate': dept_completion_rate,
-            'tickets_handled': total_dept_requests,
-            'staff_count': staff_count
+            'completion_rate': dept_stats['completion_rate'],
+            'tickets_handled': dept_stats['total'],
+            'staff_count': staff_counts.get(dept.id, 0)
         })
     
     # Sort by completion rate
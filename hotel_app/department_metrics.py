@@ -0,0 +1,109 @@
+"""
+Per-department ticket and SLA metrics.
+All departments are aggregated in one GROUP BY department_id query instead of
+several COUNT queries per department, with an optional short-TTL cache. The
+cache is dropped when a ticket is saved or deleted, a department is deleted,
+the SLA sweep flags breaches or tickets are bulk-created.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, Q
+
+from .models import ServiceRequest
+
+logger = logging.getLogger(__name__)
+
+CLOSED_TICKET_STATUSES = ('completed', 'closed')
+
+
+def _empty_stats():
+    return {
+        'open': 0,
+        'total': 0,
+        'breached': 0,
+        'completed': 0,
+        'compliance': 100,
+        'completion_rate': 0,
+        'avg_resolution_hours': 0,
+    }
+
+
+def sla_compliance_color(compliance):
+    """Hex colour used by department cards for an SLA compliance percentage."""
+    if compliance >= 90:
+        return '#22c55e'  # green-500
+    if compliance >= 70:
+        return '#facc15'  # yellow-400
+    return '#ef4444'  # red-500
+
+
+class DepartmentMetrics:
+    """Ticket counts and SLA compliance for every department.
+
+    ``cache_timeout`` (seconds) defaults to ``DEPARTMENT_METRICS_CACHE_TIMEOUT``;
+    0 disables caching so every instance reflects the database at call time.
+    """
+
+    CACHE_KEY = 'hotel_app:department_metrics'
+
+    def __init__(self, cache_timeout=None):
+        if cache_timeout is None:
+            cache_timeout = getattr(settings, 'DEPARTMENT_METRICS_CACHE_TIMEOUT', 0)
+        self.cache_timeout = cache_timeout
+        self._stats = None
+
+    def all(self):
+        """Return ``{department_id: stats}`` for every department with tickets."""
+        if self._stats is None:
+            stats = cache.get(self.CACHE_KEY) if self.cache_timeout else None
+            if stats is None:
+                stats = self._compute()
+                if self.cache_timeout:
+                    cache.set(self.CACHE_KEY, stats, self.cache_timeout)
+            self._stats = stats
+        return self._stats
+
+    def for_department(self, department_id):
+        """Stats for one department; departments without tickets get defaults."""
+        return self.all().get(department_id) or _empty_stats()
+
+    @classmethod
+    def invalidate(cls):
+        """Drop the cached metrics; the next ``all()`` recomputes them."""
+        cache.delete(cls.CACHE_KEY)
+
+    def _compute(self):
+        rows = (
+            ServiceRequest.objects.filter(department__isnull=False)
+            .order_by()
+            .values('department_id')
+            .annotate(
+                total=Count('id'),
+                open=Count('id', filter=~Q(status__in=CLOSED_TICKET_STATUSES)),
+                breached=Count('id', filter=Q(sla_breached=True)),
+                completed=Count('id', filter=Q(status='completed')),
+                avg_resolution=Avg(
+                    F('completed_at') - F('created_at'),
+                    filter=Q(status='completed', completed_at__isnull=False),
+                ),
+            )
+        )
+
+        stats = {}
+        for row in rows:
+            total = row['total']
+            avg_resolution = row['avg_resolution']
+            stats[row['department_id']] = {
+                'open': row['open'],
+                'total': total,
+                'breached': row['breached'],
+                'completed': row['completed'],
+                # SLA compliance = (total - breached) / total * 100, 100% when no tickets
+                'compliance': int(((total - row['breached']) / total) * 100) if total else 100,
+                'completion_rate': round((row['completed'] / total * 100), 1) if total else 0,
+                'avg_resolution_hours': avg_resolution.total_seconds() / 3600 if avg_resolution else 0,
+            }
+        return stats
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from hotel_app.notification_retention import archivable, archive_notifications
+
+
+class Command(BaseCommand):
+    help = ('Move read notifications older than the retention period to the notification archive. '
+            'Each archived notification is recorded as deleted in the audit log. Run it daily, e.g. from cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Archive read notifications older than this many days (default: NOTIFICATION_RETENTION_DAYS)')
+        parser.add_argument('--batch-size', type=int, help='Notifications moved per transaction (default: NOTIFICATION_ARCHIVE_BATCH_SIZE)')
+        parser.add_argument('--limit', type=int, help='Stop after archiving this many notifications')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many notifications would be archived')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = archivable(options['days']).count()
+            self.stdout.write(f'{count} read notifications would be archived.')
+            return
+
+        total = archive_notifications(
+            older_than_days=options['days'],
+            batch_size=options['batch_size'],
+            limit=options['limit'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} read notifications.'))
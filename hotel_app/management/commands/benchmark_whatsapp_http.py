@@ -0,0 +1,78 @@
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management.base import BaseCommand
+
+from hotel_app.whatsapp_service import WhatsAppService, build_session
+
+
+class StubGraphHandler(BaseHTTPRequestHandler):
+    """Answers every POST like the Graph API messages endpoint, with keep-alive."""
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; without this, Nagle's algorithm
+        # stalls every response on a kept-alive connection
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = json.dumps({'messages': [{'id': 'wamid.stub'}]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Compare WhatsApp send throughput with one connection per message vs the pooled session, against a local stub server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500, help='Messages sent per run (default 500)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent senders (default 8)')
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubGraphHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        api_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+        service = WhatsAppService()
+        service.api_url = api_url
+        service.access_token = 'benchmark'
+        service.session = build_session(pool_size=options['concurrency'])
+        url = f'{service.api_url}/{service.phone_number_id}/messages'
+
+        def unpooled(i):
+            # What _send_text_message did before: a new connection per message, no timeout
+            payload = {'messaging_product': 'whatsapp', 'to': f'+1555{i:07d}', 'type': 'text', 'text': {'body': 'Benchmark'}}
+            response = requests.post(url, json=payload, headers={'Authorization': f'Bearer {service.access_token}'})
+            return response.ok
+
+        def pooled(i):
+            return service.send_text(f'+1555{i:07d}', 'Benchmark')
+
+        try:
+            for label, send in (('requests.post per message', unpooled), ('pooled session', pooled)):
+                rate, failures = self.run(send, options['messages'], options['concurrency'])
+                self.stdout.write(f'{label:<28} {rate:8.1f} msg/s ({failures} failed)')
+        finally:
+            server.shutdown()
+            service.session.close()
+
+    def run(self, send, count, concurrency):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            started = time.perf_counter()
+            results = list(executor.map(send, range(count)))
+            elapsed = time.perf_counter() - started
+        return count / elapsed, results.count(False)
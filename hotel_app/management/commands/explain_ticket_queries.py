@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from hotel_app.models import Department, ServiceRequest
+from hotel_app.sla_sweep import breach_candidates
+
+User = get_user_model()
+
+OPEN_STATUSES = ['pending', 'assigned', 'accepted', 'in_progress', 'escalated']
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the hot ServiceRequest queries and report any that fall back to a full table scan.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--strict', action='store_true',
+                            help='Exit with an error if any query uses a full table scan')
+        parser.add_argument('--verbose-plans', action='store_true',
+                            help='Print the full EXPLAIN output for every query')
+
+    def hot_queries(self):
+        """The query shapes issued by the dashboards and the SLA sweep."""
+        now = timezone.now()
+        department = Department.objects.order_by('id').first()
+        department_id = department.id if department else 0
+        user = User.objects.order_by('id').first()
+        user_id = user.id if user else 0
+        sweep = breach_candidates(now)
+
+        return [
+            ('department open tickets',
+             ServiceRequest.objects.filter(department_id=department_id, status__in=OPEN_STATUSES)),
+            ('my tickets (assignee)',
+             ServiceRequest.objects.filter(assignee_user_id=user_id, status='in_progress')),
+            ('my tickets (requester)',
+             ServiceRequest.objects.filter(requester_user_id=user_id, status='pending')),
+            ('overdue tickets',
+             ServiceRequest.objects.filter(status__in=OPEN_STATUSES, due_at__lt=now)),
+            ('SLA sweep (response)', sweep['response']),
+            ('SLA sweep (resolution)', sweep['resolution']),
+            ('critical tickets widget',
+             ServiceRequest.objects.filter(priority='critical').order_by('-created_at')[:4]),
+            ('tickets created in range',
+             ServiceRequest.objects.filter(created_at__gte=now - timezone.timedelta(days=7), created_at__lt=now)),
+            ('department status counts',
+             ServiceRequest.objects.filter(department__isnull=False).order_by().values('department_id', 'status')),
+        ]
+
+    def is_full_scan(self, plan):
+        vendor = connection.vendor
+        lines = [line.strip() for line in plan.splitlines()]
+        if vendor == 'mysql':
+            # MySQL >= 8.0.16 defaults to FORMAT=TREE ("Table scan on ..."); older
+            # servers give the tabular plan, where access type ALL is a full scan
+            return any(
+                'Table scan on hotel_app_servicerequest' in line
+                or (' ALL ' in f' {line} ' and 'hotel_app_servicerequest' in line)
+                for line in lines
+            )
+        if vendor == 'sqlite':
+            return any(
+                'SCAN hotel_app_servicerequest' in line and 'USING' not in line
+                for line in lines
+            )
+        if vendor == 'postgresql':
+            return any('Seq Scan on hotel_app_servicerequest' in line for line in lines)
+        return False
+
+    def handle(self, *args, **options):
+        row_count = ServiceRequest.objects.count()
+        self.stdout.write(self.style.SUCCESS(
+            f'EXPLAIN for hot ServiceRequest queries ({connection.vendor}, {row_count} rows)'
+        ))
+        self.stdout.write('=' * 70)
+
+        full_scans = []
+        failed = []
+        for label, queryset in self.hot_queries():
+            try:
+                plan = queryset.explain()
+            except Exception as e:
+                failed.append(label)
+                self.stdout.write(self.style.ERROR(f'{label:<30} EXPLAIN failed: {str(e)}'))
+                continue
+
+            if self.is_full_scan(plan):
+                full_scans.append(label)
+                self.stdout.write(self.style.WARNING(f'{label:<30} FULL SCAN'))
+            else:
+                self.stdout.write(f'{label:<30} ok')
+
+            if options['verbose_plans'] or self.is_full_scan(plan):
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+
+        self.stdout.write('=' * 70)
+        problems = []
+        if full_scans:
+            message = f'{len(full_scans)} query(s) use a full table scan: {", ".join(full_scans)}'
+            if row_count < 10000:
+                message += ' (small tables may be scanned regardless of indexes; re-run on production-sized data)'
+            problems.append(message)
+        if failed:
+            problems.append(f'{len(failed)} query(s) could not be explained: {", ".join(failed)}')
+        if problems:
+            if options['strict']:
+                raise CommandError('; '.join(problems))
+            for message in problems:
+                self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('All hot queries use an index.'))
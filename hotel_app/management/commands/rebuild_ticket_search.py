@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from hotel_app.models import ServiceRequest, ServiceRequestSearchToken
+from hotel_app.ticket_search import reindex_queryset, uses_fulltext
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the ticket search index (FULLTEXT document on MySQL, search tokens elsewhere)'
+
+    def handle(self, *args, **options):
+        if not uses_fulltext():
+            ServiceRequestSearchToken.objects.all().delete()
+
+        total = reindex_queryset(ServiceRequest.objects.all())
+
+        backend = 'FULLTEXT document' if uses_fulltext() else 'search tokens'
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} tickets ({backend}).'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from hotel_app.message_queue import MessageWorker
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbound WhatsApp/Twilio messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Concurrent sends (default: MESSAGE_WORKER_THREADS)')
+        parser.add_argument('--batch-size', type=int, help='Messages claimed per batch (default: MESSAGE_WORKER_BATCH_SIZE)')
+        parser.add_argument('--poll-interval', type=float, default=2,
+                            help='Seconds to wait when the queue is empty (default 2)')
+        parser.add_argument('--once', action='store_true',
+                            help='Send everything that is currently due and exit')
+
+    def handle(self, *args, **options):
+        worker = MessageWorker(max_workers=options['workers'], batch_size=options['batch_size'])
+        try:
+            if options['once']:
+                total = 0
+                while True:
+                    processed = worker.run_once()
+                    if not processed:
+                        break
+                    total += processed
+                self.stdout.write(self.style.SUCCESS(f'Processed {total} outbound messages.'))
+                return
+
+            self.stdout.write(self.style.SUCCESS('Message worker started. Press Ctrl+C to stop.'))
+            try:
+                worker.run_forever(poll_interval=options['poll_interval'])
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING('Message worker stopped.'))
+        finally:
+            worker.shutdown()
@@ -0,0 +1,43 @@
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from hotel_app.sla_scheduler import SLADeadlineScheduler
+from hotel_app.tasks import notify_sla_breaches
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run the deadline-driven SLA scheduler (flags breaches as their deadlines pass)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refresh-interval', type=float, default=5,
+                            help='Seconds between checks for new or changed tickets (default 5)')
+        parser.add_argument('--once', action='store_true',
+                            help='Load deadlines, flag anything already due and exit')
+
+    def handle(self, *args, **options):
+        scheduler = SLADeadlineScheduler(
+            refresh_interval=options['refresh_interval'],
+            on_breach=self.on_breach,
+            overlap=settings.SLA_SCHEDULER_OVERLAP_SECONDS,
+            reload_interval=settings.SLA_SCHEDULER_RELOAD_SECONDS,
+        )
+
+        if options['once']:
+            scheduler.load()
+            scheduler.run_once()
+            self.stdout.write(self.style.SUCCESS(f'Tracking {len(scheduler)} upcoming SLA deadlines.'))
+            return
+
+        self.stdout.write(self.style.SUCCESS('SLA scheduler started. Press Ctrl+C to stop.'))
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('SLA scheduler stopped.'))
+
+    def on_breach(self, breaches):
+        count = notify_sla_breaches(breaches)
+        self.stdout.write(f'Flagged {count} newly breached tickets.')
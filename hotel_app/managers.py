@@ -0,0 +1,156 @@
+"""
+Custom querysets and database expressions for hotel_app models.
+"""
+
+from django.db import models
+from django.db.models import Case, Count, F, FloatField, IntegerField, Max, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+class SecondsBetween(models.Func):
+    """Number of seconds from ``start`` to ``end`` (negative if ``end`` is earlier).
+
+    Compiled per backend so the difference is computed in SQL and can be used
+    for ordering and filtering.
+    """
+
+    output_field = FloatField()
+
+    def __init__(self, start, end, **extra):
+        super().__init__(start, end, **extra)
+
+    def _compile_operands(self, compiler):
+        start, end = self.source_expressions
+        start_sql, start_params = compiler.compile(start)
+        end_sql, end_params = compiler.compile(end)
+        return start_sql, list(start_params), end_sql, list(end_params)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # PostgreSQL and other backends with native interval arithmetic
+        start_sql, start_params, end_sql, end_params = self._compile_operands(compiler)
+        return f'EXTRACT(EPOCH FROM ({end_sql} - {start_sql}))', end_params + start_params
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        start_sql, start_params, end_sql, end_params = self._compile_operands(compiler)
+        return f'(TIMESTAMPDIFF(MICROSECOND, {start_sql}, {end_sql}) / 1000000.0)', start_params + end_params
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        start_sql, start_params, end_sql, end_params = self._compile_operands(compiler)
+        return f'((julianday({end_sql}) - julianday({start_sql})) * 86400.0)', end_params + start_params
+
+
+class ServiceRequestQuerySet(models.QuerySet):
+    """QuerySet for ServiceRequest with SQL-side SLA annotations."""
+
+    CLOSED_STATUSES = ('completed', 'closed')
+
+    # Risk buckets, ordered so that ``order_by('-sla_risk')`` puts the most
+    # urgent tickets first.
+    RISK_NONE = 0       # closed/completed or no SLA deadline
+    RISK_ON_TRACK = 1   # < 70% of the SLA window used
+    RISK_WARNING = 2    # 70-90% used
+    RISK_CRITICAL = 3   # > 90% used
+    RISK_BREACHED = 4   # deadline passed while still open
+
+    RISK_CHOICES = {
+        'none': RISK_NONE,
+        'on_track': RISK_ON_TRACK,
+        'warning': RISK_WARNING,
+        'critical': RISK_CRITICAL,
+        'breached': RISK_BREACHED,
+    }
+
+    def with_sla_metrics(self, now=None):
+        """Annotate SLA progress computed by the database.
+
+        - ``sla_elapsed_fraction``: share of the SLA window (created_at -> due_at)
+          used so far, or until completion for completed tickets.
+        - ``sla_seconds_to_breach``: seconds from ``now`` until due_at
+          (negative once overdue).
+        - ``sla_risk``: integer bucket, see ``RISK_*``.
+        """
+        now = now or timezone.now()
+        now_value = Value(now, output_field=models.DateTimeField())
+        window = SecondsBetween(F('created_at'), F('due_at'))
+        elapsed = SecondsBetween(F('created_at'), Coalesce(F('completed_at'), now_value))
+
+        is_open = ~Q(status__in=self.CLOSED_STATUSES) & Q(completed_at__isnull=True)
+
+        return self.annotate(
+            sla_elapsed_fraction=Case(
+                When(due_at__gt=F('created_at'), then=elapsed / window),
+                default=Value(None),
+                output_field=FloatField(),
+            ),
+            sla_seconds_to_breach=SecondsBetween(now_value, F('due_at')),
+        ).annotate(
+            sla_risk=Case(
+                When(Q(due_at__isnull=True) | ~is_open, then=Value(self.RISK_NONE)),
+                When(due_at__lte=now, then=Value(self.RISK_BREACHED)),
+                When(sla_elapsed_fraction__gt=0.9, then=Value(self.RISK_CRITICAL)),
+                When(sla_elapsed_fraction__gt=0.7, then=Value(self.RISK_WARNING)),
+                default=Value(self.RISK_ON_TRACK),
+                output_field=IntegerField(),
+            ),
+        )
+
+    def by_sla_risk(self, now=None):
+        """Most urgent first: highest risk bucket, then closest deadline."""
+        qs = self if 'sla_risk' in self.query.annotations else self.with_sla_metrics(now)
+        return qs.order_by('-sla_risk', F('sla_seconds_to_breach').asc(nulls_last=True), '-id')
+
+    def at_risk(self, level, now=None):
+        """Filter to tickets in the given risk bucket (name or integer)."""
+        if isinstance(level, str):
+            level = self.RISK_CHOICES[level]
+        qs = self if 'sla_risk' in self.query.annotations else self.with_sla_metrics(now)
+        return qs.filter(sla_risk=level)
+
+
+class DepartmentRequestSLAQuerySet(models.QuerySet):
+    """QuerySet for DepartmentRequestSLA with a grouped, per-priority view."""
+
+    PRIORITIES = ('critical', 'high', 'normal', 'low')
+    # Priority whose times stand for the whole combination in the editor
+    DEFAULT_PRIORITY = 'normal'
+
+    def _for_priority(self, priority, field):
+        return Max(Case(When(priority=priority, then=F(field)), output_field=IntegerField()))
+
+    def priority_matrix(self):
+        """One row per (department, request type) with the priorities pivoted into columns.
+
+        Rows are dicts with ``department_id``, ``department_name``,
+        ``request_type_id``, ``request_type_name``, ``rule_count``,
+        ``<priority>_response`` / ``<priority>_resolution`` (None when that
+        priority has no rule) and ``response_minutes`` / ``resolution_minutes``
+        taken from ``DEFAULT_PRIORITY`` (or the longest time if it is missing).
+        """
+        pivot = {}
+        for priority in self.PRIORITIES:
+            pivot[f'{priority}_response'] = self._for_priority(priority, 'response_time_minutes')
+            pivot[f'{priority}_resolution'] = self._for_priority(priority, 'resolution_time_minutes')
+
+        return self.values(
+            'department_id', 'request_type_id',
+            department_name=F('department__name'),
+            request_type_name=F('request_type__name'),
+        ).annotate(
+            rule_count=Count('id'),
+            response_minutes=Coalesce(
+                self._for_priority(self.DEFAULT_PRIORITY, 'response_time_minutes'), Max('response_time_minutes'),
+                output_field=IntegerField(),
+            ),
+            resolution_minutes=Coalesce(
+                self._for_priority(self.DEFAULT_PRIORITY, 'resolution_time_minutes'), Max('resolution_time_minutes'),
+                output_field=IntegerField(),
+            ),
+            **pivot
+        ).order_by('department_name', 'request_type_name', 'department_id', 'request_type_id')
+
+    def search(self, query):
+        """Match department or request type names."""
+        if not query:
+            return self
+        return self.filter(Q(department__name__icontains=query) | Q(request_type__name__icontains=query))
@@ -0,0 +1,205 @@
+"""
+Outbound message queue.
+Broadcasts are stored as OutboundMessage rows grouped in an OutboundMessageJob
+and sent by ``manage.py run_message_worker`` instead of inside the HTTP
+request. The worker claims due messages in batches, sends them through a
+bounded thread pool with a token-bucket rate limit per provider, and records
+the outcome of each message; failed sends are retried with exponential
+backoff until MESSAGE_MAX_ATTEMPTS is reached.
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import OutboundMessage, OutboundMessageJob
+
+logger = logging.getLogger(__name__)
+
+RATE_SETTINGS = {
+    'whatsapp': ('WHATSAPP_RATE_PER_SECOND', 20),
+    'twilio': ('TWILIO_RATE_PER_SECOND', 10),
+}
+RESULT_FIELDS = ['status', 'attempts', 'next_attempt_at', 'sent_at', 'provider_message_id', 'last_error']
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``acquire`` blocks until a token is available.
+
+    A ``rate`` of 0 disables the limit.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(self.rate, 1))
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self.sleep(wait)
+
+
+def _send_whatsapp(recipient, body):
+    from .whatsapp_service import whatsapp_service
+    return whatsapp_service.send_text_message(recipient, body)
+
+
+def _send_twilio(recipient, body):
+    from .twilio_service import twilio_service
+    return twilio_service.send_text_message(recipient, body)
+
+
+SENDERS = {
+    'whatsapp': _send_whatsapp,
+    'twilio': _send_twilio,
+}
+
+
+def enqueue(recipients, body, provider='whatsapp', description='', created_by=None):
+    """Queue ``body`` for every phone number in ``recipients``; returns the OutboundMessageJob."""
+    if provider not in SENDERS:
+        raise ValueError(f"Unknown messaging provider: {provider}")
+    recipients = [phone for phone in dict.fromkeys(recipients) if phone]
+    with transaction.atomic():
+        job = OutboundMessageJob.objects.create(
+            description=description[:200],
+            created_by=created_by if getattr(created_by, 'pk', None) else None,
+        )
+        OutboundMessage.objects.bulk_create(
+            [OutboundMessage(job=job, provider=provider, recipient=phone, body=body) for phone in recipients],
+            batch_size=1000,
+        )
+    logger.info(f"Queued {len(recipients)} {provider} messages as job #{job.pk}")
+    return job
+
+
+def job_summary(job):
+    """Message counts of ``job`` by status."""
+    counts = dict(job.messages.values_list('status').annotate(total=Count('id')).order_by())
+    summary = {status: counts.get(status, 0) for status, _ in OutboundMessage.STATUS_CHOICES}
+    summary['total'] = sum(counts.values())
+    return summary
+
+
+def retry_delay(attempts):
+    """Backoff before attempt ``attempts + 1``: doubling from MESSAGE_RETRY_BASE_SECONDS, with jitter."""
+    base = getattr(settings, 'MESSAGE_RETRY_BASE_SECONDS', 30)
+    cap = getattr(settings, 'MESSAGE_RETRY_MAX_SECONDS', 3600)
+    return min(base * 2 ** (attempts - 1), cap) * random.uniform(0.8, 1.2)
+
+
+class MessageWorker:
+    """Claims due messages and sends them concurrently.
+
+    Only the pool threads talk to the providers; claiming and recording
+    results happens on the calling thread, so the pool never touches the
+    database.
+    """
+
+    def __init__(self, max_workers=None, batch_size=None, senders=None):
+        self.max_workers = max_workers or getattr(settings, 'MESSAGE_WORKER_THREADS', 8)
+        self.batch_size = batch_size or getattr(settings, 'MESSAGE_WORKER_BATCH_SIZE', 100)
+        self.max_attempts = getattr(settings, 'MESSAGE_MAX_ATTEMPTS', 5)
+        self.senders = senders or SENDERS
+        self.buckets = {
+            provider: TokenBucket(getattr(settings, setting, default))
+            for provider, (setting, default) in RATE_SETTINGS.items()
+        }
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='message-worker')
+
+    def claim(self):
+        """Mark a batch of due messages as sending and return them.
+
+        Messages left in ``sending`` by a worker that died are picked up again
+        after MESSAGE_CLAIM_TIMEOUT_SECONDS. Concurrent workers skip each
+        other's locked rows where the database supports SKIP LOCKED (MySQL 8+,
+        PostgreSQL); elsewhere they wait for the lock instead.
+        """
+        now = timezone.now()
+        stale = now - timedelta(seconds=getattr(settings, 'MESSAGE_CLAIM_TIMEOUT_SECONDS', 300))
+        due = OutboundMessage.objects.filter(
+            Q(status='queued', next_attempt_at__lte=now) | Q(status='sending', claimed_at__lt=stale)
+        )
+        skip_locked = connection.features.has_select_for_update_skip_locked
+        with transaction.atomic():
+            ids = list(due.select_for_update(skip_locked=skip_locked).order_by('pk').values_list('pk', flat=True)[:self.batch_size])
+            OutboundMessage.objects.filter(pk__in=ids).update(status='sending', claimed_at=now)
+        return list(OutboundMessage.objects.filter(pk__in=ids))
+
+    def _send(self, message):
+        sender = self.senders.get(message.provider)
+        if sender is None:
+            return {'success': False, 'error': f"Unknown messaging provider: {message.provider}"}
+        bucket = self.buckets.get(message.provider)
+        if bucket:
+            bucket.acquire()
+        try:
+            return sender(message.recipient, message.body) or {}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _record(self, message, result, now):
+        if result.get('circuit_open'):
+            # Never reached the provider: try again once the circuit may have recovered
+            message.status = 'queued'
+            message.next_attempt_at = now + timedelta(seconds=getattr(settings, 'CIRCUIT_RESET_SECONDS', 30))
+            message.last_error = str(result.get('error'))
+            return
+        message.attempts += 1
+        if result.get('success'):
+            message.status = 'sent'
+            message.sent_at = now
+            message.provider_message_id = result.get('message_id')
+            message.last_error = None
+        elif message.attempts >= self.max_attempts:
+            message.status = 'failed'
+            message.last_error = str(result.get('error') or 'Unknown error')
+        else:
+            message.status = 'queued'
+            message.next_attempt_at = now + timedelta(seconds=retry_delay(message.attempts))
+            message.last_error = str(result.get('error') or 'Unknown error')
+
+    def run_once(self):
+        """Send one batch; returns the number of messages processed."""
+        messages = self.claim()
+        if not messages:
+            return 0
+        results = list(self.executor.map(self._send, messages))
+        now = timezone.now()
+        for message, result in zip(messages, results):
+            self._record(message, result, now)
+        OutboundMessage.objects.bulk_update(messages, RESULT_FIELDS, batch_size=500)
+
+        sent = sum(1 for message in messages if message.status == 'sent')
+        logger.info(f"Processed {len(messages)} outbound messages ({sent} sent)")
+        return len(messages)
+
+    def run_forever(self, poll_interval=2):
+        while True:
+            if not self.run_once():
+                time.sleep(poll_interval)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:25
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_search(apps, schema_editor):
+    """Index the tickets that already exist; runs before the FULLTEXT index is built."""
+    ServiceRequest = apps.get_model('hotel_app', 'ServiceRequest')
+    ServiceRequestSearchToken = apps.get_model('hotel_app', 'ServiceRequestSearchToken')
+
+    if schema_editor.connection.vendor == 'mysql':
+        ticket = ServiceRequest._meta.db_table
+        request_type = ServiceRequest._meta.get_field('request_type').related_model._meta.db_table
+        location = ServiceRequest._meta.get_field('location').related_model._meta.db_table
+        schema_editor.execute(
+            f'UPDATE {ticket} '
+            f'LEFT JOIN {request_type} ON {request_type}.id = {ticket}.request_type_id '
+            f'LEFT JOIN {location} ON {location}.id = {ticket}.location_id '
+            f"SET {ticket}.search_document = CONCAT_WS(' ', {ticket}.notes, {request_type}.name, "
+            f'{location}.name, {location}.room_no)'
+        )
+        return
+
+    tokens = []
+    tickets = ServiceRequest.objects.select_related('request_type', 'location').order_by('pk')
+    for ticket in tickets.iterator(chunk_size=500):
+        parts = [ticket.notes or '']
+        if ticket.request_type:
+            parts.append(ticket.request_type.name)
+        if ticket.location:
+            parts += [ticket.location.name, ticket.location.room_no or '']
+        words = {word[:64] for word in re.findall(r'\w+', ' '.join(parts).lower())}
+        tokens += [ServiceRequestSearchToken(ticket_id=ticket.pk, token=word) for word in words]
+        if len(tokens) >= 1000:
+            ServiceRequestSearchToken.objects.bulk_create(tokens)
+            tokens = []
+    ServiceRequestSearchToken.objects.bulk_create(tokens)
+
+
+def create_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            'CREATE FULLTEXT INDEX sr_search_document_ft ON hotel_app_servicerequest (search_document)'
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('DROP INDEX sr_search_document_ft ON hotel_app_servicerequest')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0028_servicerequest_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicerequest',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.CreateModel(
+            name='ServiceRequestSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='hotel_app.servicerequest')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'ticket'], name='sr_search_token_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_search, migrations.RunPython.noop),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
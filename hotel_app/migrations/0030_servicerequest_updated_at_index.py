@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0029_servicerequest_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='servicerequest',
+            index=models.Index(fields=['updated_at'], name='sr_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_ledger(apps, schema_editor):
+    """Record breaches that already exist so they are not announced again."""
+    ServiceRequest = apps.get_model('hotel_app', 'ServiceRequest')
+    SLABreachNotification = apps.get_model('hotel_app', 'SLABreachNotification')
+    for breach_type, flag in (('response', 'response_sla_breached'), ('resolution', 'resolution_sla_breached')):
+        ticket_ids = ServiceRequest.objects.filter(**{flag: True}).values_list('pk', flat=True)
+        SLABreachNotification.objects.bulk_create(
+            [SLABreachNotification(ticket_id=ticket_id, breach_type=breach_type) for ticket_id in ticket_ids.iterator()],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0030_servicerequest_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SLABreachNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('breach_type', models.CharField(choices=[('response', 'Response'), ('resolution', 'Resolution')], max_length=20)),
+                ('notified_at', models.DateTimeField(auto_now_add=True)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sla_breach_notifications', to='hotel_app.servicerequest')),
+            ],
+            options={
+                'verbose_name': 'SLA Breach Notification',
+                'verbose_name_plural': 'SLA Breach Notifications',
+                'unique_together': {('ticket', 'breach_type')},
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
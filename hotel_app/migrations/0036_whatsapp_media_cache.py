@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:58
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotel_app', '0035_outbound_message_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WhatsAppMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone_number_id', models.CharField(default='', max_length=64)),
+                ('sha256', models.CharField(max_length=64)),
+                ('media_id', models.CharField(max_length=100)),
+                ('mime_type', models.CharField(default='image/png', max_length=50)),
+                ('uploaded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'unique_together': {('phone_number_id', 'sha256')},
+            },
+        ),
+    ]
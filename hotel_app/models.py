@@ -7,6 +7,8 @@ import os
 import random
 import string
 
+from .managers import DepartmentRequestSLAQuerySet, ServiceRequestQuerySet
+
 User = get_user_model()
 
 # ---- Department & Groups ----
@@ -128,20 +130,143 @@ class Notification(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     related_object_id = models.CharField(max_length=100, blank=True, null=True)
     related_object_type = models.CharField(max_length=100, blank=True, null=True)
+    # Repeats of the same event folded into this row (see notification_fanout.coalesce)
+    occurrences = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Unread/recent polls filter by recipient and is_read, newest first
+            models.Index(fields=['recipient', 'is_read', 'created_at'], name='notif_recipient_read_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.recipient.username}"
     
     def mark_as_read(self):
-        self.is_read = True
-        self.save()
+        self._set_read(True)
     
     def mark_as_unread(self):
-        self.is_read = False
-        self.save()
+        self._set_read(False)
+
+    def _set_read(self, is_read):
+        """Flip is_read with a conditional UPDATE and keep the unread counter in step."""
+        from .notification_counters import adjust_unread
+        changed = Notification.objects.filter(pk=self.pk, is_read=not is_read).update(is_read=is_read)
+        self.is_read = is_read
+        if changed:
+            adjust_unread({self.recipient_id: -1 if is_read else 1})
+
+
+class NotificationCounter(models.Model):
+    """Denormalized number of unread notifications per user.
+
+    Maintained by hotel_app.notification_counters on insert, read and delete,
+    so badge counts never COUNT over the notification table.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True,
+                                related_name='notification_counter')
+    unread = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
+
+class NotificationArchive(models.Model):
+    """Read notifications moved out of the hot table by ``manage.py archive_notifications``.
+
+    Rows keep the id they had in Notification.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_notifications')
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    notification_type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES, default='info')
+    created_at = models.DateTimeField()
+    related_object_id = models.CharField(max_length=100, blank=True, null=True)
+    related_object_type = models.CharField(max_length=100, blank=True, null=True)
+    occurrences = models.PositiveIntegerField(default=1)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', 'created_at'], name='notif_archive_recipient_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} - {self.recipient_id} (archived)"
+
+
+# ---- Outbound Messaging ----
+
+class OutboundMessageJob(models.Model):
+    """A batch of outbound messages (e.g. one broadcast), sent by ``manage.py run_message_worker``."""
+    description = models.CharField(max_length=200, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Job #{self.pk}: {self.description}"
+
+
+class OutboundMessage(models.Model):
+    PROVIDER_CHOICES = [
+        ('whatsapp', 'WhatsApp Business API'),
+        ('twilio', 'Twilio'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    job = models.ForeignKey(OutboundMessageJob, on_delete=models.CASCADE, related_name='messages', null=True, blank=True)
+    provider = models.CharField(max_length=20, choices=PROVIDER_CHOICES, default='whatsapp')
+    recipient = models.CharField(max_length=32)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    provider_message_id = models.CharField(max_length=100, blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['pk']
+        indexes = [
+            # The worker polls for due messages
+            models.Index(fields=['status', 'next_attempt_at'], name='outbound_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider} to {self.recipient} ({self.status})"
+
+
+class WhatsAppMedia(models.Model):
+    """Media uploaded to the WhatsApp Cloud API, keyed by the SHA-256 of its bytes so identical files are uploaded once.
+
+    Media ids belong to the sending phone number, so entries are per ``phone_number_id``.
+    """
+    phone_number_id = models.CharField(max_length=64, default='')
+    sha256 = models.CharField(max_length=64)
+    media_id = models.CharField(max_length=100)
+    mime_type = models.CharField(max_length=50, default='image/png')
+    uploaded_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('phone_number_id', 'sha256')
+
+    def __str__(self):
+        return f"{self.media_id} ({self.sha256[:12]})"
 
 
 # ---- Locations ----
@@ -313,6 +438,27 @@ class ServiceRequest(models.Model):
     resolution_sla_breached = models.BooleanField(default=False)
     notes = models.TextField(blank=True, null=True)
     resolution_notes = models.TextField(blank=True, null=True)
+    # Denormalised text for the MySQL FULLTEXT index, maintained by ticket_search
+    search_document = models.TextField(blank=True, default='', editable=False)
+
+    objects = ServiceRequestQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Department boards / DepartmentMetrics: department + open/closed status
+            models.Index(fields=['department', 'status'], name='sr_dept_status_idx'),
+            # My tickets: assignee or requester filtered by status
+            models.Index(fields=['assignee_user', 'status'], name='sr_assignee_status_idx'),
+            models.Index(fields=['requester_user', 'status'], name='sr_requester_status_idx'),
+            # SLA sweep and overdue counts: status filter + due_at range/order
+            models.Index(fields=['status', 'due_at'], name='sr_status_due_idx'),
+            # Critical tickets widget and priority filters ordered by recency
+            models.Index(fields=['priority', '-created_at'], name='sr_priority_created_idx'),
+            # Date-range analytics
+            models.Index(fields=['created_at'], name='sr_created_idx'),
+            # Incremental refresh in the SLA scheduler
+            models.Index(fields=['updated_at'], name='sr_updated_idx'),
+        ]
 
     def __str__(self):
         return f'Request #{self.pk}'
@@ -336,52 +482,23 @@ class ServiceRequest(models.Model):
         if self.completed_at and self.due_at:
             self.sla_breached = self.completed_at > self.due_at
 
+        # Write the MySQL search document in the same statement as the text it is built from
+        from .ticket_search import prepare_document
+        kwargs['update_fields'] = prepare_document(self, kwargs.get('update_fields'))
+
         super().save(*args, **kwargs)
 
     def set_sla_times(self):
-        """Set SLA times based on priority and configuration."""
-        try:
-            # First, try to get department/request-specific SLA configuration
-            if self.department and self.request_type:
-                from .models import DepartmentRequestSLA
-                config = DepartmentRequestSLA.objects.get(
-                    department=self.department,
-                    request_type=self.request_type,
-                    priority=self.priority
-                )
-                # Convert minutes to hours for the existing fields
-                self.response_sla_hours = config.response_time_minutes / 60.0
-                self.sla_hours = config.resolution_time_minutes / 60.0
-                return
-        except DepartmentRequestSLA.DoesNotExist:
-            # If no department/request-specific config, continue to general config
-            pass
-        
-        try:
-            from .models import SLAConfiguration
-            config = SLAConfiguration.objects.get(priority=self.priority)
-            
-            # Convert minutes to hours for the existing fields
-            self.response_sla_hours = config.response_time_minutes / 60.0
-            self.sla_hours = config.resolution_time_minutes / 60.0
-        except SLAConfiguration.DoesNotExist:
-            # Use default values if no configuration found
-            if self.priority == 'critical':
-                self.response_sla_hours = 5 / 60.0  # 5 minutes
-                self.sla_hours = 5 / 60.0  # 5 minutes
-            elif self.priority == 'high':
-                self.response_sla_hours = 10 / 60.0  # 10 minutes
-                self.sla_hours = 10 / 60.0  # 10 minutes
-            elif self.priority == 'normal':
-                self.response_sla_hours = 15 / 60.0  # 15 minutes
-                self.sla_hours = 15 / 60.0  # 15 minutes
-            elif self.priority == 'low':
-                self.response_sla_hours = 20 / 60.0  # 20 minutes
-                self.sla_hours = 20 / 60.0  # 20 minutes
-            else:
-                # Default values
-                self.response_sla_hours = 1  # 1 hour
-                self.sla_hours = 24  # 24 hours
+        """Set SLA times based on priority and configuration.
+
+        Department/request-type rules take precedence over the per-priority
+        SLAConfiguration, which falls back to built-in defaults. Rules are served
+        from the in-process policy matrix, so this issues no queries once warm.
+        """
+        from .sla_policy import resolve_sla_hours
+        self.response_sla_hours, self.sla_hours = resolve_sla_hours(
+            self.department_id, self.request_type_id, self.priority
+        )
 
     def assign_to_user(self, user):
         """Assign the ticket to a user and automatically accept it."""
@@ -464,18 +581,14 @@ class ServiceRequest(models.Model):
         if not self.department:
             return
             
-        # Get all users in the department
-        department_users = User.objects.filter(userprofile__department=self.department)
-        
-        if department_users.exists():
-            # Create notifications for all department staff
-            create_bulk_notifications(
-                recipients=department_users,
-                title=f"New Ticket #{self.pk} Assigned: {self.request_type.name}",
-                message=f"A new ticket #{self.pk} has been assigned to your department: {self.notes[:100]}...",
-                notification_type='request',
-                related_object=self
-            )
+        # Create notifications for all department staff (one INSERT per batch of recipients)
+        create_bulk_notifications(
+            recipients=User.objects.filter(userprofile__department=self.department),
+            title=f"New Ticket #{self.pk} Assigned: {self.request_type.name}",
+            message=f"A new ticket #{self.pk} has been assigned to your department: {(self.notes or '')[:100]}...",
+            notification_type='request',
+            related_object=self
+        )
 
     def notify_assigned_user(self):
         """Notify the user assigned to the ticket."""
@@ -505,20 +618,18 @@ class ServiceRequest(models.Model):
 
     def notify_department_leader_on_escalation(self):
         """Notify department leader when ticket is escalated."""
-        from .utils import create_notification
+        from .utils import create_bulk_notifications
         
         if self.department:
             # In a real implementation, you would identify the department leader
             # For now, we'll notify all department staff about the escalation
-            department_users = User.objects.filter(userprofile__department=self.department)
-            for user in department_users:
-                create_notification(
-                    recipient=user,
-                    title=f"Ticket #{self.pk} Escalated: {self.request_type.name}",
-                    message=f"Ticket #{self.pk} has been escalated. Please take immediate action.",
-                    notification_type='warning',
-                    related_object=self
-                )
+            create_bulk_notifications(
+                recipients=User.objects.filter(userprofile__department=self.department),
+                title=f"Ticket #{self.pk} Escalated: {self.request_type.name}",
+                message=f"Ticket #{self.pk} has been escalated. Please take immediate action.",
+                notification_type='warning',
+                related_object=self
+            )
 
     def check_sla_breaches(self):
         """Check if SLA has been breached and update flags accordingly."""
@@ -605,6 +716,20 @@ class ServiceRequest(models.Model):
             return f"{minutes}m"
 
 
+class ServiceRequestSearchToken(models.Model):
+    """Search token for a ticket, used by ticket_search on backends without FULLTEXT."""
+    ticket = models.ForeignKey(ServiceRequest, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['token', 'ticket'], name='sr_search_token_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.ticket_id}: {self.token}'
+
+
 class ServiceRequestStep(models.Model):
     request = models.ForeignKey(ServiceRequest, on_delete=models.CASCADE)
     step = models.ForeignKey(WorkflowStep, on_delete=models.CASCADE)
@@ -935,6 +1060,8 @@ class DepartmentRequestSLA(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = DepartmentRequestSLAQuerySet.as_manager()
+
     class Meta:
         unique_together = ('department', 'request_type', 'priority')
         verbose_name = "Department Request SLA"
@@ -944,6 +1071,30 @@ class DepartmentRequestSLA(models.Model):
         return f"{self.department.name} - {self.request_type.name} ({self.get_priority_display()})"
 
 
+class SLABreachNotification(models.Model):
+    """Ledger of SLA breach notifications: one row per ticket and breach type.
+
+    A ticket is announced at most once per breach type, however many times the
+    breach sweep runs.
+    """
+    BREACH_TYPES = [
+        ('response', 'Response'),
+        ('resolution', 'Resolution'),
+    ]
+
+    ticket = models.ForeignKey('ServiceRequest', on_delete=models.CASCADE, related_name='sla_breach_notifications')
+    breach_type = models.CharField(max_length=20, choices=BREACH_TYPES)
+    notified_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('ticket', 'breach_type')
+        verbose_name = "SLA Breach Notification"
+        verbose_name_plural = "SLA Breach Notifications"
+
+    def __str__(self):
+        return f"{self.get_breach_type_display()} breach notified for Request #{self.ticket_id}"
+
+
 # Legacy models for backward compatibility (will be deprecated)
 class BreakfastVoucher(models.Model):
     """Legacy model - use Voucher instead"""
@@ -0,0 +1,85 @@
+"""
+Per-user unread notification counters.
+NotificationCounter rows are adjusted with relative UPDATEs (``unread = unread
++ n``) whenever notifications are created, read or deleted. A user without a
+counter row gets one initialised from a single COUNT the first time it is
+read, so no backfill is required.
+
+A notification committed between that COUNT and the counter insert is missed
+by both, so each counter is also reset from a fresh COUNT when it is read at
+most once every NOTIFICATION_COUNTER_RECONCILE_SECONDS.
+"""
+
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Notification, NotificationCounter
+
+RECONCILE_KEY = 'hotel_app:notification_counter:reconciled:{}'
+
+
+def _initialise(user_ids):
+    """Create counters for ``user_ids`` from the current unread COUNT."""
+    counts = dict(
+        Notification.objects.filter(recipient_id__in=user_ids, is_read=False)
+        .values('recipient_id').annotate(total=Count('id')).values_list('recipient_id', 'total')
+    )
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id, unread=counts.get(user_id, 0)) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    return counts
+
+
+def adjust_unread(deltas):
+    """Apply ``{user_id: delta}`` to the unread counters (one UPDATE per distinct delta).
+
+    Users without a counter are skipped: their counter is initialised from the
+    table, which already reflects the change, when it is first read.
+    """
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if user_id and delta:
+            by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F('unread') + delta)
+
+
+def record_created(notifications):
+    """Count freshly inserted notifications (e.g. after ``bulk_create``, which sends no signals)."""
+    adjust_unread(Counter(n.recipient_id for n in notifications if not n.is_read))
+
+
+def mark_all_read(user):
+    """Mark every unread notification of ``user`` as read; returns the number changed."""
+    with transaction.atomic():
+        changed = Notification.objects.filter(recipient=user, is_read=False).update(is_read=True)
+        adjust_unread({user.pk: -changed})
+    return changed
+
+
+def reconcile(user_id):
+    """Reset the counter of ``user_id`` to the current unread COUNT."""
+    unread = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+    NotificationCounter.objects.filter(user_id=user_id).update(unread=unread)
+    return unread
+
+
+def _reconcile_due(user_id):
+    interval = getattr(settings, 'NOTIFICATION_COUNTER_RECONCILE_SECONDS', 600)
+    return bool(interval) and cache.add(RECONCILE_KEY.format(user_id), 1, interval)
+
+
+def unread_count(user):
+    """Unread notifications for ``user`` from the counter (never negative)."""
+    unread = NotificationCounter.objects.filter(user_id=user.pk).values_list('unread', flat=True).first()
+    if unread is None:
+        unread = _initialise([user.pk]).get(user.pk, 0)
+        _reconcile_due(user.pk)
+    elif _reconcile_due(user.pk):
+        unread = reconcile(user.pk)
+    return max(unread, 0)
@@ -0,0 +1,168 @@
+"""
+Set-based notification fan-out.
+Writes one notification per recipient without loading User objects: recipient
+ids are read from the queryset with ``values_list`` in keyset pages and the
+rows are inserted with one ``bulk_create`` per page. bulk_create sends no
+post_save, so unread counters and event streams are updated here. Counters
+only need the recipient ids. On backends whose bulk_create does not return
+pks (MySQL) the stream events are published without an id; the dashboards
+then fetch the new notifications, ids included, from the list API.
+
+Repeats of an event are coalesced: a notification with the same recipient,
+related object and type as an unread one created within
+NOTIFICATION_COALESCE_SECONDS updates that row (latest title and message,
+``occurrences + 1``) instead of adding another. The folded row keeps its id,
+so pollers pick it up through ``updated_since`` on the list API.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, QuerySet
+from django.utils import timezone
+
+from .models import Notification
+from .notification_counters import record_created
+from .realtime import publish_notifications
+
+
+def _recipient_id_batches(recipients, batch_size):
+    """Yield lists of distinct recipient ids from a User queryset, or an iterable of users or ids."""
+    if isinstance(recipients, QuerySet):
+        ids = recipients.order_by('pk').values_list('pk', flat=True).distinct()
+        last_id = None
+        while True:
+            page = ids if last_id is None else ids.filter(pk__gt=last_id)
+            batch = list(page[:batch_size])
+            if not batch:
+                return
+            yield batch
+            last_id = batch[-1]
+
+    ids = list(dict.fromkeys(getattr(recipient, 'pk', recipient) for recipient in recipients))
+    for start in range(0, len(ids), batch_size):
+        yield ids[start:start + batch_size]
+
+
+def related_fields(related_object):
+    if related_object is None:
+        return {}
+    return {
+        'related_object_id': related_object.pk,
+        'related_object_type': related_object.__class__.__name__,
+    }
+
+
+def coalesce_key(notification):
+    if not notification.related_object_id:
+        return None
+    return (
+        notification.recipient_id, notification.related_object_type,
+        str(notification.related_object_id), notification.notification_type,
+    )
+
+
+def coalesce(notifications):
+    """Fold ``notifications`` into recent unread rows for the same event; returns those still to insert.
+
+    Notifications that were folded get the pk and occurrence count of the row
+    they updated. Repeats within ``notifications`` itself are folded into the
+    first of them.
+    """
+    window = getattr(settings, 'NOTIFICATION_COALESCE_SECONDS', 300)
+    if window <= 0:
+        return list(notifications)
+
+    pending = {}
+    remaining = []
+    for notification in notifications:
+        key = coalesce_key(notification)
+        if key is None:
+            remaining.append(notification)
+        elif key in pending:
+            first = pending[key]
+            first.title, first.message = notification.title, notification.message
+            first.occurrences += 1
+        else:
+            pending[key] = notification
+    if not pending:
+        return remaining
+
+    now = timezone.now()
+    existing = {}
+    for row in Notification.objects.filter(
+        recipient_id__in={key[0] for key in pending},
+        related_object_id__in={key[2] for key in pending},
+        is_read=False,
+        created_at__gte=now - timedelta(seconds=window),
+    ).order_by('created_at').values('pk', 'recipient_id', 'related_object_type', 'related_object_id',
+                                    'notification_type', 'occurrences', 'created_at'):
+        key = (row['recipient_id'], row['related_object_type'], row['related_object_id'], row['notification_type'])
+        if key in pending:
+            existing[key] = row  # the newest matching row wins
+
+    folded = []
+    updates = defaultdict(list)
+    for key, notification in pending.items():
+        row = existing.get(key)
+        if row is None:
+            remaining.append(notification)
+            continue
+        # A fan-out folds every recipient's row with the same values: one UPDATE per distinct change
+        updates[(notification.title, notification.message, notification.occurrences)].append(row['pk'])
+        notification.pk = row['pk']
+        notification.created_at = row['created_at']
+        notification.occurrences += row['occurrences']
+        notification.updated_at = now
+        folded.append(notification)
+
+    for (title, message, occurrences), pks in updates.items():
+        Notification.objects.filter(pk__in=pks).update(
+            title=title,
+            message=message,
+            occurrences=F('occurrences') + occurrences,
+            updated_at=now,
+        )
+
+    # Still unread, so the unread counters do not change; refresh open streams
+    publish_notifications(folded)
+    return remaining
+
+
+def insert_notifications(notifications, batch_size=None):
+    """Coalesce, then insert the remaining Notification instances in chunks and count and publish them.
+
+    Returns the inserted notifications; their pks are None where the backend
+    cannot return them from a bulk insert.
+    """
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_FANOUT_BATCH_SIZE', 1000)
+    created = Notification.objects.bulk_create(coalesce(notifications), batch_size=batch_size)
+    record_created(created)
+    publish_notifications(created)
+    return created
+
+
+def fan_out(recipients, title, message, notification_type='info', related_object=None, batch_size=None):
+    """Create the same notification for every recipient; returns the newly inserted notifications.
+
+    ``recipients`` is a User queryset (preferred: only ids are fetched), or a
+    list of users or user ids.
+    """
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_FANOUT_BATCH_SIZE', 1000)
+    now = timezone.now()
+    fields = {
+        'title': title,
+        'message': message,
+        'notification_type': notification_type,
+        'created_at': now,
+        'updated_at': now,
+        **related_fields(related_object),
+    }
+
+    created = []
+    for recipient_ids in _recipient_id_batches(recipients, batch_size):
+        created.extend(insert_notifications(
+            [Notification(recipient_id=recipient_id, **fields) for recipient_id in recipient_ids], batch_size
+        ))
+    return created
@@ -0,0 +1,76 @@
+"""
+Notification retention.
+Read notifications older than NOTIFICATION_RETENTION_DAYS are copied to
+NotificationArchive and removed from the Notification table in batches, each
+in its own transaction, so the table the dashboards poll only holds unread and
+recent rows. Unread notifications are never archived. Archived notifications
+are deleted like any other, so each one gets a ``delete`` audit log entry.
+
+Nothing runs this automatically; schedule ``manage.py archive_notifications``
+(see DOCKER_DEPLOYMENT_GUIDE.md).
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification, NotificationArchive
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_FIELDS = (
+    'id', 'recipient_id', 'title', 'message', 'notification_type', 'created_at',
+    'related_object_id', 'related_object_type', 'occurrences',
+)
+
+
+def archivable(older_than_days=None):
+    """Read notifications created before the retention cutoff."""
+    if older_than_days is None:
+        older_than_days = getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 30)
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+
+
+def _archive_batch(ids):
+    """Copy the notifications in ``ids`` to the archive and delete them; returns the number moved."""
+    with transaction.atomic():
+        # Re-check is_read: a notification marked unread since it was selected stays put
+        rows = list(Notification.objects.select_for_update().filter(pk__in=ids, is_read=True).values(*ARCHIVED_FIELDS))
+        if not rows:
+            return 0
+        now = timezone.now()
+        NotificationArchive.objects.bulk_create(
+            [NotificationArchive(archived_at=now, **row) for row in rows],
+            ignore_conflicts=True,
+        )
+        # A regular delete, so post_delete receivers run: the audit log records
+        # each archived notification as deleted
+        Notification.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def archive_notifications(older_than_days=None, batch_size=None, limit=None):
+    """Archive old read notifications; returns the number moved.
+
+    ``limit`` caps the rows moved in one run so a large backlog can be worked
+    off over several runs.
+    """
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_ARCHIVE_BATCH_SIZE', 1000)
+    queryset = archivable(older_than_days).order_by('pk')
+    total = 0
+    last_id = 0
+    while limit is None or total < limit:
+        size = batch_size if limit is None else min(batch_size, limit - total)
+        ids = list(queryset.filter(pk__gt=last_id).values_list('pk', flat=True)[:size])
+        if not ids:
+            break
+        last_id = ids[-1]
+        total += _archive_batch(ids)
+
+    if total:
+        logger.info(f"Archived {total} read notifications")
+    return total
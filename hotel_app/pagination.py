@@ -0,0 +1,177 @@
+"""
+Keyset (cursor) pagination for dashboard listings.
+Pages are selected with a WHERE clause on the ordering key instead of OFFSET,
+and no COUNT(*) is issued, so the cost of a page does not depend on how far
+back it is.
+"""
+
+import base64
+import json
+import logging
+
+from django.db.models import F, Q
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CURSOR_ORDERING = ('-created_at', '-id')
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded for this paginator."""
+
+
+class CursorPage:
+    """One page of results plus opaque tokens for the neighbouring pages."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __repr__(self):
+        return f'<CursorPage: {len(self.object_list)} objects>'
+
+
+class CursorPaginator:
+    """Paginate a queryset by seeking on a unique ordering key.
+
+    ``ordering`` is a sequence of field names (``-`` prefix for descending)
+    whose combined value is unique; it should end with the primary key.
+    NULL values in nullable key fields sort last. Works with model querysets
+    and ``values()`` querysets that include the key fields.
+    """
+
+    def __init__(self, queryset, per_page, ordering=DEFAULT_CURSOR_ORDERING):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.keys = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        self._fields = {name: queryset.model._meta.get_field(name) for name, _ in self.keys}
+
+    # ---- Public API ----
+
+    def get_page(self, cursor=None):
+        """Return the page for ``cursor``; invalid or missing cursors give the first page."""
+        if cursor:
+            try:
+                direction, values = self.decode_cursor(cursor)
+            except InvalidCursor as e:
+                logger.warning(f"Ignoring invalid pagination cursor: {str(e)}")
+            else:
+                if direction == 'prev':
+                    return self._page_before(values)
+                return self._page_after(values)
+        return self._page_after(None)
+
+    def encode_cursor(self, direction, row):
+        values = []
+        for name, _ in self.keys:
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps({'d': direction, 'k': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            direction, raw_values = payload['d'], payload['k']
+        except (ValueError, TypeError, KeyError) as e:
+            raise InvalidCursor(str(e)) from e
+        if direction not in ('next', 'prev') or len(raw_values) != len(self.keys):
+            raise InvalidCursor('cursor does not match this listing')
+        try:
+            values = [
+                None if raw is None else self._fields[name].to_python(raw)
+                for (name, _), raw in zip(self.keys, raw_values)
+            ]
+        except Exception as e:
+            raise InvalidCursor(str(e)) from e
+        return direction, values
+
+    # ---- Query building ----
+
+    def _order_by(self, reverse=False):
+        expressions = []
+        for name, descending in self.keys:
+            nulls = {}
+            if self._fields[name].null:
+                # Keep NULLs at the end of the listing on every backend
+                nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+            if descending != reverse:
+                expressions.append(F(name).desc(**nulls))
+            else:
+                expressions.append(F(name).asc(**nulls))
+        return expressions
+
+    def _seek(self, values, reverse=False):
+        """Rows strictly after ``values`` in listing order (before, if ``reverse``)."""
+        condition = Q(pk__in=[])
+        equal_so_far = Q()
+        for (name, descending), value in zip(self.keys, values):
+            if value is None:
+                # NULLs sort last: nothing follows them, every non-NULL precedes them
+                beyond = Q(pk__in=[]) if not reverse else Q(**{f'{name}__isnull': False})
+                equal = Q(**{f'{name}__isnull': True})
+            else:
+                lookup = 'lt' if descending != reverse else 'gt'
+                beyond = Q(**{f'{name}__{lookup}': value})
+                if self._fields[name].null and not reverse:
+                    beyond |= Q(**{f'{name}__isnull': True})
+                equal = Q(**{name: value})
+            condition |= equal_so_far & beyond
+            equal_so_far &= equal
+        return condition
+
+    def _page_after(self, values):
+        queryset = self.queryset.order_by(*self._order_by())
+        if values is not None:
+            queryset = queryset.filter(self._seek(values))
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return CursorPage(
+            rows,
+            next_cursor=self.encode_cursor('next', rows[-1]) if has_next and rows else None,
+            previous_cursor=self.encode_cursor('prev', rows[0]) if values is not None and rows else None,
+        )
+
+    def _page_before(self, values):
+        queryset = self.queryset.order_by(*self._order_by(reverse=True)).filter(self._seek(values, reverse=True))
+        rows = list(queryset[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        if not rows:
+            return self._page_after(None)
+        return CursorPage(
+            rows,
+            next_cursor=self.encode_cursor('next', rows[-1]),
+            previous_cursor=self.encode_cursor('prev', rows[0]) if has_previous else None,
+        )
+
+
+def pagination_query(request):
+    """URL-encoded GET parameters without the pagination ones, for page links."""
+    params = request.GET.copy()
+    for key in ('cursor', 'page', 'format'):
+        params.pop(key, None)
+    return params.urlencode()
@@ -1,9 +1,10 @@
 from rest_framework import permissions
 from django.conf import settings
+from .principal import get_principal
 
 def user_in_group(user, group_name):
-    """Check if user is in a specific group"""
-    return user.is_authenticated and (user.is_superuser or user.groups.filter(name=group_name).exists())
+    """Check if user is in a specific group (served from the cached principal)"""
+    return get_principal(user).in_group(group_name)
 
 class IsAdminUser(permissions.BasePermission):
     """
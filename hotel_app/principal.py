@@ -0,0 +1,139 @@
+"""
+Request-scoped principal for permission checks.
+A Principal holds a user's profile role, group names and department. It is built
+once per user object (so once per request for ``request.user``) and cached
+across requests when PRINCIPAL_CACHE_TIMEOUT is set, so group and role checks
+normally issue no queries. That cache must be shared by all processes
+(CACHE_REDIS_URL). Cache entries are dropped by signals when memberships,
+profiles, groups or departments change, and again once the change commits so
+a concurrent request cannot re-cache the old state.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'hotel_app:principal'
+VERSION_KEY = f'{CACHE_PREFIX}:version'
+USER_ATTR = '_hotel_principal'
+
+
+class Principal:
+    """Immutable snapshot of what permission checks need to know about a user."""
+
+    def __init__(self, user_id=None, is_authenticated=False, is_superuser=False,
+                 role=None, group_names=(), department_id=None, department_name=''):
+        self.user_id = user_id
+        self.is_authenticated = is_authenticated
+        self.is_superuser = is_superuser
+        self.role = role
+        self.group_names = frozenset(group_names)
+        self.department_id = department_id
+        self.department_name = department_name or ''
+
+    def in_group(self, group_name):
+        return self.is_authenticated and (self.is_superuser or group_name in self.group_names)
+
+    def in_any_group(self, group_names):
+        return any(self.in_group(group_name) for group_name in group_names)
+
+    @property
+    def is_admin(self):
+        return self.in_group(getattr(settings, 'ADMINS_GROUP', 'Admins'))
+
+    @property
+    def is_staff(self):
+        return self.is_admin or self.in_group(getattr(settings, 'STAFF_GROUP', 'Staff'))
+
+    def __repr__(self):
+        return f'<Principal user={self.user_id} role={self.role} groups={sorted(self.group_names)}>'
+
+
+ANONYMOUS = Principal()
+
+
+def _cache_timeout():
+    return getattr(settings, 'PRINCIPAL_CACHE_TIMEOUT', 0)
+
+
+def _cache_key(user_id):
+    version = cache.get(VERSION_KEY) or 0
+    return f'{CACHE_PREFIX}:{version}:{user_id}'
+
+
+def _load(user):
+    """Build the cacheable part of a principal from the database (two queries)."""
+    from .models import UserProfile
+
+    group_names = list(user.groups.values_list('name', flat=True))
+    profile = (
+        UserProfile.objects.filter(user_id=user.pk)
+        .values('role', 'department_id', 'department__name')
+        .first()
+    ) or {}
+    return {
+        'role': profile.get('role'),
+        'group_names': group_names,
+        'department_id': profile.get('department_id'),
+        'department_name': profile.get('department__name'),
+    }
+
+
+def get_principal(user):
+    """Return the Principal for ``user``, building it at most once per user object."""
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS
+
+    principal = getattr(user, USER_ATTR, None)
+    if principal is not None:
+        return principal
+
+    data = None
+    timeout = _cache_timeout()
+    key = _cache_key(user.pk)
+    if timeout:
+        data = cache.get(key)
+    if data is None:
+        data = _load(user)
+        if timeout:
+            cache.set(key, data, timeout)
+
+    principal = Principal(
+        user_id=user.pk,
+        is_authenticated=True,
+        is_superuser=user.is_superuser,
+        **data,
+    )
+    try:
+        setattr(user, USER_ATTR, principal)
+    except Exception:
+        # Some user wrappers do not accept attributes; the cross-request cache still applies
+        pass
+    return principal
+
+
+def _delete_user(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def _bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def invalidate_user(user_id):
+    """Drop the cached principal for one user, now and after the current transaction commits."""
+    _delete_user(user_id)
+    transaction.on_commit(lambda: _delete_user(user_id))
+
+
+def invalidate_all():
+    """Drop every cached principal (e.g. after a group or department rename)."""
+    _bump_version()
+    transaction.on_commit(_bump_version)
@@ -8,6 +8,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from .models import UserProfile
+from .principal import get_principal
 
 User = get_user_model()
 
@@ -179,7 +180,7 @@ def get_user_role(user):
     Returns:
         String representing user role (admin, staff, user) or None
     """
-    group_names = [group.name.lower() for group in user.groups.all()]
+    group_names = [name.lower() for name in get_principal(user).group_names]
     
     if 'admins' in group_names:
         return 'admin'
@@ -0,0 +1,233 @@
+"""
+Realtime event broker for the dashboard event stream.
+Notifications, ticket changes and user-list changes are published to channels
+after the surrounding transaction commits; the Server-Sent Events view
+(stream_views.event_stream) subscribes each open connection to the channels it
+may see. The in-process broker serves a single ASGI process; set
+REALTIME_BROKER to ``hotel_app.realtime.RedisBroker`` to fan events out across
+processes through Redis pub/sub.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+TICKETS_CHANNEL = 'tickets'
+USERS_CHANNEL = 'users'
+SUBSCRIPTION_QUEUE_SIZE = 100
+# Backoff between attempts to re-subscribe to Redis after a disconnect
+RECONNECT_MIN_SECONDS = 0.5
+RECONNECT_MAX_SECONDS = 30
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+class Subscription:
+    """Events for one stream connection, delivered into an asyncio queue.
+
+    Must be created on the event loop that reads it; ``push`` may be called
+    from any thread.
+    """
+
+    def __init__(self, broker, channels, maxsize=SUBSCRIPTION_QUEUE_SIZE):
+        self.broker = broker
+        self.channels = tuple(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def push(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The connection's loop is gone; it will be unsubscribed on close
+            pass
+
+    def _put(self, event):
+        if self.queue.full():
+            # Slow reader: drop the oldest event rather than block publishers
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """Next event, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Publish/subscribe within the current process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._subscriptions.get(channel, ()))
+            return len({s for subscribers in self._subscriptions.values() for s in subscribers})
+
+    def publish(self, channel, event):
+        self.deliver(channel, event)
+
+    def deliver(self, channel, event):
+        """Hand ``event`` to this process's subscribers of ``channel``."""
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            subscription.push(event)
+
+
+class RedisBroker(InProcessBroker):
+    """Publishes through Redis; one listener thread per process delivers locally.
+
+    Requires the ``redis`` package and REALTIME_REDIS_URL.
+    """
+
+    PREFIX = 'hotel_app:events:'
+
+    def __init__(self, url=None):
+        super().__init__()
+        import redis
+
+        self._redis = redis.Redis.from_url(url or getattr(settings, 'REALTIME_REDIS_URL', 'redis://localhost:6379/0'))
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def subscribe(self, channels):
+        self._ensure_listener()
+        return super().subscribe(channels)
+
+    def publish(self, channel, event):
+        try:
+            self._redis.publish(self.PREFIX + channel, json.dumps(event, cls=DjangoJSONEncoder))
+        except Exception as e:
+            logger.error(f"Failed to publish realtime event to Redis: {str(e)}")
+
+    def _ensure_listener(self):
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='realtime-redis', daemon=True)
+                self._listener.start()
+
+    def _listen(self, sleep=time.sleep):
+        """Deliver Redis messages locally; reconnects with backoff when Redis goes away.
+
+        Events published while disconnected are lost; open streams still get
+        everything after the reconnect, and clients catch up when their
+        stream reconnects (at the latest after SSE_MAX_SECONDS).
+        """
+        delay = RECONNECT_MIN_SECONDS
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(self.PREFIX + '*')
+                delay = RECONNECT_MIN_SECONDS
+                for message in pubsub.listen():
+                    try:
+                        channel = message['channel'].decode()[len(self.PREFIX):]
+                        self.deliver(channel, json.loads(message['data']))
+                    except Exception as e:
+                        logger.error(f"Dropped malformed realtime event: {str(e)}")
+            except Exception as e:
+                logger.warning(f"Realtime Redis listener disconnected ({str(e)}); reconnecting in {delay}s")
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+            sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'REALTIME_BROKER', 'hotel_app.realtime.InProcessBroker'))()
+    return _broker
+
+
+def publish(channel, event_type, data, event_id=None):
+    """Publish an event once the current transaction (if any) commits."""
+    event = {'type': event_type, 'id': event_id, 'data': data}
+
+    def send():
+        try:
+            get_broker().publish(channel, event)
+        except Exception as e:
+            # Realtime delivery is best effort; clients fall back to polling
+            logger.error(f"Failed to publish {event_type} event: {str(e)}")
+
+    transaction.on_commit(send)
+
+
+def publish_notifications(notifications):
+    """Push new notifications to their recipients' streams.
+
+    Bulk-inserted notifications have no pk on MySQL; their events carry
+    ``id: null`` and no event id, and clients refresh the list to get it.
+    """
+    for notification in notifications:
+        publish(user_channel(notification.recipient_id), 'notification', {
+            'id': notification.pk,
+            'title': notification.title,
+            'message': notification.message,
+            'notification_type': notification.notification_type,
+            'occurrences': notification.occurrences,
+            'created_at': notification.created_at,
+        }, event_id=notification.pk)
+
+
+def publish_ticket(ticket):
+    """Push a ticket's current status to ticket listeners."""
+    publish(TICKETS_CHANNEL, 'ticket', {
+        'id': ticket.pk,
+        'status': ticket.status,
+        'priority': ticket.priority,
+        'department_id': ticket.department_id,
+        'assignee_user_id': ticket.assignee_user_id,
+        'requester_user_id': ticket.requester_user_id,
+    })
+
+
+def publish_users_changed(user_id=None):
+    publish(USERS_CHANNEL, 'users', {'id': user_id})
@@ -46,4 +46,4 @@ class GuestCommentSerializer(serializers.ModelSerializer):
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
-        fields = ['id', 'title', 'message', 'notification_type', 'is_read', 'created_at']
\ No newline at end of file
+        fields = ['id', 'title', 'message', 'notification_type', 'is_read', 'occurrences', 'created_at', 'updated_at']
\ No newline at end of file
@@ -1,9 +1,12 @@
+import logging
+
 from django.contrib.auth import get_user_model
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils.module_loading import import_string
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=User)
 def create_profile(sender, instance, created, **kwargs):
@@ -150,4 +153,187 @@ def complaint_post_save(sender, instance, created, **kwargs):
 
     except Exception:
         # don't allow notification failures to interrupt request
-        pass
\ No newline at end of file
+        pass
+
+# -- Ticket search index maintenance
+ServiceRequest = apps.get_model('hotel_app', 'ServiceRequest')
+RequestType = apps.get_model('hotel_app', 'RequestType')
+Location = apps.get_model('hotel_app', 'Location')
+
+
+@receiver(post_save, sender=ServiceRequest)
+def service_request_search_index(sender, instance, update_fields=None, **kwargs):
+    from .ticket_search import DOCUMENT_FIELDS, index_tickets, uses_fulltext
+    if uses_fulltext():
+        # ServiceRequest.save() already wrote search_document with the row
+        return
+    if update_fields is not None and not set(update_fields) & DOCUMENT_FIELDS:
+        return
+    try:
+        index_tickets([instance])
+    except Exception:
+        # search data can be rebuilt; never fail the ticket save
+        logger.exception(f"Failed to index ticket #{instance.pk} for search")
+
+
+# Fields of related objects that end up in a ticket's search document
+INDEXED_FIELDS = {
+    RequestType: ('name',),
+    Location: ('name', 'room_no'),
+}
+
+
+def _indexed_values(sender, instance):
+    return tuple(getattr(instance, field) for field in INDEXED_FIELDS[sender])
+
+
+@receiver(pre_save, sender=RequestType)
+@receiver(pre_save, sender=Location)
+def related_search_pre_save(sender, instance, update_fields=None, **kwargs):
+    """Capture the indexed text before save, so unrelated edits skip re-indexing."""
+    instance._indexed_before = None
+    if not instance.pk:
+        return
+    if update_fields is not None and not set(update_fields) & set(INDEXED_FIELDS[sender]):
+        instance._indexed_before = _indexed_values(sender, instance)
+        return
+    instance._indexed_before = (
+        sender._default_manager.filter(pk=instance.pk).values_list(*INDEXED_FIELDS[sender]).first()
+    )
+
+
+@receiver(post_save, sender=RequestType)
+@receiver(post_save, sender=Location)
+def related_search_index(sender, instance, created, **kwargs):
+    if created:
+        return
+    if getattr(instance, '_indexed_before', None) == _indexed_values(sender, instance):
+        return
+    from .ticket_search import reindex_queryset
+    field = 'request_type' if sender is RequestType else 'location'
+    try:
+        reindex_queryset(ServiceRequest.objects.filter(**{field: instance}))
+    except Exception:
+        logger.exception(f"Failed to re-index tickets for {sender.__name__} #{instance.pk}")
+
+
+# -- Principal cache invalidation
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed
+from .principal import invalidate_all, invalidate_user, USER_ATTR
+
+UserProfile = apps.get_model('hotel_app', 'UserProfile')
+Department = apps.get_model('hotel_app', 'Department')
+
+
+def _forget_principal(user):
+    invalidate_user(user.pk)
+    if hasattr(user, USER_ATTR):
+        delattr(user, USER_ATTR)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        _forget_principal(instance)
+    elif pk_set:
+        for user_id in pk_set:
+            invalidate_user(user_id)
+    else:
+        invalidate_all()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_principal_changed(sender, instance, **kwargs):
+    _forget_principal(instance)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def profile_principal_changed(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def principal_names_changed(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        return
+    invalidate_all()
+
+
+# -- SLA policy matrix invalidation
+from django.db import transaction
+from .sla_policy import invalidate as invalidate_sla_policy
+
+SLAConfiguration = apps.get_model('hotel_app', 'SLAConfiguration')
+DepartmentRequestSLA = apps.get_model('hotel_app', 'DepartmentRequestSLA')
+
+
+@receiver(post_save, sender=SLAConfiguration)
+@receiver(post_delete, sender=SLAConfiguration)
+@receiver(post_save, sender=DepartmentRequestSLA)
+@receiver(post_delete, sender=DepartmentRequestSLA)
+def sla_policy_changed(sender, instance, **kwargs):
+    invalidate_sla_policy()
+    # a rebuild inside the transaction may have read uncommitted rows
+    transaction.on_commit(invalidate_sla_policy)
+
+
+# -- Department metrics cache invalidation
+from .department_metrics import DepartmentMetrics
+
+
+@receiver(post_save, sender=ServiceRequest)
+@receiver(post_delete, sender=ServiceRequest)
+@receiver(post_delete, sender=Department)
+def department_metrics_changed(sender, instance, **kwargs):
+    # Department edits do not change the metrics; deleting one detaches its tickets
+    DepartmentMetrics.invalidate()
+    transaction.on_commit(DepartmentMetrics.invalidate)
+
+
+# -- Realtime stream events
+from .realtime import publish_notifications, publish_ticket, publish_users_changed
+
+Notification = apps.get_model('hotel_app', 'Notification')
+
+
+@receiver(post_save, sender=Notification)
+def notification_created(sender, instance, created, **kwargs):
+    if created:
+        publish_notifications([instance])
+
+
+@receiver(post_save, sender=ServiceRequest)
+def ticket_changed(sender, instance, **kwargs):
+    publish_ticket(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def users_changed(sender, instance, **kwargs):
+    publish_users_changed(instance.pk if sender is User else instance.user_id)
+
+
+# -- Unread notification counters
+from .notification_counters import adjust_unread, record_created
+
+
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, **kwargs):
+    if created:
+        record_created([instance])
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread({instance.recipient_id: -1})
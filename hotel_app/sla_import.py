@@ -0,0 +1,189 @@
+"""
+Bulk SLA configuration import.
+Resolves department and request type names with one query per table, creates
+missing ones in bulk and upserts DepartmentRequestSLA rows with a single
+``bulk_create(update_conflicts=True)``, all inside one transaction. A dry run
+returns the same diff without writing anything.
+"""
+
+import logging
+
+from django.db import connection, transaction
+from django.db.models.functions import Lower
+
+from .models import Department, DepartmentRequestSLA, RequestType
+from .sla_policy import invalidate as invalidate_sla_policy
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ('critical', 'high', 'normal', 'low')
+DEFAULT_RESPONSE_MINUTES = 30
+DEFAULT_RESOLUTION_MINUTES = 120
+UPSERT_BATCH_SIZE = 500
+
+
+class SLAImportError(ValueError):
+    """Raised for an import payload that is not a list of rows."""
+
+
+def _minutes(value, default):
+    if value in (None, ''):
+        return default
+    minutes = int(value)
+    if minutes < 0:
+        raise ValueError('must not be negative')
+    return minutes
+
+
+def _parse(rows):
+    """Validate rows; return ``(rules, skipped)``.
+
+    ``rules`` maps ``(department, request_type, priority)`` names to
+    ``(response_minutes, resolution_minutes)``; later rows win.
+    """
+    if not isinstance(rows, list):
+        raise SLAImportError('Import data must be a list of rows')
+
+    rules, skipped = {}, []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            skipped.append({'index': index, 'error': 'Row must be an object'})
+            continue
+        department = str(row.get('department') or '').strip()
+        request_type = str(row.get('request_type') or '').strip()
+        if not department or not request_type:
+            skipped.append({'index': index, 'error': 'Department and request type are required'})
+            continue
+        priority = row.get('priority')
+        if priority and priority not in PRIORITIES:
+            skipped.append({'index': index, 'error': f'Unknown priority: {priority}'})
+            continue
+        try:
+            times = (
+                _minutes(row.get('response_time'), DEFAULT_RESPONSE_MINUTES),
+                _minutes(row.get('resolution_time'), DEFAULT_RESOLUTION_MINUTES),
+            )
+        except (TypeError, ValueError):
+            skipped.append({'index': index, 'error': 'Response and resolution times must be whole minutes'})
+            continue
+        # Rows without a priority apply to every priority level
+        for level in ([priority] if priority else PRIORITIES):
+            rules[(department, request_type, level)] = times
+    return rules, skipped
+
+
+def _existing_pks(model, names):
+    """``{lowercased name: pk}``: names match case-insensitively, as MySQL's collation compares them."""
+    return dict(
+        model.objects.annotate(lower_name=Lower('name'))
+        .filter(lower_name__in={name.lower() for name in names})
+        .values_list('lower_name', 'pk')
+    )
+
+
+def _resolve(model, names, dry_run, **defaults_for):
+    """``{name: pk}`` for ``names``, creating the missing ones in bulk unless ``dry_run``."""
+    pks = _existing_pks(model, names)
+    missing = {}
+    for name in sorted(names):
+        # One new row per name, whatever mix of cases the import uses
+        if name.lower() not in pks:
+            missing.setdefault(name.lower(), name)
+    missing = sorted(missing.values())
+    if missing and not dry_run:
+        model.objects.bulk_create(
+            [model(name=name, description=defaults_for['description'](name)) for name in missing]
+        )
+        # Re-read instead of relying on returned pks, which MySQL does not provide
+        pks.update(_existing_pks(model, missing))
+    found = {name: pks[name.lower()] for name in names if name.lower() in pks}
+    return found, missing
+
+
+def _upsert(objs):
+    options = {
+        'update_conflicts': True,
+        'update_fields': ['response_time_minutes', 'resolution_time_minutes', 'updated_at'],
+        'batch_size': UPSERT_BATCH_SIZE,
+    }
+    # MySQL upserts via ON DUPLICATE KEY and does not accept a conflict target
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['department', 'request_type', 'priority']
+    DepartmentRequestSLA.objects.bulk_create(objs, **options)
+
+
+def import_department_slas(rows, dry_run=False):
+    """Import department/request-type SLA rows.
+
+    Returns a summary with created departments and request types, the number of
+    rules created, updated and unchanged, skipped rows and a ``changes`` diff.
+    """
+    rules, skipped = _parse(rows)
+    department_names = {department for department, _, _ in rules}
+    request_type_names = {request_type for _, request_type, _ in rules}
+
+    with transaction.atomic():
+        departments, new_departments = _resolve(
+            Department, department_names, dry_run, description=lambda name: f'Department for {name}'
+        )
+        request_types, new_request_types = _resolve(
+            RequestType, request_type_names, dry_run, description=lambda name: f'Request type for {name}'
+        )
+
+        existing = {}
+        if departments and request_types:
+            for department_id, request_type_id, priority, response, resolution in DepartmentRequestSLA.objects.filter(
+                department_id__in=departments.values(), request_type_id__in=request_types.values()
+            ).values_list('department_id', 'request_type_id', 'priority',
+                          'response_time_minutes', 'resolution_time_minutes'):
+                existing[(department_id, request_type_id, priority)] = (response, resolution)
+
+        changes, upserts, unchanged = {}, {}, 0
+        for (department, request_type, priority), (response, resolution) in sorted(rules.items()):
+            key = (departments.get(department), request_types.get(request_type), priority)
+            current = existing.get(key) if None not in key else None
+            if current == (response, resolution):
+                unchanged += 1
+                continue
+            change = {
+                'action': 'update' if current else 'create',
+                'department': department,
+                'request_type': request_type,
+                'priority': priority,
+                'response_time_minutes': response,
+                'resolution_time_minutes': resolution,
+            }
+            if current:
+                change['previous'] = {'response_time_minutes': current[0], 'resolution_time_minutes': current[1]}
+            # Names differing only in case resolve to the same rule; the last row wins
+            rule = (department.lower(), request_type.lower(), priority)
+            changes[rule] = change
+            upserts[rule] = DepartmentRequestSLA(
+                department_id=key[0], request_type_id=key[1], priority=priority,
+                response_time_minutes=response, resolution_time_minutes=resolution,
+            )
+        changes = list(changes.values())
+
+        if upserts and not dry_run:
+            _upsert(list(upserts.values()))
+            # bulk_create bypasses the post_save receivers that normally do this
+            invalidate_sla_policy()
+            transaction.on_commit(invalidate_sla_policy)
+
+    summary = {
+        'dry_run': dry_run,
+        'rows': len(rows) - len(skipped),
+        'created_departments': new_departments,
+        'created_request_types': new_request_types,
+        'created': sum(1 for change in changes if change['action'] == 'create'),
+        'updated': sum(1 for change in changes if change['action'] == 'update'),
+        'unchanged': unchanged,
+        'skipped': skipped,
+        'changes': changes,
+    }
+    if not dry_run:
+        logger.info(
+            f"SLA import: {summary['created']} created, {summary['updated']} updated, "
+            f"{unchanged} unchanged, {len(skipped)} rows skipped"
+        )
+    return summary
@@ -0,0 +1,137 @@
+"""
+SLA breach notification fan-out.
+Breaches are announced once per ticket and breach type, tracked in the
+SLABreachNotification ledger so repeated sweeps (and restarts) never notify
+twice. Overlapping sweeps (the scheduler, the check_sla_breaches command and
+tasks) race for each ledger row; only the one whose insert succeeds notifies.
+All notifications of a sweep are inserted together (notification_fanout).
+"""
+
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+
+from .models import Notification, ServiceRequest, SLABreachNotification
+from .notification_fanout import insert_notifications
+from .sla_sweep import CLOSED_STATUSES
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+RESPONSE = 'response'
+RESOLUTION = 'resolution'
+BREACH_FLAGS = {
+    RESPONSE: 'response_sla_breached',
+    RESOLUTION: 'resolution_sla_breached',
+}
+
+
+def unannounced_breaches():
+    """``{'response': [ids], 'resolution': [ids]}`` of open breached tickets missing from the ledger.
+
+    This also catches breaches flagged outside the sweep, e.g. by
+    ServiceRequest.check_sla_breaches() when a ticket is viewed.
+    """
+    open_tickets = ServiceRequest.objects.exclude(status__in=CLOSED_STATUSES)
+    return {
+        breach_type: list(
+            open_tickets.filter(**{flag: True})
+            .exclude(sla_breach_notifications__breach_type=breach_type)
+            .values_list('pk', flat=True)
+        )
+        for breach_type, flag in BREACH_FLAGS.items()
+    }
+
+
+def _claim(breaches):
+    """Record ``breaches`` in the ledger; return ``{ticket_id: {types}}`` inserted by this call.
+
+    Rows are inserted one by one so a row another sweep inserted in the
+    meantime fails on the unique key instead of being reported as claimed.
+    """
+    candidates = {
+        (ticket_id, breach_type)
+        for breach_type in BREACH_FLAGS
+        for ticket_id in breaches.get(breach_type, ())
+    }
+    if not candidates:
+        return {}
+
+    existing = set(
+        SLABreachNotification.objects.filter(ticket_id__in={ticket_id for ticket_id, _ in candidates})
+        .values_list('ticket_id', 'breach_type')
+    )
+    claimed = {}
+    for ticket_id, breach_type in sorted(candidates - existing):
+        try:
+            with transaction.atomic():
+                SLABreachNotification.objects.bulk_create(
+                    [SLABreachNotification(ticket_id=ticket_id, breach_type=breach_type)]
+                )
+        except IntegrityError:
+            # A concurrent sweep claimed this breach first
+            continue
+        claimed.setdefault(ticket_id, set()).add(breach_type)
+    return claimed
+
+
+def _build_notifications(tickets, claimed):
+    department_members = {}
+    for user_id, department_id in User.objects.filter(
+        userprofile__department_id__in={ticket.department_id for ticket in tickets if ticket.department_id}
+    ).values_list('id', 'userprofile__department_id'):
+        department_members.setdefault(department_id, []).append(user_id)
+
+    notifications = []
+    for ticket in tickets:
+        breach_type = 'Response' if RESPONSE in claimed[ticket.pk] else 'Resolution'
+        request_type_name = ticket.request_type.name if ticket.request_type else 'Service Request'
+        related = {'related_object_id': ticket.pk, 'related_object_type': 'ServiceRequest'}
+
+        # Assignee and department staff get the same alert, once each
+        staff_ids = list(dict.fromkeys(
+            ([ticket.assignee_user_id] if ticket.assignee_user_id else [])
+            + department_members.get(ticket.department_id, [])
+        ))
+        for user_id in staff_ids:
+            notifications.append(Notification(
+                recipient_id=user_id,
+                title=f"SLA Breach Alert: Ticket #{ticket.pk}",
+                message=f"{breach_type} SLA has been breached for ticket #{ticket.pk}: {request_type_name}. Please take immediate action.",
+                notification_type='warning',
+                **related
+            ))
+
+        if ticket.requester_user_id:
+            notifications.append(Notification(
+                recipient_id=ticket.requester_user_id,
+                title=f"SLA Breach: Ticket #{ticket.pk}",
+                message=f"Your ticket #{ticket.pk} is experiencing delays. We're working to resolve it as quickly as possible.",
+                notification_type='warning',
+                **related
+            ))
+    return notifications
+
+
+def notify_breaches(breaches=None):
+    """Announce breaches that are not in the ledger yet; return the number of tickets notified.
+
+    ``breaches`` is a sweep result (``{'response': [ids], 'resolution': [ids]}``).
+    Breached open tickets that were never announced are always included.
+    """
+    pending = unannounced_breaches()
+    for breach_type, ticket_ids in (breaches or {}).items():
+        pending.setdefault(breach_type, [])
+        pending[breach_type] = list(set(pending[breach_type]) | set(ticket_ids))
+
+    with transaction.atomic():
+        claimed = _claim(pending)
+        if not claimed:
+            return 0
+        tickets = list(ServiceRequest.objects.filter(pk__in=claimed).select_related('request_type'))
+        notifications = _build_notifications(tickets, claimed)
+        insert_notifications(notifications)
+
+    logger.info(f"Sent {len(notifications)} SLA breach notifications for {len(tickets)} tickets")
+    return len(tickets)
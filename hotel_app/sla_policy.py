@@ -0,0 +1,121 @@
+"""
+Compiled SLA policy matrix.
+DepartmentRequestSLA and SLAConfiguration rows are read once into in-process
+dictionaries, so resolving the SLA of a new ticket costs no queries. The matrix
+is rebuilt after either configuration model is saved or deleted; a version
+stamp in the shared cache (CACHE_REDIS_URL) tells other processes to rebuild
+as well. Every process also rebuilds a matrix older than SLA_POLICY_MAX_AGE
+seconds, which bounds staleness when the cache is not shared.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'hotel_app:sla_policy:version'
+
+# (response minutes, resolution minutes) used when a priority has no SLAConfiguration row
+DEFAULT_SLA_MINUTES = {
+    'critical': (5, 5),
+    'high': (10, 10),
+    'normal': (15, 15),
+    'low': (20, 20),
+}
+# (response hours, resolution hours) for priorities without any configuration
+FALLBACK_SLA_HOURS = (1, 24)
+
+_lock = threading.Lock()
+_matrix = None
+
+
+class SLAPolicyMatrix:
+    """SLA times keyed by ``(department_id, request_type_id, priority)`` with a priority fallback."""
+
+    def __init__(self, department_rules=None, priority_rules=None, version=0):
+        # Values are (response_sla_hours, sla_hours)
+        self.department_rules = department_rules or {}
+        self.priority_rules = priority_rules or {}
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def load(cls, version=0):
+        """Build the matrix from the database (two queries)."""
+        from .models import DepartmentRequestSLA, SLAConfiguration
+
+        fields = ('response_time_minutes', 'resolution_time_minutes')
+        department_rules = {
+            (department_id, request_type_id, priority): (response / 60.0, resolution / 60.0)
+            for department_id, request_type_id, priority, response, resolution
+            in DepartmentRequestSLA.objects.values_list('department_id', 'request_type_id', 'priority', *fields)
+        }
+        priority_rules = {
+            priority: (response / 60.0, resolution / 60.0)
+            for priority, response, resolution
+            in SLAConfiguration.objects.values_list('priority', *fields)
+        }
+        return cls(department_rules, priority_rules, version)
+
+    def resolve(self, department_id, request_type_id, priority):
+        """Return ``(response_sla_hours, sla_hours)`` for a ticket."""
+        if department_id and request_type_id:
+            hours = self.department_rules.get((department_id, request_type_id, priority))
+            if hours is not None:
+                return hours
+        hours = self.priority_rules.get(priority)
+        if hours is not None:
+            return hours
+        if priority in DEFAULT_SLA_MINUTES:
+            response, resolution = DEFAULT_SLA_MINUTES[priority]
+            return response / 60.0, resolution / 60.0
+        return FALLBACK_SLA_HOURS
+
+    def __len__(self):
+        return len(self.department_rules) + len(self.priority_rules)
+
+
+def _current_version():
+    return cache.get(VERSION_KEY) or 0
+
+
+def _is_current(matrix, version):
+    max_age = getattr(settings, 'SLA_POLICY_MAX_AGE', 60)
+    return (
+        matrix is not None
+        and matrix.version == version
+        and time.monotonic() - matrix.loaded_at < max_age
+    )
+
+
+def get_matrix():
+    """Return the compiled matrix, rebuilding it if it was invalidated or is too old."""
+    global _matrix
+    version = _current_version()
+    matrix = _matrix
+    if _is_current(matrix, version):
+        return matrix
+    with _lock:
+        if not _is_current(_matrix, version):
+            _matrix = SLAPolicyMatrix.load(version)
+            logger.debug(f"Compiled SLA policy matrix with {len(_matrix)} rules (version {version})")
+        return _matrix
+
+
+def resolve_sla_hours(department_id, request_type_id, priority):
+    """``(response_sla_hours, sla_hours)`` for a new ticket, served from the matrix."""
+    return get_matrix().resolve(department_id, request_type_id, priority)
+
+
+def invalidate():
+    """Discard the compiled matrix here and in every other process."""
+    global _matrix
+    _matrix = None
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
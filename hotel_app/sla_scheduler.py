@@ -0,0 +1,168 @@
+"""
+Deadline-driven SLA scheduler.
+Keeps a min-heap of the next response and resolution deadlines of open tickets,
+sleeps until the earliest one and then sweeps only the tickets that are due.
+Ticket changes are picked up incrementally through ``updated_at`` instead of
+rescanning every open ticket.
+
+``updated_at`` is stamped when a ticket is saved, not when its transaction
+commits, so each refresh re-reads an overlap window before the newest value
+already seen, and a periodic full reload catches anything that committed later
+still.
+"""
+
+import heapq
+import logging
+import time
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import ServiceRequest
+from .sla_sweep import CLOSED_STATUSES, sweep_sla_breaches
+
+logger = logging.getLogger(__name__)
+
+RESPONSE = 'response'
+RESOLUTION = 'resolution'
+
+DEADLINE_FIELDS = (
+    'id', 'status', 'created_at', 'updated_at', 'sla_hours', 'response_sla_hours',
+    'response_sla_breached', 'resolution_sla_breached',
+)
+
+
+def ticket_deadlines(row):
+    """``{kind: deadline}`` for the SLA clocks of a ticket row that can still breach."""
+    if row['status'] in CLOSED_STATUSES or not row['created_at']:
+        return {}
+    deadlines = {}
+    if not row['response_sla_breached'] and row['response_sla_hours'] is not None:
+        deadlines[RESPONSE] = row['created_at'] + timedelta(hours=row['response_sla_hours'])
+    if not row['resolution_sla_breached'] and row['sla_hours'] is not None:
+        deadlines[RESOLUTION] = row['created_at'] + timedelta(hours=row['sla_hours'])
+    return deadlines
+
+
+class SLADeadlineScheduler:
+    """Min-heap of upcoming SLA deadlines.
+
+    Heap entries are ``(deadline, ticket_id, kind)``. When a ticket's deadline
+    changes the old entry stays in the heap and is skipped when popped, because
+    ``_deadlines`` no longer matches it (lazy deletion).
+    """
+
+    def __init__(self, refresh_interval=5, max_sleep=60, on_breach=None, clock=timezone.now,
+                 overlap=60, reload_interval=600):
+        self.refresh_interval = refresh_interval
+        self.max_sleep = max_sleep
+        self.on_breach = on_breach
+        self.clock = clock
+        self.overlap = timedelta(seconds=overlap)
+        self.reload_interval = timedelta(seconds=reload_interval)
+        self._heap = []
+        self._deadlines = {}
+        self._since = None
+        self._reload_at = None
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    # ---- Loading ----
+
+    def load(self):
+        """Full scan of open tickets, replacing everything tracked so far."""
+        started = self.clock()
+        self._heap = []
+        self._deadlines = {}
+        rows = ServiceRequest.objects.exclude(status__in=CLOSED_STATUSES).values(*DEADLINE_FIELDS)
+        for row in rows.iterator(chunk_size=2000):
+            self._track(row)
+        self._since = started
+        self._reload_at = started + self.reload_interval
+        logger.info(f"SLA scheduler loaded {len(self._deadlines)} deadlines")
+
+    def refresh(self):
+        """Pick up tickets created or changed since the last refresh.
+
+        Falls back to a full reload when nothing is loaded yet or the reload
+        interval has passed.
+        """
+        if self._since is None or self.clock() >= self._reload_at:
+            return self.load()
+        rows = ServiceRequest.objects.filter(updated_at__gte=self._since - self.overlap).values(*DEADLINE_FIELDS)
+        latest = self._since
+        for row in rows:
+            self._track(row)
+            if row['updated_at'] and row['updated_at'] > latest:
+                latest = row['updated_at']
+        # Re-reading rows inside the overlap window is harmless: unchanged
+        # deadlines are not pushed again
+        self._since = latest
+
+    def _track(self, row):
+        ticket_id = row['id']
+        current = ticket_deadlines(row)
+        for kind in (RESPONSE, RESOLUTION):
+            key = (ticket_id, kind)
+            deadline = current.get(kind)
+            if deadline is None:
+                self._deadlines.pop(key, None)
+            elif self._deadlines.get(key) != deadline:
+                self._deadlines[key] = deadline
+                heapq.heappush(self._heap, (deadline, ticket_id, kind))
+
+    # ---- Scheduling ----
+
+    def next_deadline(self):
+        while self._heap:
+            deadline, ticket_id, kind = self._heap[0]
+            if self._deadlines.get((ticket_id, kind)) == deadline:
+                return deadline
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now=None):
+        """Remove and return the ids of tickets with a deadline at or before ``now``."""
+        now = now or self.clock()
+        due = set()
+        while True:
+            deadline = self.next_deadline()
+            if deadline is None or deadline > now:
+                break
+            _, ticket_id, kind = heapq.heappop(self._heap)
+            del self._deadlines[(ticket_id, kind)]
+            due.add(ticket_id)
+        return due
+
+    def run_once(self):
+        """Refresh, flag due tickets and return the number of seconds to sleep."""
+        self.refresh()
+        now = self.clock()
+        due = self.pop_due(now)
+        if due:
+            breaches = sweep_sla_breaches(now=now, queryset=ServiceRequest.objects.filter(pk__in=due))
+            if self.on_breach and (breaches['response'] or breaches['resolution']):
+                try:
+                    self.on_breach(breaches)
+                except Exception as e:
+                    logger.error(f"SLA breach handler failed: {str(e)}")
+
+        sleep_for = self.refresh_interval
+        deadline = self.next_deadline()
+        if deadline is not None:
+            sleep_for = min(sleep_for, max(0, (deadline - self.clock()).total_seconds()))
+        return min(sleep_for, self.max_sleep)
+
+    def run_forever(self, sleep=time.sleep):
+        while True:
+            # Long-running process: drop connections the server has closed
+            # instead of failing every query on them
+            close_old_connections()
+            try:
+                sleep_for = self.run_once()
+            except Exception:
+                logger.exception("SLA scheduler pass failed; retrying")
+                sleep_for = self.refresh_interval
+            sleep(sleep_for)
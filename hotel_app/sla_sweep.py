@@ -0,0 +1,97 @@
+"""
+Set-based SLA breach sweep.
+Response and resolution breaches are flagged with conditional UPDATE statements
+that mirror ServiceRequest.check_sla_breaches(), so unchanged rows are never
+written and no model save (or AuditLog insert) happens per ticket.
+"""
+
+import logging
+
+from django.db.models import DateTimeField, F, Q, Value
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+from .department_metrics import DepartmentMetrics
+from .managers import SecondsBetween
+from .models import ServiceRequest
+
+logger = logging.getLogger(__name__)
+
+CLOSED_STATUSES = ('completed', 'closed')
+# Every other status, spelled out so the filter can use the (status, due_at) index
+OPEN_STATUSES = tuple(status for status, _ in ServiceRequest.STATUS_CHOICES if status not in CLOSED_STATUSES)
+# Statuses in which the response clock runs from creation until accepted_at is set
+RESPONSE_CLOCK_STATUSES = ('accepted', 'in_progress', 'completed', 'closed')
+# Open statuses in which the resolution clock runs from creation
+RESOLUTION_CLOCK_STATUSES = ('in_progress', 'accepted', 'assigned')
+UPDATE_BATCH_SIZE = 1000
+
+
+def _over(start, end, hours_field):
+    """``end - start`` exceeds the SLA in ``hours_field`` (as a SQL condition)."""
+    return GreaterThan(SecondsBetween(start, end), F(hours_field) * 3600)
+
+
+def response_breach_condition(now):
+    now_value = Value(now, output_field=DateTimeField())
+    return Q(response_sla_breached=False) & (
+        (Q(accepted_at__isnull=False) & Q(_over(F('created_at'), F('accepted_at'), 'response_sla_hours')))
+        | (
+            Q(accepted_at__isnull=True, status__in=RESPONSE_CLOCK_STATUSES)
+            & Q(_over(F('created_at'), now_value, 'response_sla_hours'))
+        )
+    )
+
+
+def resolution_breach_condition(now):
+    now_value = Value(now, output_field=DateTimeField())
+    return Q(resolution_sla_breached=False) & (
+        (Q(completed_at__isnull=False) & Q(_over(F('created_at'), F('completed_at'), 'sla_hours')))
+        | (
+            Q(completed_at__isnull=True, status__in=RESOLUTION_CLOCK_STATUSES)
+            & Q(_over(F('created_at'), now_value, 'sla_hours'))
+        )
+    )
+
+
+def _flag(ids, **flags):
+    for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+        ServiceRequest.objects.filter(pk__in=ids[start:start + UPDATE_BATCH_SIZE]).update(**flags)
+
+
+def open_tickets_of(queryset=None):
+    """Tickets not completed or closed (including those without a status)."""
+    queryset = queryset if queryset is not None else ServiceRequest.objects.all()
+    return queryset.filter(Q(status__in=OPEN_STATUSES) | Q(status__isnull=True))
+
+
+def breach_candidates(now, queryset=None):
+    """The sweep's queries: ``{'response': ids, 'resolution': ids}`` of open tickets newly in breach."""
+    open_tickets = open_tickets_of(queryset).filter(created_at__isnull=False)
+    return {
+        'response': open_tickets.filter(response_breach_condition(now)).values_list('pk', flat=True),
+        'resolution': open_tickets.filter(resolution_breach_condition(now)).values_list('pk', flat=True),
+    }
+
+
+def sweep_sla_breaches(now=None, queryset=None):
+    """Flag newly breached open tickets; return ``{'response': [ids], 'resolution': [ids]}``.
+
+    Only tickets whose flag flips from False to True are returned, so callers can
+    notify exactly once per breach.
+    """
+    now = now or timezone.now()
+    candidates = breach_candidates(now, queryset)
+    response_ids = list(candidates['response'])
+    resolution_ids = list(candidates['resolution'])
+
+    _flag(response_ids, response_sla_breached=True, sla_breached=True)
+    _flag(resolution_ids, resolution_sla_breached=True, sla_breached=True)
+
+    if response_ids or resolution_ids:
+        # UPDATE sends no post_save, so drop the cached breach counts here
+        DepartmentMetrics.invalidate()
+        logger.info(
+            f"SLA sweep flagged {len(response_ids)} response and {len(resolution_ids)} resolution breaches"
+        )
+    return {'response': response_ids, 'resolution': resolution_ids}
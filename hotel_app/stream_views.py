@@ -0,0 +1,124 @@
+"""
+Server-Sent Events endpoint for the dashboard.
+Streams new notifications, ticket status changes and (for admins) user-list
+changes to the browser. Needs the ASGI application (config.asgi); under WSGI
+the endpoint answers 204 so the page keeps polling instead.
+"""
+
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+
+from .principal import get_principal
+from .realtime import TICKETS_CHANNEL, USERS_CHANNEL, get_broker, user_channel
+
+logger = logging.getLogger(__name__)
+
+REPLAY_LIMIT = 50
+
+
+def format_event(event):
+    lines = []
+    if event.get('id') is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event['data'], cls=DjangoJSONEncoder)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def can_see(principal, event):
+    """Ticket events go to staff and to the ticket's department, assignee and requester."""
+    if event['type'] != 'ticket' or principal.is_staff:
+        return True
+    data = event['data']
+    return (
+        (principal.department_id and data.get('department_id') == principal.department_id)
+        or principal.user_id in (data.get('assignee_user_id'), data.get('requester_user_id'))
+    )
+
+
+def _resolve(request):
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    return get_principal(user)
+
+
+def _missed_notifications(user_id, last_event_id):
+    """Unread notifications created after the client's Last-Event-ID."""
+    from .models import Notification
+
+    try:
+        last_event_id = int(last_event_id)
+    except (TypeError, ValueError):
+        return []
+    notifications = Notification.objects.filter(
+        recipient_id=user_id, is_read=False, pk__gt=last_event_id
+    ).order_by('pk')[:REPLAY_LIMIT]
+    return [
+        {
+            'type': 'notification',
+            'id': notification.pk,
+            'data': {
+                'id': notification.pk,
+                'title': notification.title,
+                'message': notification.message,
+                'notification_type': notification.notification_type,
+                'occurrences': notification.occurrences,
+                'created_at': notification.created_at,
+            },
+        }
+        for notification in notifications
+    ]
+
+
+async def _stream(principal, channels, last_event_id):
+    heartbeat = getattr(settings, 'SSE_HEARTBEAT_SECONDS', 15)
+    # Django 4.2 does not notice disconnected clients while streaming, so every
+    # connection is closed after a while and the browser reconnects
+    max_seconds = getattr(settings, 'SSE_MAX_SECONDS', 300)
+
+    subscription = get_broker().subscribe(channels)
+    try:
+        yield f"retry: {getattr(settings, 'SSE_RETRY_MS', 5000)}\n\n"
+        if last_event_id:
+            for event in await sync_to_async(_missed_notifications)(principal.user_id, last_event_id):
+                yield format_event(event)
+
+        deadline = subscription.loop.time() + max_seconds
+        while subscription.loop.time() < deadline:
+            event = await subscription.get(timeout=heartbeat)
+            if event is None:
+                yield ': ping\n\n'
+            elif can_see(principal, event):
+                yield format_event(event)
+    finally:
+        subscription.close()
+
+
+async def event_stream(request):
+    """``text/event-stream`` of notification, ticket and users events for the current user."""
+    principal = await sync_to_async(_resolve)(request)
+    if principal is None:
+        return HttpResponse(status=401)
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would be held for the whole stream; tell the client to poll
+        return HttpResponse(status=204)
+
+    channels = [user_channel(principal.user_id), TICKETS_CHANNEL]
+    if principal.is_admin:
+        channels.append(USERS_CHANNEL)
+
+    response = StreamingHttpResponse(
+        _stream(principal, channels, request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -148,71 +148,21 @@ def check_sla_breaches():
     """
     Periodic task to check for SLA breaches in service requests (synchronous version)
     """
-    from django.contrib.auth import get_user_model
-    from .utils import create_notification, create_bulk_notifications
+    from .sla_sweep import sweep_sla_breaches
     
-    # Get models dynamically to avoid import issues
-    ServiceRequest = apps.get_model('hotel_app', 'ServiceRequest')
-    
-    User = get_user_model()
+    # Flag breaches with set-based UPDATEs; only newly breached tickets come back
+    breach_count = notify_sla_breaches(sweep_sla_breaches())
     
-    # Get all open service requests (not closed or completed)
-    open_requests = ServiceRequest.objects.exclude(
-        status__in=['completed', 'closed']
-    ).select_related('requester_user', 'assignee_user', 'department', 'request_type')
-    
-    breach_count = 0
-    for request in open_requests:
-        # Store previous SLA status
-        previous_response_breach = request.response_sla_breached
-        previous_resolution_breach = request.resolution_sla_breached
-        
-        # Check SLA breaches
-        request.check_sla_breaches()
-        
-        # Check if this is a new breach
-        new_response_breach = request.response_sla_breached and not previous_response_breach
-        new_resolution_breach = request.resolution_sla_breached and not previous_resolution_breach
-        
-        # If SLA was newly breached, send notifications
-        if new_response_breach or new_resolution_breach:
-            # Notify assignee if exists
-            if request.assignee_user:
-                breach_type = "Response" if new_response_breach else "Resolution"
-                create_notification(
-                    recipient=request.assignee_user,
-                    title=f"SLA Breach Alert: Ticket #{request.id}",
-                    message=f"{breach_type} SLA has been breached for ticket #{request.id}: {request.request_type.name}. Please take immediate action.",
-                    notification_type='warning',
-                    related_object=request
-                )
-            
-            # Notify department staff if department exists
-            if request.department:
-                department_users = User.objects.filter(userprofile__department=request.department)
-                if department_users.exists():
-                    breach_type = "Response" if new_response_breach else "Resolution"
-                    create_bulk_notifications(
-                        recipients=department_users,
-                        title=f"SLA Breach Alert: Ticket #{request.id}",
-                        message=f"{breach_type} SLA has been breached for ticket #{request.id}: {request.request_type.name}. Please take immediate action.",
-                        notification_type='warning',
-                        related_object=request
-                    )
-            
-            # Notify requester
-            if request.requester_user:
-                create_notification(
-                    recipient=request.requester_user,
-                    title=f"SLA Breach: Ticket #{request.id}",
-                    message=f"Your ticket #{request.id} is experiencing delays. We're working to resolve it as quickly as possible.",
-                    notification_type='warning',
-                    related_object=request
-                )
-            
-            breach_count += 1
-        
-        # Save the updated SLA status
-        request.save()
+    return f"Swept open requests. Found {breach_count} new SLA breaches."
+
+
+def notify_sla_breaches(breaches):
+    """
+    Notify assignees, department staff and requesters about newly breached tickets.
+    ``breaches`` is the ``{'response': [ids], 'resolution': [ids]}`` result of a sweep.
+    Each ticket is announced once per breach type (see SLABreachNotification).
+    Returns the number of tickets notified.
+    """
+    from .sla_notifications import notify_breaches
     
-    return f"Checked {open_requests.count()} open requests. Found {breach_count} new SLA breaches."
\ No newline at end of file
+    return notify_breaches(breaches)
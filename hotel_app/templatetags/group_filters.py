@@ -1,11 +1,12 @@
 from django import template
+from hotel_app.principal import get_principal
 from hotel_app.utils import user_in_group
 
 register = template.Library()
 
 @register.filter(name='has_group')
 def has_group(user, group_name):
-    return user.groups.filter(name=group_name).exists()
+    return group_name in get_principal(user).group_names
 
 @register.filter(name='is_admin')
 def is_admin(user):
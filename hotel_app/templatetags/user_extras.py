@@ -1,4 +1,5 @@
 from django import template
+from hotel_app.principal import get_principal
 
 register = template.Library()
 
@@ -8,6 +9,4 @@ def department_name(user):
     Safely get department name for a user.
     Returns empty string if userprofile or department does not exist.
     """
-    if hasattr(user, "userprofile") and user.userprofile and user.userprofile.department:
-        return user.userprofile.department.name
-    return ""
+    return get_principal(user).department_name
@@ -401,3 +401,1463 @@ class HotelAPITests(APITestCase):
         
         failed_scans = scans.filter(scan_result__in=['already_redeemed', 'expired'])
         self.assertEqual(failed_scans.count(), 3)
+
+
+from django.test import TestCase as DjangoTestCase
+from hotel_app.models import Review, RequestType, ServiceRequest
+from hotel_app.dashboard_metrics import DashboardMetrics
+
+
+class DashboardMetricsTests(DjangoTestCase):
+    """KPI aggregation for the dashboard home page"""
+
+    def test_feedback_and_request_type_aggregates(self):
+        today = timezone.localdate()
+        Review.objects.create(rating=5)
+        Review.objects.create(rating=3)
+        Review.objects.create(rating=1, created_at=timezone.now() - timedelta(days=2))
+        housekeeping = RequestType.objects.create(name='Housekeeping')
+        RequestType.objects.create(name='Maintenance')
+        ServiceRequest.objects.create(request_type=housekeeping, priority='normal')
+        ServiceRequest.objects.create(request_type=housekeeping, priority='high')
+
+        metrics = DashboardMetrics(today=today)
+        feedback = metrics.feedback_by_day
+        self.assertEqual(len(feedback['labels']), 7)
+        self.assertEqual(feedback['positive'][-1], 1)
+        self.assertEqual(feedback['neutral'][-1], 1)
+        self.assertEqual(feedback['negative'][-3], 1)
+        self.assertEqual(metrics.requests_by_type, {'labels': ['Housekeeping', 'Maintenance'], 'values': [2, 0]})
+
+    def test_query_count_is_independent_of_request_types(self):
+        for i in range(20):
+            RequestType.objects.create(name=f'Type {i}')
+        metrics = DashboardMetrics()
+        # users, departments, locations, complaints, vouchers, rating,
+        # daily feedback, request types, occupancy
+        with self.assertNumQueries(9):
+            metrics.legacy_context()
+
+
+class TicketListPaginationTests(DjangoTestCase):
+    """Database-side pagination for the tickets list"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('ticketadmin', 'ticketadmin@example.com', 'pass12345')
+        self.client.force_login(self.admin)
+        request_type = RequestType.objects.create(name='Towels')
+        for i in range(25):
+            ServiceRequest.objects.create(request_type=request_type, priority='high', notes=f'Ticket {i}')
+
+    def test_page_only_decorates_visible_rows(self):
+        first = self.client.get(reverse('dashboard:tickets'))
+        response = self.client.get(reverse('dashboard:tickets'), {'cursor': first.context['page_obj'].next_cursor})
+        self.assertEqual(response.status_code, 200)
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj.object_list), 10)
+        self.assertTrue(page_obj.has_previous)
+        self.assertEqual(page_obj.object_list[0].priority_label, 'High')
+
+    def test_json_projection(self):
+        url = reverse('dashboard:tickets')
+        data = self.client.get(url, {'format': 'json'}).json()
+        data = self.client.get(url, {'format': 'json', 'cursor': data['next_cursor']}).json()
+        data = self.client.get(url, {'format': 'json', 'cursor': data['next_cursor']}).json()
+        self.assertEqual(len(data['results']), 5)
+        self.assertIsNone(data['next_cursor'])
+        self.assertEqual(data['results'][0]['request_type'], 'Towels')
+        self.assertEqual(data['results'][0]['status_label'], 'Pending')
+
+    def test_risk_sort_keeps_numbered_pages(self):
+        response = self.client.get(reverse('dashboard:tickets'), {'sort': 'risk', 'format': 'json', 'page': 3})
+        data = response.json()
+        self.assertEqual(data['count'], 25)
+        self.assertEqual(len(data['results']), 5)
+
+
+from hotel_app.models import Department
+from hotel_app.department_metrics import DepartmentMetrics
+
+
+class DepartmentMetricsTests(DjangoTestCase):
+    """Grouped per-department ticket and SLA metrics"""
+
+    def test_grouped_stats(self):
+        housekeeping = Department.objects.create(name='Housekeeping')
+        maintenance = Department.objects.create(name='Maintenance')
+        empty = Department.objects.create(name='Security')
+        ServiceRequest.objects.create(department=housekeeping, priority='normal')
+        ServiceRequest.objects.create(department=housekeeping, priority='normal', status='completed',
+                                      completed_at=timezone.now())
+        ServiceRequest.objects.create(department=housekeeping, priority='normal', status='closed')
+        breached = ServiceRequest.objects.create(department=maintenance, priority='high')
+        ServiceRequest.objects.filter(pk=breached.pk).update(sla_breached=True)
+
+        metrics = DepartmentMetrics(cache_timeout=0)
+        with self.assertNumQueries(1):
+            stats = metrics.all()
+        self.assertEqual(stats[housekeeping.id]['total'], 3)
+        self.assertEqual(stats[housekeeping.id]['open'], 1)
+        self.assertEqual(stats[housekeeping.id]['completed'], 1)
+        self.assertEqual(stats[housekeeping.id]['compliance'], 100)
+        self.assertEqual(stats[maintenance.id]['compliance'], 0)
+        self.assertEqual(metrics.for_department(empty.id)['compliance'], 100)
+
+    def test_cache_is_dropped_when_tickets_change(self):
+        from django.core.cache import cache
+        from hotel_app.sla_sweep import sweep_sla_breaches
+        cache.delete(DepartmentMetrics.CACHE_KEY)
+        housekeeping = Department.objects.create(name='Housekeeping')
+        ticket = ServiceRequest.objects.create(department=housekeeping, priority='normal')
+        self.assertEqual(DepartmentMetrics(cache_timeout=300).for_department(housekeeping.id)['open'], 1)
+
+        ticket.status = 'completed'
+        ticket.save()
+        self.assertEqual(DepartmentMetrics(cache_timeout=300).for_department(housekeeping.id)['open'], 0)
+
+        late = ServiceRequest.objects.create(department=housekeeping, priority='normal', status='in_progress')
+        ServiceRequest.objects.filter(pk=late.pk).update(created_at=timezone.now() - timedelta(days=3))
+        self.assertEqual(DepartmentMetrics(cache_timeout=300).for_department(housekeeping.id)['breached'], 0)
+        sweep_sla_breaches()
+        self.assertEqual(DepartmentMetrics(cache_timeout=300).for_department(housekeeping.id)['breached'], 1)
+
+
+from hotel_app.managers import ServiceRequestQuerySet
+
+
+class ServiceRequestSlaRiskTests(DjangoTestCase):
+    """SLA progress and risk annotations computed in SQL"""
+
+    def _ticket(self, hours_elapsed, window_hours, status='pending'):
+        ticket = ServiceRequest.objects.create(priority='high', status=status)
+        created = self.now - timedelta(hours=hours_elapsed)
+        ServiceRequest.objects.filter(pk=ticket.pk).update(
+            created_at=created, due_at=created + timedelta(hours=window_hours)
+        )
+        return ticket
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.on_track = self._ticket(1, 10)
+        self.warning = self._ticket(8, 10)
+        self.critical = self._ticket(9.5, 10)
+        self.breached = self._ticket(12, 10)
+        self.closed = self._ticket(12, 10, status='closed')
+
+    def test_risk_buckets(self):
+        tickets = {t.pk: t for t in ServiceRequest.objects.with_sla_metrics(self.now)}
+        self.assertEqual(tickets[self.on_track.pk].sla_risk, ServiceRequestQuerySet.RISK_ON_TRACK)
+        self.assertEqual(tickets[self.warning.pk].sla_risk, ServiceRequestQuerySet.RISK_WARNING)
+        self.assertEqual(tickets[self.critical.pk].sla_risk, ServiceRequestQuerySet.RISK_CRITICAL)
+        self.assertEqual(tickets[self.breached.pk].sla_risk, ServiceRequestQuerySet.RISK_BREACHED)
+        self.assertEqual(tickets[self.closed.pk].sla_risk, ServiceRequestQuerySet.RISK_NONE)
+        self.assertAlmostEqual(tickets[self.warning.pk].sla_elapsed_fraction, 0.8, places=2)
+        self.assertAlmostEqual(tickets[self.on_track.pk].sla_seconds_to_breach, 9 * 3600, delta=5)
+
+    def test_order_and_filter_by_risk(self):
+        ordered = list(ServiceRequest.objects.by_sla_risk(self.now).values_list('pk', flat=True))
+        self.assertEqual(ordered, [
+            self.breached.pk, self.critical.pk, self.warning.pk, self.on_track.pk, self.closed.pk,
+        ])
+        critical = ServiceRequest.objects.at_risk('critical', self.now)
+        self.assertEqual([t.pk for t in critical], [self.critical.pk])
+
+
+from io import StringIO
+from django.core.management import call_command
+
+
+class ServiceRequestIndexTests(DjangoTestCase):
+    """Hot ServiceRequest queries are served by an index"""
+
+    def test_explain_reports_no_full_scans(self):
+        out = StringIO()
+        call_command('explain_ticket_queries', '--strict', stdout=out)
+        self.assertIn('All hot queries use an index.', out.getvalue())
+
+    def test_strict_fails_when_explain_fails(self):
+        from django.core.management.base import CommandError
+        from django.db.models.query import QuerySet
+        with patch.object(QuerySet, 'explain', side_effect=Exception('no EXPLAIN here')):
+            with self.assertRaisesMessage(CommandError, 'could not be explained'):
+                call_command('explain_ticket_queries', '--strict', stdout=StringIO())
+
+    def test_mysql_tree_and_tabular_plans_report_full_scans(self):
+        from django.db import connection
+        from hotel_app.management.commands.explain_ticket_queries import Command
+        tree = (
+            "-> Filter: (hotel_app_servicerequest.priority = 'critical')  (cost=1024.5 rows=998)\n"
+            "    -> Table scan on hotel_app_servicerequest  (cost=1024.5 rows=9980)"
+        )
+        indexed = (
+            "-> Index lookup on hotel_app_servicerequest using hotel_app_s_priorit_idx "
+            "(priority='critical')  (cost=3.5 rows=4)"
+        )
+        tabular = '1 SIMPLE hotel_app_servicerequest None ALL None None None None 9980 10.0 Using where'
+        with patch.object(connection, 'vendor', 'mysql'):
+            self.assertTrue(Command().is_full_scan(tree))
+            self.assertTrue(Command().is_full_scan(tabular))
+            self.assertFalse(Command().is_full_scan(indexed))
+
+
+from hotel_app.pagination import CursorPaginator
+
+
+class CursorPaginatorTests(DjangoTestCase):
+    """Keyset pagination on (created_at, id)"""
+
+    def setUp(self):
+        base = timezone.now()
+        self.reviews = []
+        for i in range(7):
+            # Pairs share a timestamp so the id tie-breaker is exercised
+            self.reviews.append(Review.objects.create(rating=5, created_at=base - timedelta(minutes=i // 2)))
+        self.expected = [r.pk for r in sorted(self.reviews, key=lambda r: (r.created_at, r.pk), reverse=True)]
+
+    def test_walk_forward_and_back(self):
+        paginator = CursorPaginator(Review.objects.all(), 3)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        third = paginator.get_page(second.next_cursor)
+        self.assertEqual([r.pk for r in first] + [r.pk for r in second] + [r.pk for r in third], self.expected)
+        self.assertFalse(first.has_previous)
+        self.assertFalse(third.has_next)
+
+        back = paginator.get_page(third.previous_cursor)
+        self.assertEqual([r.pk for r in back], [r.pk for r in second])
+        self.assertEqual([r.pk for r in paginator.get_page(back.previous_cursor)], [r.pk for r in first])
+
+    def test_page_is_one_query_and_bad_cursor_falls_back(self):
+        paginator = CursorPaginator(Review.objects.all(), 3)
+        with self.assertNumQueries(1):
+            page = paginator.get_page()
+        self.assertEqual([r.pk for r in paginator.get_page('not-a-cursor')], [r.pk for r in page])
+
+
+from hotel_app.models import Location
+from hotel_app.ticket_search import search_tickets
+
+
+class TicketSearchTests(DjangoTestCase):
+    """Token-backed ticket search kept in sync on save"""
+
+    def setUp(self):
+        self.towels = RequestType.objects.create(name='Extra Towels')
+        self.ac = RequestType.objects.create(name='AC Repair')
+        self.suite = Location.objects.create(name='Presidential Suite', room_no='901')
+        self.towel_ticket = ServiceRequest.objects.create(request_type=self.towels, notes='Guest wants towels')
+        self.ac_ticket = ServiceRequest.objects.create(request_type=self.ac, location=self.suite,
+                                                       notes='Cooling is weak')
+
+    def test_prefix_and_all_terms(self):
+        self.assertEqual([t.pk for t in search_tickets(ServiceRequest.objects.all(), 'tow')], [self.towel_ticket.pk])
+        self.assertEqual([t.pk for t in search_tickets(ServiceRequest.objects.all(), 'presid cool')],
+                         [self.ac_ticket.pk])
+        self.assertEqual(list(search_tickets(ServiceRequest.objects.all(), 'towels suite')), [])
+
+    def test_relevance_and_resync(self):
+        # Newer ticket, but only a prefix match on "towels"
+        prefix_only = ServiceRequest.objects.create(request_type=self.ac, notes='Guest left towelsbag')
+        results = [t.pk for t in search_tickets(ServiceRequest.objects.all(), 'towels guest')]
+        self.assertEqual(results, [self.towel_ticket.pk, prefix_only.pk])
+
+        self.suite.name = 'Garden Villa'
+        self.suite.save()
+        self.assertEqual([t.pk for t in search_tickets(ServiceRequest.objects.all(), 'villa')], [self.ac_ticket.pk])
+        self.assertEqual(list(search_tickets(ServiceRequest.objects.all(), 'presidential')), [])
+
+    def test_edits_that_keep_the_indexed_text_skip_reindexing(self):
+        with patch('hotel_app.ticket_search.reindex_queryset') as reindex:
+            self.towels.active = False
+            self.towels.save()
+            self.suite.save(update_fields=['name'])
+            self.ac.description = 'Air conditioning'
+            self.ac.save(update_fields=['description'])
+        reindex.assert_not_called()
+
+        with patch('hotel_app.ticket_search.reindex_queryset') as reindex:
+            self.suite.room_no = '902'
+            self.suite.save()
+        reindex.assert_called_once()
+
+    def test_migration_backfills_existing_tickets(self):
+        from importlib import import_module
+        from types import SimpleNamespace
+        from django.apps import apps
+        from django.db import connection
+        from hotel_app.models import ServiceRequestSearchToken
+        ServiceRequestSearchToken.objects.all().delete()
+        migration = import_module('hotel_app.migrations.0029_servicerequest_search')
+        migration.backfill_search(apps, SimpleNamespace(connection=connection))
+        self.assertEqual([t.pk for t in search_tickets(ServiceRequest.objects.all(), 'presid cool')],
+                         [self.ac_ticket.pk])
+
+    def test_numeric_terms_match_the_ticket_id(self):
+        results = [t.pk for t in search_tickets(ServiceRequest.objects.all(), str(self.towel_ticket.pk))]
+        self.assertEqual(results, [self.towel_ticket.pk])
+        self.assertEqual([t.pk for t in search_tickets(ServiceRequest.objects.all(), '901')], [self.ac_ticket.pk])
+
+    @patch('hotel_app.ticket_search.uses_fulltext', return_value=True)
+    def test_fulltext_document_is_written_with_the_ticket(self, _):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        room = Location.objects.create(name='Annex', room_no='12')
+        ticket = ServiceRequest.objects.create(request_type=self.ac, location=room, notes='Noisy fan')
+        self.assertEqual(ServiceRequest.objects.get(pk=ticket.pk).search_document, 'Noisy fan AC Repair Annex 12')
+
+        ticket.notes = 'Fan fixed'
+        with CaptureQueriesContext(connection) as queries:
+            ticket.save(update_fields=['notes'])
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "hotel_app_servicerequest"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"search_document"', updates[0])
+
+        # Below InnoDB's minimum token size: matched as substrings, not through MATCH
+        self.assertEqual([t.pk for t in search_tickets(ServiceRequest.objects.all(), '12 ac')], [ticket.pk])
+
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import override_settings
+from hotel_app import principal
+from hotel_app.principal import get_principal
+from hotel_app.utils import user_in_group
+
+
+class PrincipalCacheTests(DjangoTestCase):
+    """Group and role checks are served from the cached principal"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('frontdesk', password='pw')
+        self.group = Group.objects.create(name='Front Desk')
+
+    @override_settings(PRINCIPAL_CACHE_TIMEOUT=300)
+    def test_checks_hit_cache_after_first_load(self):
+        self.user.groups.add(self.group)
+        self.assertTrue(user_in_group(self.user, 'Front Desk'))
+        fresh = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(user_in_group(fresh, 'Front Desk'))
+            self.assertFalse(user_in_group(fresh, 'Admins'))
+            get_principal(fresh).role
+
+    def test_membership_change_invalidates(self):
+        self.assertFalse(user_in_group(self.user, 'Front Desk'))
+        self.user.groups.add(self.group)
+        self.assertTrue(user_in_group(User.objects.get(pk=self.user.pk), 'Front Desk'))
+        self.group.user_set.remove(self.user)
+        self.assertFalse(user_in_group(User.objects.get(pk=self.user.pk), 'Front Desk'))
+
+    @override_settings(PRINCIPAL_CACHE_TIMEOUT=300)
+    def test_invalidation_repeats_after_commit(self):
+        self.user.groups.add(self.group)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.user_set.remove(self.user)
+            # A concurrent request still sees the uncommitted state and re-caches it
+            cache.set(principal._cache_key(self.user.pk), {
+                'role': None, 'group_names': ['Front Desk'], 'department_id': None, 'department_name': '',
+            }, 300)
+        self.assertFalse(user_in_group(User.objects.get(pk=self.user.pk), 'Front Desk'))
+
+    @override_settings(PRINCIPAL_CACHE_TIMEOUT=0)
+    def test_timeout_of_zero_builds_once_per_user_object(self):
+        user_in_group(self.user, 'Front Desk')
+        fresh = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(2):
+            user_in_group(fresh, 'Front Desk')
+            user_in_group(fresh, 'Admins')
+
+
+
+from django.db.models import F
+from hotel_app.sla_sweep import sweep_sla_breaches
+
+
+class SlaSweepTests(DjangoTestCase):
+    """Set-based SLA breach flagging"""
+
+    def _ticket(self, status, hours_ago, **extra):
+        ticket = ServiceRequest.objects.create(priority='normal', status=status)
+        ServiceRequest.objects.filter(pk=ticket.pk).update(
+            created_at=timezone.now() - timedelta(hours=hours_ago), sla_hours=2, response_sla_hours=1, **extra
+        )
+        return ticket
+
+    def test_flags_only_new_breaches(self):
+        late_progress = self._ticket('in_progress', 3)
+        slow_accept = self._ticket('accepted', 0.5)
+        ServiceRequest.objects.filter(pk=slow_accept.pk).update(
+            accepted_at=F('created_at') + timedelta(hours=1.5)
+        )
+        pending = self._ticket('pending', 5)
+        on_time = self._ticket('in_progress', 0.25)
+        self._ticket('completed', 10)
+
+        with self.assertNumQueries(4):
+            result = sweep_sla_breaches()
+        self.assertEqual(sorted(result['response']), sorted([late_progress.pk, slow_accept.pk]))
+        self.assertEqual(result['resolution'], [late_progress.pk])
+
+        late_progress.refresh_from_db()
+        self.assertTrue(late_progress.sla_breached and late_progress.resolution_sla_breached)
+        pending.refresh_from_db()
+        on_time.refresh_from_db()
+        self.assertFalse(pending.sla_breached or on_time.sla_breached)
+
+        # Second sweep writes nothing
+        with self.assertNumQueries(2):
+            self.assertEqual(sweep_sla_breaches(), {'response': [], 'resolution': []})
+
+
+from hotel_app.sla_scheduler import SLADeadlineScheduler
+
+
+class SlaSchedulerTests(DjangoTestCase):
+    """Min-heap of upcoming SLA deadlines"""
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.clock_value = self.now
+        self.breaches = []
+        self.scheduler = SLADeadlineScheduler(on_breach=self.breaches.append, clock=lambda: self.clock_value)
+
+    def _ticket(self, status, sla_hours, response_hours):
+        ticket = ServiceRequest.objects.create(priority='normal', status=status)
+        ServiceRequest.objects.filter(pk=ticket.pk).update(
+            created_at=self.now, sla_hours=sla_hours, response_sla_hours=response_hours
+        )
+        return ticket
+
+    def test_orders_deadlines_and_flags_when_due(self):
+        soon = self._ticket('in_progress', 1, 0.5)
+        later = self._ticket('in_progress', 4, 2)
+        self._ticket('closed', 1, 1)
+        self.scheduler.load()
+        self.assertEqual(len(self.scheduler), 4)
+        self.assertEqual(self.scheduler.next_deadline(), self.now + timedelta(hours=0.5))
+
+        self.clock_value = self.now + timedelta(hours=1, minutes=1)
+        sleep_for = self.scheduler.run_once()
+        self.assertEqual(self.breaches, [{'response': [soon.pk], 'resolution': [soon.pk]}])
+        self.assertAlmostEqual(sleep_for, 5)
+        soon.refresh_from_db()
+        later.refresh_from_db()
+        self.assertTrue(soon.sla_breached)
+        self.assertFalse(later.sla_breached)
+
+    def test_refresh_picks_up_changes_without_rescanning(self):
+        self.scheduler.load()
+        ticket = self._ticket('in_progress', 2, 1)
+        with self.assertNumQueries(1):
+            self.scheduler.refresh()
+        self.assertEqual(self.scheduler.next_deadline(), self.now + timedelta(hours=1))
+
+        ticket.status = 'completed'
+        ticket.save()
+        self.scheduler.refresh()
+        self.assertIsNone(self.scheduler.next_deadline())
+
+    def test_refresh_rereads_the_overlap_and_reloads_periodically(self):
+        self.scheduler.load()
+        self._ticket('in_progress', 3, 3)
+        self.scheduler.refresh()
+
+        # Saved before the newest row already seen but committed after it
+        late = self._ticket('in_progress', 2, 1)
+        ServiceRequest.objects.filter(pk=late.pk).update(updated_at=self.scheduler._since - timedelta(seconds=30))
+        self.scheduler.refresh()
+        self.assertEqual(self.scheduler.next_deadline(), self.now + timedelta(hours=1))
+
+        # Outside the overlap window: only the periodic reload finds it
+        later = self._ticket('in_progress', 0.5, 0.25)
+        ServiceRequest.objects.filter(pk=later.pk).update(updated_at=self.scheduler._since - timedelta(hours=1))
+        self.scheduler.refresh()
+        self.assertEqual(self.scheduler.next_deadline(), self.now + timedelta(hours=1))
+        self.clock_value = self.now + timedelta(seconds=self.scheduler.reload_interval.total_seconds())
+        self.scheduler.refresh()
+        self.assertEqual(self.scheduler.next_deadline(), self.now + timedelta(hours=0.25))
+        self.assertEqual(len(self.scheduler), 6)
+
+    def test_run_forever_survives_a_failed_pass(self):
+        from django.db import OperationalError
+
+        class Stop(BaseException):
+            pass
+
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 2:
+                raise Stop
+
+        with patch.object(self.scheduler, 'refresh', side_effect=[OperationalError('gone away'), None]), \
+                patch('hotel_app.sla_scheduler.close_old_connections') as close_old_connections:
+            with self.assertRaises(Stop), self.assertLogs('hotel_app.sla_scheduler', 'ERROR'):
+                self.scheduler.run_forever(sleep=sleep)
+        self.assertEqual(sleeps, [5, 5])
+        self.assertEqual(close_old_connections.call_count, 2)
+
+
+from django.conf import settings
+from hotel_app import sla_policy
+from hotel_app.models import DepartmentRequestSLA, SLAConfiguration
+
+
+class SlaPolicyMatrixTests(DjangoTestCase):
+    """Compiled SLA policy matrix used by ServiceRequest.set_sla_times"""
+
+    def setUp(self):
+        sla_policy.invalidate()
+        self.department = Department.objects.create(name='Housekeeping')
+        self.request_type = RequestType.objects.create(name='Towels')
+        SLAConfiguration.objects.create(priority='high', response_time_minutes=30, resolution_time_minutes=120)
+        self.rule = DepartmentRequestSLA.objects.create(
+            department=self.department, request_type=self.request_type, priority='high',
+            response_time_minutes=6, resolution_time_minutes=60,
+        )
+
+    def test_resolution_order(self):
+        self.assertEqual(sla_policy.resolve_sla_hours(self.department.pk, self.request_type.pk, 'high'), (0.1, 1.0))
+        self.assertEqual(sla_policy.resolve_sla_hours(self.department.pk, None, 'high'), (0.5, 2.0))
+        self.assertEqual(sla_policy.resolve_sla_hours(None, None, 'low'), (20 / 60.0, 20 / 60.0))
+        self.assertEqual(sla_policy.resolve_sla_hours(None, None, 'unknown'), sla_policy.FALLBACK_SLA_HOURS)
+
+    def test_warm_matrix_costs_no_queries(self):
+        sla_policy.get_matrix()
+        ticket = ServiceRequest(department=self.department, request_type=self.request_type, priority='high')
+        with self.assertNumQueries(0):
+            ticket.set_sla_times()
+        self.assertEqual((ticket.response_sla_hours, ticket.sla_hours), (0.1, 1.0))
+
+    def test_save_and_delete_invalidate(self):
+        sla_policy.get_matrix()
+        self.rule.resolution_time_minutes = 90
+        self.rule.save()
+        self.assertEqual(sla_policy.resolve_sla_hours(self.department.pk, self.request_type.pk, 'high'), (0.1, 1.5))
+
+        self.rule.delete()
+        self.assertEqual(sla_policy.resolve_sla_hours(self.department.pk, self.request_type.pk, 'high'), (0.5, 2.0))
+
+        SLAConfiguration.objects.filter(priority='high').delete()
+        self.assertEqual(sla_policy.resolve_sla_hours(None, None, 'high'), (10 / 60.0, 10 / 60.0))
+
+    def test_stale_matrix_is_rebuilt_after_max_age(self):
+        matrix = sla_policy.get_matrix()
+        # An edit made by another process whose invalidation never reached this one
+        DepartmentRequestSLA.objects.filter(pk=self.rule.pk).update(resolution_time_minutes=90)
+        self.assertIs(sla_policy.get_matrix(), matrix)
+
+        matrix.loaded_at -= settings.SLA_POLICY_MAX_AGE
+        self.assertEqual(sla_policy.resolve_sla_hours(self.department.pk, self.request_type.pk, 'high'), (0.1, 1.5))
+
+
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from hotel_app.models import AuditLog, Notification, UserProfile
+
+
+class BulkTicketCreateTests(DjangoTestCase):
+    """Batch ticket creation endpoint"""
+
+    def setUp(self):
+        sla_policy.invalidate()
+        self.admin = User.objects.create_superuser('bulkadmin', 'bulkadmin@example.com', 'pass12345')
+        self.client.force_login(self.admin)
+        self.department = Department.objects.create(name='Engineering')
+        for username in ('eng1', 'eng2'):
+            staff = User.objects.create_user(username, f'{username}@example.com', 'pass12345')
+            UserProfile.objects.filter(user=staff).update(department=self.department)
+        SLAConfiguration.objects.create(priority='high', response_time_minutes=30, resolution_time_minutes=120)
+
+    def _post(self, tickets):
+        return self.client.post(
+            reverse('dashboard:api_bulk_create_tickets'), json.dumps({'tickets': tickets}),
+            content_type='application/json',
+        )
+
+    def test_creates_valid_items_and_reports_failures(self):
+        item = {'guest_name': 'Guest', 'department': 'Engineering', 'category': 'Power outage', 'priority': 'High'}
+        tickets = [dict(item, room_number=str(room), description=f'No power in {room}') for room in range(301, 306)]
+        tickets.insert(2, dict(item, room_number='306', department='Nowhere'))
+        tickets.append({'guest_name': 'Guest'})
+
+        response = self._post(tickets)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['created'], data['failed']), (5, 2))
+        self.assertEqual(data['results'][2]['errors'], ['Invalid department'])
+        self.assertFalse(data['results'][6]['success'])
+
+        ids = [result['ticket_id'] for result in data['results'] if result['success']]
+        created = ServiceRequest.objects.filter(pk__in=ids)
+        self.assertEqual(created.count(), 5)
+        ticket = created.get(location__room_no='301')
+        self.assertEqual((ticket.response_sla_hours, ticket.sla_hours), (0.5, 2.0))
+        self.assertIsNotNone(ticket.due_at)
+        self.assertEqual(Notification.objects.filter(related_object_id__in=ids).count(), 10)
+        self.assertEqual(AuditLog.objects.filter(model_name='ServiceRequest', object_pk__in=map(str, ids)).count(), 5)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        RequestType.objects.create(name='Power outage')
+        item = {'guest_name': 'Guest', 'department': 'Engineering', 'category': 'Power outage', 'priority': 'High'}
+        self._post([dict(item, room_number=str(room)) for room in range(1, 4)])
+        with CaptureQueriesContext(connection) as small:
+            self._post([dict(item, room_number=str(room)) for room in range(1, 4)])
+        with CaptureQueriesContext(connection) as large:
+            self._post([dict(item, room_number=str(room)) for room in range(1, 4)] * 10)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_rejects_empty_payload(self):
+        self.assertEqual(self._post([]).status_code, 400)
+
+    def test_rejects_non_string_fields_per_item(self):
+        item = {'guest_name': 'Guest', 'room_number': '401', 'department': 'Engineering',
+                'category': 'Leak', 'priority': 'High'}
+        response = self._post([dict(item, department=['Engineering']), dict(item, category={'name': 'Leak'}), item])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(results[0]['errors'], ['Field must be a string: department'])
+        self.assertEqual(results[1]['errors'], ['Field must be a string: category'])
+        self.assertTrue(results[2]['success'])
+
+    def test_without_returning_rows_each_ticket_keeps_its_own_pk(self):
+        item = {'guest_name': 'Guest', 'department': 'Engineering', 'category': 'Leak', 'priority': 'High'}
+        tickets = [dict(item, room_number=str(room), description=f'Leak in {room}') for room in range(501, 504)]
+        with patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            results = self._post(tickets).json()['results']
+
+        for room, result in zip(range(501, 504), results):
+            ticket = ServiceRequest.objects.get(pk=result['ticket_id'])
+            self.assertEqual((ticket.location.room_no, ticket.notes), (str(room), f'Leak in {room}'))
+        ids = [str(result['ticket_id']) for result in results]
+        self.assertEqual(AuditLog.objects.filter(model_name='ServiceRequest', object_pk__in=ids).count(), 3)
+
+
+from hotel_app.models import SLABreachNotification
+from hotel_app.sla_notifications import notify_breaches
+
+
+class SlaBreachNotificationLedgerTests(DjangoTestCase):
+    """Breach notifications are sent once per ticket and breach type"""
+
+    def setUp(self):
+        self.department = Department.objects.create(name='Front Office')
+        self.requester = User.objects.create_user('ledger-guest', 'guest@example.com', 'pass12345')
+        self.assignee = User.objects.create_user('ledger-agent', 'agent@example.com', 'pass12345')
+        self.colleague = User.objects.create_user('ledger-colleague', 'colleague@example.com', 'pass12345')
+        UserProfile.objects.filter(user__in=[self.assignee, self.colleague]).update(department=self.department)
+        self.ticket = ServiceRequest.objects.create(
+            priority='normal', status='in_progress', department=self.department,
+            requester_user=self.requester, assignee_user=self.assignee,
+        )
+        ServiceRequest.objects.filter(pk=self.ticket.pk).update(
+            created_at=timezone.now() - timedelta(hours=3), sla_hours=2, response_sla_hours=1
+        )
+
+    def test_sweeps_notify_once(self):
+        self.assertEqual(notify_breaches(sweep_sla_breaches()), 1)
+        # assignee and colleague once each (assignee is also department staff), plus the requester
+        recipients = Notification.objects.filter(related_object_id=self.ticket.pk).values_list('recipient', flat=True)
+        self.assertEqual(sorted(recipients), sorted([self.assignee.pk, self.colleague.pk, self.requester.pk]))
+        self.assertEqual(
+            set(SLABreachNotification.objects.values_list('breach_type', flat=True)), {'response', 'resolution'}
+        )
+
+        self.assertEqual(notify_breaches(sweep_sla_breaches()), 0)
+        self.assertEqual(notify_breaches({'response': [self.ticket.pk], 'resolution': []}), 0)
+        self.assertEqual(Notification.objects.filter(related_object_id=self.ticket.pk).count(), 3)
+
+    def test_breaches_flagged_elsewhere_are_announced(self):
+        ServiceRequest.objects.filter(pk=self.ticket.pk).update(response_sla_breached=True, sla_breached=True)
+        self.assertEqual(notify_breaches(), 1)
+        self.assertTrue(SLABreachNotification.objects.filter(ticket=self.ticket, breach_type='response').exists())
+
+    def test_breach_claimed_by_a_concurrent_sweep_is_skipped(self):
+        from .sla_notifications import _claim
+        breaches = {'response': [self.ticket.pk], 'resolution': [self.ticket.pk]}
+        # The other sweep inserts after this one read the ledger
+        SLABreachNotification.objects.create(ticket=self.ticket, breach_type='response')
+        with patch.object(SLABreachNotification.objects, 'filter', return_value=SLABreachNotification.objects.none()):
+            claimed = _claim(breaches)
+        self.assertEqual(claimed, {self.ticket.pk: {'resolution'}})
+        self.assertEqual(SLABreachNotification.objects.filter(ticket=self.ticket).count(), 2)
+
+    def test_command_uses_ledger(self):
+        call_command('check_sla_breaches', stdout=StringIO())
+        out = StringIO()
+        call_command('check_sla_breaches', stdout=out)
+        self.assertIn('Found 0 new SLA breaches', out.getvalue())
+        self.assertEqual(Notification.objects.filter(related_object_id=self.ticket.pk).count(), 3)
+
+
+from hotel_app.sla_import import import_department_slas
+
+
+class SlaImportTests(DjangoTestCase):
+    """Bulk upsert of department/request-type SLA rules"""
+
+    def setUp(self):
+        self.department = Department.objects.create(name='Housekeeping')
+        self.request_type = RequestType.objects.create(name='Towels')
+        DepartmentRequestSLA.objects.create(
+            department=self.department, request_type=self.request_type, priority='high',
+            response_time_minutes=10, resolution_time_minutes=60,
+        )
+
+    def test_dry_run_reports_diff_without_writing(self):
+        summary = import_department_slas([
+            {'department': 'Housekeeping', 'request_type': 'Towels', 'response_time': 10, 'resolution_time': 60},
+            {'department': 'Laundry', 'request_type': 'Pickup'},
+            {'department': 'Laundry'},
+        ], dry_run=True)
+        self.assertEqual(summary['created_departments'], ['Laundry'])
+        self.assertEqual(summary['created_request_types'], ['Pickup'])
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged']), (7, 0, 1))
+        self.assertEqual(summary['skipped'][0]['index'], 2)
+        self.assertFalse(Department.objects.filter(name='Laundry').exists())
+        self.assertEqual(DepartmentRequestSLA.objects.count(), 1)
+
+    def test_upserts_in_constant_queries(self):
+        rows = [
+            {'department': f'Dept {i}', 'request_type': f'Type {i}', 'response_time': 5, 'resolution_time': 50}
+            for i in range(20)
+        ]
+        rows.append({'department': 'Housekeeping', 'request_type': 'Towels', 'priority': 'high',
+                     'response_time': 15, 'resolution_time': 90})
+        with CaptureQueriesContext(connection) as queries:
+            summary = import_department_slas(rows)
+        self.assertLessEqual(len(queries.captured_queries), 12)
+        self.assertEqual((summary['created'], summary['updated']), (80, 1))
+        [update] = [change for change in summary['changes'] if change['action'] == 'update']
+        self.assertEqual(update['previous'], {'response_time_minutes': 10, 'resolution_time_minutes': 60})
+        rule = DepartmentRequestSLA.objects.get(department=self.department, request_type=self.request_type, priority='high')
+        self.assertEqual((rule.response_time_minutes, rule.resolution_time_minutes), (15, 90))
+        self.assertEqual(DepartmentRequestSLA.objects.count(), 81)
+        self.assertEqual(sla_policy.resolve_sla_hours(self.department.pk, self.request_type.pk, 'high'), (0.25, 1.5))
+
+    def test_names_match_case_insensitively(self):
+        summary = import_department_slas([
+            {'department': 'housekeeping', 'request_type': 'TOWELS', 'priority': 'high',
+             'response_time': 20, 'resolution_time': 120},
+            {'department': 'Spa', 'request_type': 'Massage', 'priority': 'low'},
+            {'department': 'spa', 'request_type': 'massage', 'priority': 'low',
+             'response_time': 30, 'resolution_time': 90},
+        ])
+        self.assertEqual(summary['created_departments'], ['Spa'])
+        self.assertEqual(summary['created_request_types'], ['Massage'])
+        self.assertEqual((summary['created'], summary['updated']), (1, 1))
+        rule = DepartmentRequestSLA.objects.get(department=self.department, request_type=self.request_type, priority='high')
+        self.assertEqual((rule.response_time_minutes, rule.resolution_time_minutes), (20, 120))
+        spa = DepartmentRequestSLA.objects.get(department__name='Spa')
+        self.assertEqual((spa.response_time_minutes, spa.resolution_time_minutes), (30, 90))
+
+    def test_api_import(self):
+        admin = User.objects.create_superuser('slaadmin', 'slaadmin@example.com', 'pass12345')
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse('dashboard:api_sla_configuration_update'),
+            json.dumps({'import_data': [{'department': 'Housekeeping', 'request_type': 'Linen'}]}),
+            content_type='application/json',
+        )
+        data = response.json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['created'], 4)
+        self.assertEqual(DepartmentRequestSLA.objects.filter(request_type__name='Linen').count(), 4)
+
+
+class SlaConfigurationPageTests(DjangoTestCase):
+    """Grouped, pivoted and paginated department SLA overrides"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('slapage', 'slapage@example.com', 'pass12345')
+        self.client.force_login(self.admin)
+        housekeeping = Department.objects.create(name='Housekeeping')
+        engineering = Department.objects.create(name='Engineering')
+        rules = []
+        for i in range(30):
+            request_type = RequestType.objects.create(name=f'Type {i:02d}')
+            for department in (housekeeping, engineering):
+                for minutes, priority in enumerate(('critical', 'high', 'normal'), start=1):
+                    rules.append(DepartmentRequestSLA(
+                        department=department, request_type=request_type, priority=priority,
+                        response_time_minutes=minutes, resolution_time_minutes=minutes * 10,
+                    ))
+        DepartmentRequestSLA.objects.bulk_create(rules)
+
+    def test_priority_matrix(self):
+        rows = list(DepartmentRequestSLA.objects.filter(department__name='Housekeeping').priority_matrix())
+        self.assertEqual(len(rows), 30)
+        row = rows[0]
+        self.assertEqual((row['department_name'], row['request_type_name'], row['rule_count']), ('Housekeeping', 'Type 00', 3))
+        self.assertEqual((row['critical_response'], row['high_resolution']), (1, 20))
+        self.assertIsNone(row['low_response'])
+        self.assertEqual((row['response_minutes'], row['resolution_minutes']), (3, 30))
+
+    def test_page_is_filtered_and_paginated_in_sql(self):
+        url = reverse('dashboard:sla_configuration')
+        response = self.client.get(url, {'department': 'Engineering', 'search': 'Type 1', 'page': 1})
+        self.assertEqual(response.status_code, 200)
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, 10)
+        self.assertEqual(page_obj.object_list[0]['request_type_name'], 'Type 10')
+        self.assertContains(response, '2m / 20m')
+
+        response = self.client.get(url, {'page': 'x', 'page_size': 'y'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 60)
+        self.assertEqual(len(response.context['page_obj'].object_list), 20)
+
+
+import asyncio
+
+from django.test import override_settings
+from asgiref.sync import sync_to_async
+from hotel_app import realtime
+from hotel_app.realtime import InProcessBroker, TICKETS_CHANNEL, user_channel
+
+
+class RecordingBroker:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, channel, event):
+        self.events.append((channel, event))
+
+
+class EventStreamTests(DjangoTestCase):
+    """Realtime broker and Server-Sent Events endpoint"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('streamer', 'streamer@example.com', 'pass12345')
+
+    def test_broker_routes_by_channel(self):
+        async def scenario():
+            broker = InProcessBroker()
+            mine = broker.subscribe([user_channel(self.user.pk)])
+            tickets = broker.subscribe([TICKETS_CHANNEL])
+            broker.publish(user_channel(self.user.pk), {'type': 'notification', 'id': 1, 'data': {}})
+            self.assertEqual((await mine.get(1))['id'], 1)
+            self.assertIsNone(await tickets.get(0.01))
+            mine.close()
+            tickets.close()
+            return broker.subscriber_count()
+
+        self.assertEqual(asyncio.run(scenario()), 0)
+
+    def test_saves_publish_after_commit(self):
+        broker = RecordingBroker()
+        with patch.object(realtime, '_broker', broker):
+            with self.captureOnCommitCallbacks(execute=True):
+                Notification.objects.create(recipient=self.user, title='Hello', message='World')
+                ticket = ServiceRequest.objects.create(priority='high')
+        channels = [channel for channel, _ in broker.events]
+        self.assertIn(user_channel(self.user.pk), channels)
+        self.assertIn(TICKETS_CHANNEL, channels)
+        ticket_event = next(event for channel, event in broker.events if channel == TICKETS_CHANNEL)
+        self.assertEqual(ticket_event['data']['id'], ticket.pk)
+
+    @override_settings(SSE_HEARTBEAT_SECONDS=0.05, SSE_MAX_SECONDS=2)
+    async def test_stream_pushes_events(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get('/api/notification/notifications/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).decode().startswith('retry:'))
+
+        realtime.get_broker().publish(user_channel(self.user.pk), {
+            'type': 'notification', 'id': 7, 'data': {'id': 7, 'title': 'Hello'},
+        })
+        chunk = (await anext(chunks)).decode()
+        self.assertIn('id: 7\nevent: notification\n', chunk)
+        self.assertEqual((await anext(chunks)).decode(), ': ping\n\n')
+        await chunks.aclose()
+
+    def test_redis_listener_reconnects_with_backoff(self):
+        from unittest.mock import Mock
+        from hotel_app.realtime import RECONNECT_MIN_SECONDS, RedisBroker
+
+        class Stop(BaseException):
+            pass
+
+        def disconnected():
+            raise ConnectionError('Connection closed by server.')
+            yield
+
+        def one_message():
+            yield {'channel': b'hotel_app:events:tickets', 'data': b'{"type": "ticket", "id": null, "data": {}}'}
+            raise Stop
+
+        # Built without __init__ so no Redis connection is configured
+        broker = RedisBroker.__new__(RedisBroker)
+        InProcessBroker.__init__(broker)
+        broker._redis = Mock()
+        first, second, third = Mock(), Mock(), Mock()
+        first.listen.side_effect = disconnected
+        second.psubscribe.side_effect = ConnectionError('Connection refused')
+        third.listen.side_effect = one_message
+        broker._redis.pubsub.side_effect = [first, second, third]
+        delivered, sleeps = [], []
+
+        with patch.object(broker, 'deliver', side_effect=lambda channel, event: delivered.append(channel)):
+            with self.assertRaises(Stop), self.assertLogs('hotel_app.realtime', 'WARNING'):
+                broker._listen(sleep=sleeps.append)
+        self.assertEqual(delivered, [TICKETS_CHANNEL])
+        self.assertEqual(sleeps, [RECONNECT_MIN_SECONDS, RECONNECT_MIN_SECONDS * 2])
+        first.close.assert_called_once()
+
+    def test_stream_requires_login_and_asgi(self):
+        url = '/api/notification/notifications/stream/'
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 204)
+
+
+class NotificationCounterTests(DjangoTestCase):
+    """Incremental notification API and denormalized unread counters"""
+
+    def setUp(self):
+        from .utils import create_bulk_notifications
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'pass12345')
+        self.notifications = create_bulk_notifications([self.user], 'Hello', 'World')
+        self.notifications += [Notification.objects.create(recipient=self.user, title=f'N{i}', message='m') for i in range(3)]
+        self.client.force_login(self.user)
+
+    def test_counter_follows_create_read_and_delete(self):
+        from .notification_counters import unread_count
+        self.assertEqual(unread_count(self.user), 4)
+        self.notifications[0].mark_as_read()
+        self.notifications[0].mark_as_read()
+        self.assertEqual(unread_count(self.user), 3)
+        self.notifications[1].delete()
+        self.assertEqual(unread_count(self.user), 2)
+        Notification.objects.create(recipient=self.user, title='Late', message='m')
+        self.assertEqual(unread_count(self.user), 3)
+        self.assertEqual(unread_count(self.user), Notification.objects.filter(recipient=self.user, is_read=False).count())
+
+        self.client.post('/api/notification/notifications/read-all/')
+        self.assertEqual(unread_count(self.user), 0)
+
+    def test_unread_count_endpoint_is_one_query(self):
+        url = '/api/notification/notifications/unread-count/'
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.json(), {'unread_count': 4})
+        counter_queries = [q for q in queries.captured_queries if 'notification' in q['sql'].lower()]
+        self.assertEqual(len(counter_queries), 1)
+
+    def test_since_returns_only_newer_notifications(self):
+        url = '/api/notification/notifications/'
+        response = self.client.get(url)
+        self.assertEqual(response['X-Unread-Count'], '4')
+        newest = max(n['id'] for n in response.json())
+
+        self.assertEqual(self.client.get(url, {'since': newest}).json(), [])
+        fresh = Notification.objects.create(recipient=self.user, title='Fresh', message='m')
+        response = self.client.get(url, {'since': newest})
+        self.assertEqual([n['id'] for n in response.json()], [fresh.pk])
+        self.assertEqual(response['X-Unread-Count'], '5')
+        self.assertEqual(self.client.get(url, {'since': 'x'}).status_code, 400)
+
+    def test_since_catches_up_from_the_oldest_missed(self):
+        url = '/api/notification/notifications/'
+        newest = max(n['id'] for n in self.client.get(url).json())
+        burst = [Notification.objects.create(recipient=self.user, title=f'B{i}', message='m') for i in range(5)]
+
+        response = self.client.get(url, {'since': newest, 'limit': 3})
+        self.assertEqual([n['id'] for n in response.json()], [n.pk for n in reversed(burst[:3])])
+        self.assertEqual(response['X-Has-More'], '1')
+        response = self.client.get(url, {'since': burst[2].pk, 'limit': 3})
+        self.assertEqual([n['id'] for n in response.json()], [n.pk for n in reversed(burst[3:])])
+        self.assertEqual(response['X-Has-More'], '0')
+
+    def test_counter_is_reconciled_periodically(self):
+        from django.core.cache import cache
+        from .notification_counters import RECONCILE_KEY, unread_count
+        self.assertEqual(unread_count(self.user), 4)
+        # A notification committed while the counter was being initialised
+        Notification.objects.bulk_create([Notification(recipient=self.user, title='Missed', message='m')])
+        self.assertEqual(unread_count(self.user), 4)
+
+        cache.delete(RECONCILE_KEY.format(self.user.pk))
+        self.assertEqual(unread_count(self.user), 5)
+
+    def test_all_notifications_are_paged_with_before(self):
+        url = '/api/notification/notifications/all/'
+        first = self.client.get(url, {'limit': 3}).json()
+        self.assertEqual(len(first), 3)
+        rest = self.client.get(url, {'limit': 3, 'before': first[-1]['id']}).json()
+        self.assertEqual(len(rest), 1)
+        self.assertFalse({n['id'] for n in first} & {n['id'] for n in rest})
+
+
+class NotificationArchiveTests(DjangoTestCase):
+    """Retention job moving old read notifications to the archive"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('archivist', 'archivist@example.com', 'pass12345')
+        old = timezone.now() - timezone.timedelta(days=60)
+        self.old_read = [
+            Notification.objects.create(recipient=self.user, title=f'Old {i}', message='m', is_read=True, created_at=old)
+            for i in range(5)
+        ]
+        self.old_unread = Notification.objects.create(recipient=self.user, title='Old unread', message='m', created_at=old)
+        self.recent_read = Notification.objects.create(recipient=self.user, title='Recent', message='m', is_read=True)
+
+    def test_archives_only_old_read_notifications_in_batches(self):
+        from .models import NotificationArchive
+        from .notification_retention import archive_notifications
+        from .notification_counters import unread_count
+
+        audit_rows = AuditLog.objects.count()
+        self.assertEqual(archive_notifications(older_than_days=30, batch_size=2), 5)
+
+        remaining = set(Notification.objects.values_list('pk', flat=True))
+        self.assertEqual(remaining, {self.old_unread.pk, self.recent_read.pk})
+        archived = NotificationArchive.objects.get(pk=self.old_read[0].pk)
+        self.assertEqual(archived.title, 'Old 0')
+        self.assertEqual(archived.recipient, self.user)
+        deleted = AuditLog.objects.filter(action='delete', model_name='Notification')
+        self.assertEqual(AuditLog.objects.count(), audit_rows + 5)
+        self.assertEqual(set(deleted.values_list('object_pk', flat=True)), {str(n.pk) for n in self.old_read})
+        self.assertEqual(unread_count(self.user), 1)
+        self.assertEqual(archive_notifications(older_than_days=30), 0)
+
+    def test_command_limit_and_dry_run(self):
+        out = StringIO()
+        call_command('archive_notifications', '--dry-run', stdout=out)
+        self.assertIn('5 read notifications would be archived', out.getvalue())
+        self.assertEqual(Notification.objects.count(), 7)
+
+        call_command('archive_notifications', '--limit', '3', stdout=StringIO())
+        self.assertEqual(Notification.objects.count(), 4)
+
+
+class NotificationFanOutTests(DjangoTestCase):
+    """Set-based fan-out of one notification to many recipients"""
+
+    def setUp(self):
+        self.department = Department.objects.create(name='Fan Out')
+        self.staff = []
+        for i in range(5):
+            user = User.objects.create_user(f'fan{i}', f'fan{i}@example.com', 'pass12345')
+            UserProfile.objects.filter(user=user).update(department=self.department)
+            self.staff.append(user)
+        self.request_type = RequestType.objects.create(name='Fan Out Type')
+
+    def test_fan_out_reads_ids_in_batches(self):
+        from .notification_fanout import fan_out
+        from .notification_counters import unread_count
+        recipients = User.objects.filter(userprofile__department=self.department)
+        with CaptureQueriesContext(connection) as queries:
+            created = fan_out(recipients, 'Hello', 'World', batch_size=2)
+        self.assertEqual(len(created), 5)
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "hotel_app_notification"')]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(Notification.objects.filter(title='Hello').count(), 5)
+        self.assertEqual(unread_count(self.staff[0]), 1)
+
+    def test_fan_out_without_returned_pks_still_counts_and_publishes(self):
+        from .notification_fanout import fan_out
+        from .notification_counters import unread_count
+        unread_count(self.staff[0])
+        broker = RecordingBroker()
+        with patch.object(realtime, '_broker', broker), \
+                patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False), \
+                self.captureOnCommitCallbacks(execute=True):
+            created = fan_out(User.objects.filter(userprofile__department=self.department), 'Hello', 'World')
+        self.assertEqual({n.pk for n in created}, {None})
+        self.assertEqual(unread_count(self.staff[0]), 1)
+        events = [event for _, event in broker.events]
+        self.assertEqual(len(events), 5)
+        self.assertEqual({(event['id'], event['data']['id']) for event in events}, {(None, None)})
+
+    def test_escalation_notifies_department_with_one_insert(self):
+        ticket = ServiceRequest.objects.create(request_type=self.request_type, department=self.department, notes='x')
+        Notification.objects.all().delete()
+        with CaptureQueriesContext(connection) as queries:
+            ticket.notify_department_leader_on_escalation()
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "hotel_app_notification"')]
+        self.assertEqual(len(inserts), 1)
+        notifications = Notification.objects.filter(notification_type='warning', related_object_id=str(ticket.pk))
+        self.assertEqual(set(notifications.values_list('recipient_id', flat=True)), {u.pk for u in self.staff})
+
+
+class NotificationCoalescingTests(DjangoTestCase):
+    """Repeats of an event on the same object update one notification row"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('stormy', 'stormy@example.com', 'pass12345')
+        self.other = User.objects.create_user('calm', 'calm@example.com', 'pass12345')
+        self.ticket = ServiceRequest.objects.create(request_type=RequestType.objects.create(name='Storm'), notes='x')
+        Notification.objects.all().delete()
+
+    def test_repeats_within_window_update_one_row(self):
+        from .notification_counters import unread_count
+        from .utils import create_bulk_notifications, create_notification
+
+        create_notification(self.user, 'Breach', 'first', 'warning', related_object=self.ticket)
+        create_bulk_notifications(User.objects.filter(pk__in=[self.user.pk, self.other.pk]), 'Breach', 'second', 'warning', related_object=self.ticket)
+        latest = create_notification(self.user, 'Breach', 'third', 'warning', related_object=self.ticket)
+
+        row = Notification.objects.get(recipient=self.user)
+        self.assertEqual(latest.pk, row.pk)
+        self.assertEqual((row.message, row.occurrences), ('third', 3))
+        self.assertEqual(Notification.objects.filter(recipient=self.other).count(), 1)
+        self.assertEqual(unread_count(self.user), 1)
+
+        # Other types, read rows and rows outside the window are not touched
+        create_notification(self.user, 'Info', 'fyi', 'info', related_object=self.ticket)
+        row.mark_as_read()
+        create_notification(self.user, 'Breach', 'fourth', 'warning', related_object=self.ticket)
+        Notification.objects.filter(recipient=self.other).update(created_at=timezone.now() - timezone.timedelta(hours=1))
+        create_notification(self.other, 'Breach', 'later', 'warning', related_object=self.ticket)
+        self.assertEqual(Notification.objects.filter(recipient=self.user).count(), 3)
+        self.assertEqual(Notification.objects.filter(recipient=self.other).count(), 2)
+
+    def test_fan_out_folds_with_one_update(self):
+        from .notification_fanout import fan_out
+        recipients = User.objects.filter(pk__in=[self.user.pk, self.other.pk])
+        fan_out(recipients, 'Escalated', 'once', 'warning', related_object=self.ticket)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(fan_out(recipients, 'Escalated', 'twice', 'warning', related_object=self.ticket), [])
+        updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "hotel_app_notification"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(list(Notification.objects.values_list('occurrences', flat=True)), [2, 2])
+
+    def test_poller_sees_folded_repeats(self):
+        from .utils import create_notification
+        url = '/api/notification/notifications/'
+        self.client.force_login(self.user)
+        folded = create_notification(self.user, 'Breach', 'first', 'warning', related_object=self.ticket)
+        newest = create_notification(self.user, 'Info', 'fyi', 'info')
+        seen = self.client.get(url).json()
+        since = {'since': newest.pk, 'updated_since': max(n['updated_at'] for n in seen)}
+        self.assertEqual(self.client.get(url, since).json(), [])
+
+        create_notification(self.user, 'Breach', 'second', 'warning', related_object=self.ticket)
+        response = self.client.get(url, since).json()
+        self.assertEqual([(n['id'], n['message'], n['occurrences']) for n in response], [(folded.pk, 'second', 2)])
+        self.assertEqual(self.client.get(url, {'since': newest.pk, 'updated_since': 'soon'}).status_code, 400)
+
+    @override_settings(NOTIFICATION_COALESCE_SECONDS=0)
+    def test_window_of_zero_disables_coalescing(self):
+        from .utils import create_notification
+        create_notification(self.user, 'Breach', 'first', 'warning', related_object=self.ticket)
+        create_notification(self.user, 'Breach', 'second', 'warning', related_object=self.ticket)
+        self.assertEqual(Notification.objects.filter(recipient=self.user).count(), 2)
+
+
+class OutboundMessageQueueTests(DjangoTestCase):
+    """Queued broadcasts, the message worker and provider rate limits"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('broadcaster', 'broadcaster@example.com', 'pass12345')
+        self.department = Department.objects.create(name='Front Desk')
+        for i in range(3):
+            user = User.objects.create_user(f'desk{i}', f'desk{i}@example.com', 'pass12345')
+            UserProfile.objects.filter(user=user).update(department=self.department, phone=f'+1555000000{i}')
+
+    def test_department_notify_only_enqueues(self):
+        from .models import OutboundMessage
+        self.client.force_login(self.admin)
+        with patch('hotel_app.whatsapp_service.WhatsAppService._send_text_message') as send:
+            response = self.client.post(
+                f'/dashboard/api/departments/{self.department.pk}/notify/',
+                data=json.dumps({'message': 'Fire drill at 3pm'}), content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 202)
+        send.assert_not_called()
+        job_id = response.json()['job_id']
+        self.assertEqual(response.json()['queued'], 3)
+        self.assertEqual(OutboundMessage.objects.filter(job_id=job_id, status='queued').count(), 3)
+
+        status = self.client.get(f'/dashboard/api/messages/jobs/{job_id}/').json()
+        self.assertEqual((status['queued'], status['sent'], status['total']), (3, 0, 3))
+
+    @override_settings(MESSAGE_MAX_ATTEMPTS=2, WHATSAPP_RATE_PER_SECOND=0)
+    def test_worker_sends_retries_and_gives_up(self):
+        from .message_queue import MessageWorker, enqueue
+        from .models import OutboundMessage
+
+        job = enqueue(['+15550001', '+15550002', '+15550003'], 'Hello')
+        sender = lambda phone, body: (
+            {'success': True, 'message_id': f'id-{phone}'} if phone != '+15550003' else {'success': False, 'error': 'rejected'}
+        )
+        worker = MessageWorker(max_workers=3, senders={'whatsapp': sender})
+        try:
+            self.assertEqual(worker.run_once(), 3)
+            self.assertEqual(worker.run_once(), 0)  # the failure waits for its backoff
+            failed = OutboundMessage.objects.get(recipient='+15550003')
+            self.assertEqual((failed.status, failed.attempts, failed.last_error), ('queued', 1, 'rejected'))
+            self.assertGreater(failed.next_attempt_at, timezone.now())
+
+            OutboundMessage.objects.filter(pk=failed.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(worker.run_once(), 1)
+        finally:
+            worker.shutdown()
+
+        statuses = dict(job.messages.values_list('recipient', 'status'))
+        self.assertEqual(statuses, {'+15550001': 'sent', '+15550002': 'sent', '+15550003': 'failed'})
+        self.assertEqual(OutboundMessage.objects.get(recipient='+15550001').provider_message_id, 'id-+15550001')
+
+    def test_claim_without_skip_locked_support(self):
+        from django.db.models.query import QuerySet
+        from .message_queue import MessageWorker, enqueue
+
+        enqueue(['+15550001', '+15550002'], 'Hello')
+        select_for_update = QuerySet.select_for_update
+        worker = MessageWorker(max_workers=1)
+        try:
+            with patch.object(connection.features, 'has_select_for_update_skip_locked', False), \
+                    patch.object(QuerySet, 'select_for_update', autospec=True, side_effect=select_for_update) as lock:
+                claimed = worker.claim()
+        finally:
+            worker.shutdown()
+        self.assertEqual(len(claimed), 2)
+        self.assertFalse(lock.call_args.kwargs['skip_locked'])
+
+    def test_token_bucket_limits_rate(self):
+        from .message_queue import TokenBucket
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(rate=2, clock=lambda: now[0], sleep=sleep)
+        for _ in range(6):
+            bucket.acquire()
+        # Two tokens of burst, then one every half second
+        self.assertAlmostEqual(now[0], 2.0)
+        self.assertEqual(len(sleeps), 4)
+
+
+class WhatsAppHttpSessionTests(DjangoTestCase):
+    """Pooled Graph API session with timeouts and safe retries"""
+
+    def test_sends_over_shared_session_with_timeout(self):
+        from unittest.mock import Mock
+        from .whatsapp_service import WhatsAppService, get_session
+
+        service = WhatsAppService()
+        self.assertIs(service.session, get_session())
+        self.assertIs(WhatsAppService().session, service.session)
+
+        service.access_token = 'live'
+        service.session = Mock()
+        service.session.post.return_value = Mock(ok=True, status_code=200, json=lambda: {'messages': [{'id': 'wamid.1'}]})
+        result = service.send_text_message('+15550001', 'Hi')
+        self.assertEqual((result['success'], result['message_id']), (True, 'wamid.1'))
+        self.assertEqual(service.session.post.call_args.kwargs['timeout'], service.timeout)
+
+        service.session.post.return_value = Mock(ok=False, status_code=400, json=lambda: {'error': {'message': 'bad'}})
+        self.assertFalse(service.send_text('+15550001', 'Hi'))
+
+    def test_message_posts_are_not_retried_on_server_errors(self):
+        from .whatsapp_service import build_session
+        retry = build_session(pool_size=4, retries=3).get_adapter('https://graph.facebook.com').max_retries
+        self.assertEqual(retry.connect, 3)
+        self.assertNotIn('POST', retry.allowed_methods)
+        self.assertIn(503, retry.status_forcelist)
+
+
+@override_settings(TWILIO_ACCOUNT_SID='AC' + '0' * 32, TWILIO_AUTH_TOKEN='token', TWILIO_WHATSAPP_FROM='+15550000000')
+class TwilioBatchTests(DjangoTestCase):
+    """Concurrent TwilioService.send_batch over the mock transport"""
+
+    def test_batch_is_concurrent_and_reports_per_recipient(self):
+        import time
+        from .twilio_service import MockTwilioHttpClient, TwilioService
+
+        transport = MockTwilioHttpClient(latency=0.05, fail_numbers=['+15550000003'])
+        service = TwilioService(http_client=transport)
+        items = [(f'+1555000000{i}', f'Hello {i}') for i in range(8)]
+        items.append({'to': '+15550000009', 'content_sid': 'HX123', 'content_variables': '{"1": "Ada"}'})
+
+        started = time.perf_counter()
+        results = service.send_batch(items, max_workers=9)
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 0.05 * len(items) / 2)
+        self.assertEqual(len(transport.requests), 9)
+        self.assertEqual([r['recipient'] for r in results], [item[0] for item in items[:8]] + ['+15550000009'])
+        self.assertFalse(results[3]['success'])
+        self.assertIn('not a valid phone number', results[3]['error'])
+        self.assertTrue(all(r['success'] for i, r in enumerate(results) if i != 3))
+        self.assertEqual([data['ContentSid'] for _, _, data in transport.requests if 'ContentSid' in data], ['HX123'])
+
+
+class MessagingCircuitBreakerTests(DjangoTestCase):
+    """Fail-fast circuit breakers around the messaging providers"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from . import circuit_breaker
+        circuit_breaker._breakers.clear()
+        cache.clear()
+        self.addCleanup(circuit_breaker._breakers.clear)
+
+    def test_opens_on_failure_rate_and_probes_when_half_open(self):
+        from .circuit_breaker import CircuitBreaker, CircuitOpenError, provider_health
+        now = [0.0]
+        breaker = CircuitBreaker('probe', failure_rate=0.5, minimum_calls=4, window_seconds=60, reset_seconds=30,
+                                 clock=lambda: now[0])
+        breaker.record_success()
+        breaker.record_success()
+        breaker.record_failure('boom')
+        self.assertEqual(breaker.state, 'closed')
+        breaker.record_failure('boom')
+        self.assertEqual(breaker.state, 'open')
+        self.assertEqual(provider_health('probe')['state'], 'open')
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(lambda: 'never')
+
+        now[0] += 30
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # only one probe at a time
+        breaker.record_failure('still down')
+        self.assertEqual(breaker.state, 'open')
+
+        now[0] += 30
+        self.assertEqual(breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(breaker.state, 'closed')
+        self.assertEqual(provider_health('probe')['state'], 'closed')
+
+    @override_settings(CIRCUIT_MINIMUM_CALLS=3, CIRCUIT_FAILURE_RATE=1.0)
+    def test_whatsapp_fails_fast_once_open(self):
+        import requests
+        from unittest.mock import Mock
+        from .whatsapp_service import WhatsAppService
+
+        service = WhatsAppService()
+        service.access_token = 'live'
+        service.session = Mock()
+        service.session.post.side_effect = requests.ConnectionError('refused')
+        for _ in range(3):
+            self.assertFalse(service.send_text('+15550001', 'Hi'))
+        self.assertEqual(service.session.post.call_count, 3)
+
+        result = service.send_text_message('+15550001', 'Hi')
+        self.assertTrue(result['circuit_open'])
+        self.assertEqual(service.session.post.call_count, 3)
+        self.assertFalse(service.is_connected())
+
+    @override_settings(TWILIO_ACCOUNT_SID='AC' + '1' * 32, TWILIO_AUTH_TOKEN='token')
+    def test_connection_check_reads_cached_health_unless_live(self):
+        from twilio.base.exceptions import TwilioRestException
+        from .circuit_breaker import get_breaker
+        admin = User.objects.create_superuser('twilioadmin', 'twilioadmin@example.com', 'pass12345')
+        self.client.force_login(admin)
+        breaker = get_breaker('twilio')
+        breaker.record_success()
+
+        data = {'account_sid': 'AC' + '1' * 32, 'auth_token': 'token', 'whatsapp_from': '+15550000000'}
+        with patch('twilio.rest.Client') as client:
+            response = self.client.post('/dashboard/api/twilio/test-connection/', data)
+        client.assert_not_called()
+        self.assertTrue(response.json()['cached'])
+        self.assertTrue(response.json()['success'])
+
+        # live=1 calls Twilio; refused credentials count against the breaker
+        with patch('twilio.rest.Client') as client:
+            client.return_value.api.accounts.return_value.fetch.side_effect = TwilioRestException(
+                401, 'https://api.twilio.com', 'Authenticate')
+            response = self.client.post('/dashboard/api/twilio/test-connection/', dict(data, live='1'))
+        client.return_value.api.accounts.return_value.fetch.assert_called_once()
+        self.assertFalse(response.json()['success'])
+        self.assertEqual(breaker._failures(), 1)
+
+        with patch.object(breaker, 'allow', return_value=False), patch('twilio.rest.Client') as client:
+            response = self.client.post('/dashboard/api/twilio/test-connection/', dict(data, live='1'))
+        client.assert_not_called()
+        self.assertEqual(response.status_code, 503)
+
+        # Credentials other than the configured ones are always checked live
+        with patch('twilio.rest.Client') as client:
+            self.client.post('/dashboard/api/twilio/test-connection/', dict(data, auth_token='other'))
+        client.return_value.api.accounts.return_value.fetch.assert_called_once()
+
+        self.assertEqual(self.client.get('/dashboard/messaging-setup/').status_code, 200)
+
+    @override_settings(TWILIO_ACCOUNT_SID='AC' + '2' * 32, TWILIO_AUTH_TOKEN='token', TWILIO_WHATSAPP_FROM='+15550000000')
+    def test_twilio_refused_credentials_open_the_circuit(self):
+        from unittest.mock import Mock
+        from twilio.base.exceptions import TwilioRestException
+        from .circuit_breaker import get_breaker
+        from .twilio_service import TwilioService
+
+        service = TwilioService()
+        service.client = Mock()
+        service.client.messages.create.side_effect = TwilioRestException(403, 'https://api.twilio.com', 'Forbidden')
+        with override_settings(CIRCUIT_MINIMUM_CALLS=2, CIRCUIT_FAILURE_RATE=1.0):
+            for _ in range(2):
+                self.assertFalse(service.send_text_message('+15550001234', 'Hi')['success'])
+        self.assertEqual(get_breaker('twilio').state, 'open')
+
+
+class WhatsAppMediaCacheTests(DjangoTestCase):
+    """QR images are uploaded once per distinct PNG and reused by media id"""
+
+    def setUp(self):
+        from unittest.mock import Mock
+        from . import circuit_breaker
+        from .utils import generate_qr_code
+        from .whatsapp_service import WhatsAppService
+
+        circuit_breaker._breakers.clear()
+        self.addCleanup(circuit_breaker._breakers.clear)
+        self.uploads = []
+
+        def post(url, json=None, files=None, **kwargs):
+            # Stub Graph API: media uploads and messages
+            if url.endswith('/media'):
+                self.uploads.append(files['file'][1])
+                return Mock(ok=True, status_code=200, json=lambda: {'id': f'media-{len(self.uploads)}'})
+            return Mock(ok=True, status_code=200, json=lambda: {'messages': [{'id': 'wamid.1'}]})
+
+        self.service = WhatsAppService()
+        self.service.access_token = 'live'
+        self.service.session = Mock()
+        self.service.session.post.side_effect = post
+        self.guest = Guest.objects.create(full_name='Ada', phone='+15550001234', guest_id='G-MEDIA',
+                                          details_qr_code=generate_qr_code('guest G-MEDIA'))
+
+    def test_resending_guest_qr_reuses_media_id(self):
+        from .models import WhatsAppMedia
+        self.assertTrue(self.service.send_guest_qr(self.guest))
+        self.assertTrue(self.service.send_guest_qr(self.guest))
+
+        self.assertEqual(len(self.uploads), 1)
+        image_sends = [c for c in self.service.session.post.call_args_list
+                       if c.kwargs.get('json') and c.kwargs['json'].get('type') == 'image']
+        self.assertEqual([c.kwargs['json']['image'] for c in image_sends], [{'id': 'media-1'}, {'id': 'media-1'}])
+        self.assertEqual(WhatsAppMedia.objects.get().media_id, 'media-1')
+
+        # Expired ids are uploaded again
+        WhatsAppMedia.objects.update(expires_at=timezone.now())
+        self.service.send_guest_qr(self.guest)
+        self.assertEqual(len(self.uploads), 2)
+
+    def test_media_ids_are_per_phone_number_and_mock_uploads_are_not_cached(self):
+        from .models import WhatsAppMedia
+        self.service.phone_number_id = 'phone-a'
+        self.assertEqual(self.service.get_media_id(b'png'), 'media-1')
+        self.service.phone_number_id = 'phone-b'
+        self.assertEqual(self.service.get_media_id(b'png'), 'media-2')
+        self.assertEqual(self.service.get_media_id(b'png'), 'media-2')
+        self.assertEqual(WhatsAppMedia.objects.count(), 2)
+
+        self.service.access_token = 'mock_token'
+        self.assertTrue(self.service.get_media_id(b'other').startswith('mock-media-'))
+        self.assertEqual(WhatsAppMedia.objects.count(), 2)
+
+    def test_voucher_qr_is_generated_once(self):
+        voucher = Voucher.objects.create(guest_name='Ada', room_number='101')
+        with patch('hotel_app.whatsapp_service.generate_voucher_qr_base64', return_value='cXI=') as generate:
+            self.assertEqual(self.service._voucher_qr(voucher), 'cXI=')
+            self.assertEqual(self.service._voucher_qr(Voucher.objects.get(pk=voucher.pk)), 'cXI=')
+        generate.assert_called_once()
@@ -0,0 +1,187 @@
+"""
+Bulk ticket creation.
+Validates a batch of ticket payloads, resolves locations, request types and
+departments with one query each, inserts the tickets with a single
+``bulk_create`` (SLA fields precomputed from the policy matrix) and writes the
+audit log, search data and department notifications in batches. Backends that
+cannot return the new pks from a bulk insert (MySQL) save the tickets one by
+one instead.
+"""
+
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import (
+    AuditLog, Department, Location, Notification, RequestType, ServiceRequest,
+)
+from .department_metrics import DepartmentMetrics
+from .notification_fanout import insert_notifications
+from .realtime import publish_ticket
+from .sla_policy import get_matrix
+from .ticket_search import index_tickets, prepare_document, uses_fulltext
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+REQUIRED_FIELDS = ('guest_name', 'room_number', 'department', 'category', 'priority')
+STRING_FIELDS = ('department', 'category', 'priority', 'description')
+
+# Same mapping as create_ticket_api
+PRIORITY_MAPPING = {
+    'Critical': 'critical',
+    'High': 'high',
+    'Medium': 'normal',
+    'Normal': 'normal',
+    'Low': 'low',
+}
+
+
+def _validate(item):
+    if not isinstance(item, dict):
+        return ['Ticket must be an object']
+    errors = [f'Missing required field: {field}' for field in REQUIRED_FIELDS if not item.get(field)]
+    errors += [
+        f'Field must be a string: {field}'
+        for field in STRING_FIELDS if item.get(field) and not isinstance(item[field], str)
+    ]
+    if item.get('room_number') and not isinstance(item['room_number'], (str, int)):
+        errors.append('Field must be a string or number: room_number')
+    return errors
+
+
+def _resolve_locations(room_numbers):
+    locations = {}
+    for location in Location.objects.filter(room_no__in=room_numbers).order_by('pk'):
+        locations.setdefault(location.room_no, location)
+    for room_number in room_numbers:
+        if room_number not in locations:
+            locations[room_number] = Location.objects.create(room_no=room_number, name=f'Room {room_number}')
+    return locations
+
+
+def _resolve_request_types(names):
+    request_types = {request_type.name: request_type for request_type in RequestType.objects.filter(name__in=names)}
+    for name in names:
+        if name not in request_types:
+            request_types[name] = RequestType.objects.create(name=name)
+    return request_types
+
+
+def _notify_departments(tickets):
+    """One Notification per ticket and department member, inserted in batches."""
+    department_ids = {ticket.department_id for ticket in tickets}
+    members = {}
+    for user_id, department_id in User.objects.filter(
+        userprofile__department_id__in=department_ids
+    ).values_list('id', 'userprofile__department_id'):
+        members.setdefault(department_id, []).append(user_id)
+
+    notifications = [
+        Notification(
+            recipient_id=user_id,
+            title=f"New Ticket #{ticket.pk} Assigned: {ticket.request_type.name}",
+            message=f"A new ticket #{ticket.pk} has been assigned to your department: {(ticket.notes or '')[:100]}...",
+            notification_type='request',
+            related_object_id=ticket.pk,
+            related_object_type='ServiceRequest',
+        )
+        for ticket in tickets
+        for user_id in members.get(ticket.department_id, ())
+    ]
+    insert_notifications(notifications)
+    return len(notifications)
+
+
+def create_tickets_bulk(items, requester):
+    """Create tickets for ``items``; return one result dict per item, in order.
+
+    Invalid items are reported with their errors and do not stop the rest of
+    the batch from being created.
+    """
+    results = [{'index': index, 'success': False} for index in range(len(items))]
+    valid = []
+    for index, item in enumerate(items):
+        errors = _validate(item)
+        if errors:
+            results[index]['errors'] = errors
+        else:
+            valid.append((index, item))
+
+    departments = {
+        department.name: department
+        for department in Department.objects.filter(name__in={item['department'] for _, item in valid})
+    }
+    pending = []
+    for index, item in valid:
+        if item['department'] not in departments:
+            results[index]['errors'] = ['Invalid department']
+        else:
+            pending.append((index, item))
+    if not pending:
+        return results
+
+    now = timezone.now()
+    matrix = get_matrix()
+    with transaction.atomic():
+        locations = _resolve_locations({str(item['room_number']) for _, item in pending})
+        request_types = _resolve_request_types({item['category'] for _, item in pending})
+
+        tickets = []
+        for _, item in pending:
+            department = departments[item['department']]
+            request_type = request_types[item['category']]
+            priority = PRIORITY_MAPPING.get(item['priority'], 'normal')
+            response_hours, resolution_hours = matrix.resolve(department.pk, request_type.pk, priority)
+            ticket = ServiceRequest(
+                request_type=request_type,
+                location=locations[str(item['room_number'])],
+                requester_user=requester,
+                department=department,
+                priority=priority,
+                status='pending',
+                notes=item.get('description'),
+                response_sla_hours=response_hours,
+                sla_hours=resolution_hours,
+                due_at=now + timezone.timedelta(hours=resolution_hours),
+            )
+            # bulk_create bypasses save(), which fills the MySQL search document
+            prepare_document(ticket)
+            tickets.append(ticket)
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            ServiceRequest.objects.bulk_create(tickets)
+            # bulk_create skips post_save, so do what the signal receivers would have done
+            AuditLog.objects.bulk_create([
+                AuditLog(
+                    actor=requester if getattr(requester, 'pk', None) else None,
+                    action='create',
+                    model_name='ServiceRequest',
+                    object_pk=str(ticket.pk),
+                    changes={},
+                )
+                for ticket in tickets
+            ])
+            if not uses_fulltext():
+                index_tickets(tickets)
+            for ticket in tickets:
+                publish_ticket(ticket)
+            transaction.on_commit(DepartmentMetrics.invalidate)
+        else:
+            # Without RETURNING the inserted rows cannot be told apart reliably;
+            # post_save writes the audit log, search data and realtime event
+            for ticket in tickets:
+                ticket.save()
+
+    try:
+        _notify_departments(tickets)
+    except Exception as e:
+        # Tickets are already committed; a failed fan-out must not hide them
+        logger.error(f"Failed to notify departments for bulk-created tickets: {str(e)}")
+
+    for (index, _), ticket in zip(pending, tickets):
+        results[index].update(success=True, ticket_id=ticket.pk)
+    logger.info(f"Bulk-created {len(tickets)} tickets ({len(items) - len(tickets)} rejected)")
+    return results
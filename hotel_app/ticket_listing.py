@@ -0,0 +1,137 @@
+"""
+Ticket list presentation helpers.
+Display labels and SLA decoration are applied only to the rows of the current
+page, after the database has done filtering and pagination.
+"""
+
+from django.utils import timezone
+
+TICKET_PRIORITY_DISPLAY = {
+    'critical': {'label': 'Critical', 'color': 'red'},
+    'high': {'label': 'High', 'color': 'red'},
+    'normal': {'label': 'Medium', 'color': 'sky'},
+    'low': {'label': 'Low', 'color': 'gray'},
+}
+DEFAULT_PRIORITY_DISPLAY = {'label': 'Medium', 'color': 'sky'}
+
+TICKET_STATUS_DISPLAY = {
+    'pending': {'label': 'Pending', 'color': 'yellow'},
+    'assigned': {'label': 'Assigned', 'color': 'yellow'},
+    'accepted': {'label': 'Accepted', 'color': 'blue'},
+    'in_progress': {'label': 'In Progress', 'color': 'sky'},
+    'completed': {'label': 'Completed', 'color': 'green'},
+    'closed': {'label': 'Closed', 'color': 'green'},
+    'escalated': {'label': 'Escalated', 'color': 'red'},
+    'rejected': {'label': 'Rejected', 'color': 'red'},
+}
+DEFAULT_STATUS_DISPLAY = {'label': 'Pending', 'color': 'yellow'}
+
+# Columns needed to render a ticket list row without loading full model instances.
+# The sla_* names are annotations added by ServiceRequest.objects.with_sla_metrics().
+TICKET_LIST_FIELDS = (
+    'id',
+    'priority',
+    'status',
+    'created_at',
+    'due_at',
+    'completed_at',
+    'notes',
+    'response_sla_breached',
+    'resolution_sla_breached',
+    'request_type__name',
+    'location__name',
+    'department__name',
+    'assignee_user__username',
+    'sla_elapsed_fraction',
+    'sla_seconds_to_breach',
+    'sla_risk',
+)
+
+SLA_RISK_LABELS = {
+    0: 'None',
+    1: 'On Track',
+    2: 'Warning',
+    3: 'Critical',
+    4: 'Breached',
+}
+
+
+def sla_percentage(created_at, due_at, completed_at=None, now=None):
+    """Percentage of the SLA window used so far (capped at 100)."""
+    if not created_at or not due_at:
+        return 0
+    end = completed_at or now or timezone.now()
+    total_allowed = (due_at - created_at).total_seconds()
+    if total_allowed <= 0:
+        return 0
+    return min(100, int(((end - created_at).total_seconds() / total_allowed) * 100))
+
+
+def sla_percentage_from_fraction(fraction):
+    """Convert the ``sla_elapsed_fraction`` annotation to a 0-100 percentage."""
+    if fraction is None:
+        return 0
+    return max(0, min(100, int(fraction * 100)))
+
+
+def sla_color(percentage):
+    """Hex colour for an SLA progress bar."""
+    if percentage > 90:
+        return '#ef4444'  # red-500
+    if percentage > 70:
+        return '#facc15'  # yellow-400
+    return '#22c55e'  # green-500
+
+
+def decorate_ticket(ticket, now=None):
+    """Attach priority, status and SLA display attributes to a ServiceRequest.
+
+    Uses the database-computed ``sla_elapsed_fraction`` when the ticket came
+    from a ``with_sla_metrics()`` queryset.
+    """
+    priority_data = TICKET_PRIORITY_DISPLAY.get(ticket.priority, DEFAULT_PRIORITY_DISPLAY)
+    status_data = TICKET_STATUS_DISPLAY.get(ticket.status, DEFAULT_STATUS_DISPLAY)
+    if hasattr(ticket, 'sla_elapsed_fraction'):
+        percentage = sla_percentage_from_fraction(ticket.sla_elapsed_fraction)
+    else:
+        percentage = sla_percentage(ticket.created_at, ticket.due_at, ticket.completed_at, now)
+
+    ticket.priority_label = priority_data['label']
+    ticket.priority_color = priority_data['color']
+    ticket.status_label = status_data['label']
+    ticket.status_color = status_data['color']
+    ticket.sla_percentage = percentage
+    ticket.sla_color = sla_color(percentage)
+    ticket.owner_avatar = 'https://placehold.co/24x24'
+    return ticket
+
+
+def ticket_rows(rows):
+    """Decorate ``values(*TICKET_LIST_FIELDS)`` rows for JSON clients."""
+    result = []
+    for row in rows:
+        priority_data = TICKET_PRIORITY_DISPLAY.get(row['priority'], DEFAULT_PRIORITY_DISPLAY)
+        status_data = TICKET_STATUS_DISPLAY.get(row['status'], DEFAULT_STATUS_DISPLAY)
+        percentage = sla_percentage_from_fraction(row['sla_elapsed_fraction'])
+        result.append({
+            'id': row['id'],
+            'request_type': row['request_type__name'],
+            'location': row['location__name'],
+            'department': row['department__name'],
+            'assignee': row['assignee_user__username'],
+            'notes': row['notes'],
+            'priority': row['priority'],
+            'priority_label': priority_data['label'],
+            'priority_color': priority_data['color'],
+            'status': row['status'],
+            'status_label': status_data['label'],
+            'status_color': status_data['color'],
+            'sla_percentage': percentage,
+            'sla_color': sla_color(percentage),
+            'sla_breached': bool(row['response_sla_breached'] or row['resolution_sla_breached']),
+            'sla_seconds_to_breach': row['sla_seconds_to_breach'],
+            'sla_risk': SLA_RISK_LABELS.get(row['sla_risk'], 'None'),
+            'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+            'due_at': row['due_at'].isoformat() if row['due_at'] else None,
+        })
+    return result
@@ -0,0 +1,172 @@
+"""
+Ticket full-text search.
+On MySQL, tickets are matched through a FULLTEXT index on
+ServiceRequest.search_document, which ServiceRequest.save() writes with the
+row; other backends use the ServiceRequestSearchToken table, refreshed after
+the save. Both are refreshed when a ticket's request type or location is
+renamed, are backfilled by migration 0029, and can be rebuilt with
+``manage.py rebuild_ticket_search``.
+"""
+
+import logging
+import re
+
+from django.db import connection
+from django.db.models import Case, Exists, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+
+from .models import ServiceRequest, ServiceRequestSearchToken
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'\w+')
+MAX_TOKEN_LENGTH = 64
+MAX_QUERY_TERMS = 8
+REINDEX_BATCH_SIZE = 500
+
+# InnoDB does not index words shorter than innodb_ft_min_token_size (default 3),
+# so shorter terms are matched with a substring filter instead
+FULLTEXT_MIN_TOKEN_SIZE = 3
+
+# Longer numbers cannot be a ticket id and would overflow the id column
+MAX_ID_DIGITS = 18
+
+# ServiceRequest fields the search document is built from
+DOCUMENT_FIELDS = {'notes', 'request_type', 'request_type_id', 'location', 'location_id'}
+
+# Sorts after every character that can appear in a token, so
+# [term, term + PREFIX_UPPER_BOUND) is an index range scan for "starts with term".
+PREFIX_UPPER_BOUND = '\U0010ffff'
+
+
+def tokenize(text):
+    """Lower-cased word tokens of ``text``, in order, truncated to the column size."""
+    return [token[:MAX_TOKEN_LENGTH] for token in TOKEN_RE.findall((text or '').lower())]
+
+
+def uses_fulltext():
+    return connection.vendor == 'mysql'
+
+
+def build_document(ticket):
+    """Searchable text for a ticket: notes, request type and location.
+
+    The id is matched directly by ``search_tickets``, so the document can be
+    built before a new ticket has one.
+    """
+    parts = [ticket.notes or '']
+    if ticket.request_type_id and ticket.request_type:
+        parts.append(ticket.request_type.name)
+    if ticket.location_id and ticket.location:
+        parts.append(ticket.location.name)
+        parts.append(ticket.location.room_no or '')
+    return ' '.join(part for part in parts if part)
+
+
+def prepare_document(ticket, update_fields=None):
+    """Fill ``ticket.search_document`` ahead of a save on MySQL.
+
+    Returns the ``update_fields`` to save with, extended with
+    ``search_document`` when the saved fields change it.
+    """
+    if not uses_fulltext():
+        return update_fields
+    if update_fields is not None:
+        if not set(update_fields) & DOCUMENT_FIELDS:
+            return update_fields
+        update_fields = set(update_fields) | {'search_document'}
+    ticket.search_document = build_document(ticket)
+    return update_fields
+
+
+def index_tickets(tickets):
+    """Refresh the search data for ``tickets`` (instances with related objects loaded)."""
+    tickets = [ticket for ticket in tickets if ticket.pk]
+    if not tickets:
+        return
+    if uses_fulltext():
+        for ticket in tickets:
+            ServiceRequest.objects.filter(pk=ticket.pk).update(search_document=build_document(ticket))
+        return
+
+    ServiceRequestSearchToken.objects.filter(ticket__in=[ticket.pk for ticket in tickets]).delete()
+    ServiceRequestSearchToken.objects.bulk_create([
+        ServiceRequestSearchToken(ticket_id=ticket.pk, token=token)
+        for ticket in tickets
+        for token in set(tokenize(build_document(ticket)))
+    ])
+
+
+def reindex_queryset(queryset):
+    """Re-index every ticket in ``queryset`` in batches; returns the number indexed."""
+    queryset = queryset.select_related('request_type', 'location').order_by('pk')
+    batch, total = [], 0
+    for ticket in queryset.iterator(chunk_size=REINDEX_BATCH_SIZE):
+        batch.append(ticket)
+        if len(batch) >= REINDEX_BATCH_SIZE:
+            index_tickets(batch)
+            total += len(batch)
+            batch = []
+    index_tickets(batch)
+    return total + len(batch)
+
+
+def _is_ticket_id(term):
+    return term.isdecimal() and len(term) <= MAX_ID_DIGITS
+
+
+def _or_id(term, condition):
+    """``condition``, or the ticket whose id is ``term`` when it is a number."""
+    return condition | Q(pk=int(term)) if _is_ticket_id(term) else condition
+
+
+def search_tickets(queryset, query):
+    """Filter ``queryset`` to tickets matching every term of ``query`` as a prefix.
+
+    A numeric term also matches the ticket with that id. On MySQL, numbers and
+    terms too short for the FULLTEXT index are matched as substrings instead.
+
+    Results are annotated with ``search_rank`` and ordered by it, most relevant
+    first. An empty query returns ``queryset`` unchanged.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return queryset
+
+    if uses_fulltext():
+        fulltext_terms = []
+        for term in terms:
+            if len(term) >= FULLTEXT_MIN_TOKEN_SIZE and not _is_ticket_id(term):
+                fulltext_terms.append(term)
+            else:
+                queryset = queryset.filter(_or_id(term, Q(search_document__icontains=term)))
+        if not fulltext_terms:
+            return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).order_by('-id')
+        table = ServiceRequest._meta.db_table
+        boolean_query = ' '.join(f'+{term}*' for term in fulltext_terms)
+        rank = RawSQL(
+            f'MATCH({table}.search_document) AGAINST (%s IN BOOLEAN MODE)',
+            [boolean_query],
+            output_field=FloatField(),
+        )
+        return queryset.annotate(search_rank=rank).filter(search_rank__gt=0).order_by('-search_rank', '-id')
+
+    tokens = ServiceRequestSearchToken.objects.filter(ticket=OuterRef('pk'))
+    any_term = Q()
+    for term in terms:
+        prefix = Q(token__gte=term, token__lt=term + PREFIX_UPPER_BOUND)
+        queryset = queryset.filter(_or_id(term, Q(Exists(tokens.filter(prefix)))))
+        any_term |= prefix
+
+    # Exact token matches weigh twice as much as prefix matches
+    score = (
+        tokens.filter(any_term)
+        .order_by()
+        .values('ticket')
+        .annotate(score=Sum(Case(When(token__in=terms, then=Value(2)), default=Value(1))))
+        .values('score')
+    )
+    return queryset.annotate(
+        search_rank=Coalesce(Subquery(score, output_field=IntegerField()), 0)
+    ).order_by('-search_rank', '-id')
@@ -2,19 +2,65 @@
 Twilio WhatsApp Service for Hotel Messaging System
 """
 
+import json
 import logging
 import os
 import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from twilio.base.exceptions import TwilioRestException
+from twilio.http import HttpClient
+from twilio.http.http_client import TwilioHttpClient
+from twilio.http.response import Response
 from twilio.rest import Client
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
+from .circuit_breaker import get_breaker, is_provider_failure
 
 logger = logging.getLogger(__name__)
 
+
+class MockTwilioHttpClient(HttpClient):
+    """
+    Offline transport for the Twilio client: answers message creation like the
+    REST API after ``latency`` seconds, failing for numbers in ``fail_numbers``.
+    Pass it as ``TwilioService(http_client=...)`` to test throughput and error
+    handling without network access.
+    """
+
+    def __init__(self, latency=0, fail_numbers=()):
+        super().__init__(logger, is_async=False)
+        self.latency = latency
+        self.fail_numbers = {number if number.startswith('whatsapp:') else f'whatsapp:{number}' for number in fail_numbers}
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def request(self, method, uri, params=None, data=None, headers=None, auth=None, timeout=None, allow_redirects=False):
+        with self._lock:
+            self.requests.append((method, uri, data))
+        if self.latency:
+            time.sleep(self.latency)
+        data = data or {}
+        to = data.get('To')
+        if to in self.fail_numbers:
+            body = {'code': 21211, 'message': f"The 'To' number {to} is not a valid phone number.", 'status': 400}
+            return Response(400, json.dumps(body))
+        body = {
+            'sid': f'SM{uuid.uuid4().hex}',
+            'status': 'queued',
+            'to': to,
+            'from': data.get('From'),
+            'body': data.get('Body'),
+        }
+        return Response(201, json.dumps(body))
+
+
 class TwilioService:
     """Twilio WhatsApp integration service"""
     
-    def __init__(self):
+    def __init__(self, http_client=None):
         # Try to get from Django settings first, then from environment variables
         self.account_sid = getattr(settings, 'TWILIO_ACCOUNT_SID', None) or os.environ.get('TWILIO_ACCOUNT_SID')
         self.auth_token = getattr(settings, 'TWILIO_AUTH_TOKEN', None) or os.environ.get('TWILIO_AUTH_TOKEN')
@@ -23,7 +69,11 @@ class TwilioService:
         # Only initialize client if all credentials are available
         if self.account_sid and self.auth_token and self.whatsapp_from:
             try:
-                self.client = Client(self.account_sid, self.auth_token)
+                # One client (and HTTP session) shared by every send, including send_batch threads
+                self.client = Client(
+                    self.account_sid, self.auth_token,
+                    http_client=http_client or TwilioHttpClient(timeout=getattr(settings, 'TWILIO_TIMEOUT', 10)),
+                )
             except Exception as e:
                 logger.error(f"Failed to initialize Twilio client: {str(e)}")
                 self.client = None
@@ -116,7 +166,27 @@ class TwilioService:
             
             # Send the message
             if self.client:
-                message = self.client.messages.create(**message_params)
+                breaker = get_breaker('twilio')
+                if not breaker.allow():
+                    # Fail fast while Twilio is down instead of waiting for a timeout
+                    return {
+                        'success': False,
+                        'error': 'Twilio unavailable (circuit open)',
+                        'circuit_open': True
+                    }
+                try:
+                    message = self.client.messages.create(**message_params)
+                except TwilioRestException as e:
+                    # A rejected message (4xx) means Twilio is up, unless the credentials were refused
+                    if is_provider_failure(e.status):
+                        breaker.record_failure(e)
+                    else:
+                        breaker.record_success()
+                    raise
+                except Exception as e:
+                    breaker.record_failure(e)
+                    raise
+                breaker.record_success()
                 
                 logger.info(f"WhatsApp message sent successfully to {formatted_to}. SID: {message.sid}")
                 return {
@@ -170,6 +240,46 @@ class TwilioService:
         """
         return self.send_whatsapp_message(to_number=to_number, body=body)
     
+    def _batch_item(self, item):
+        """Normalise a send_batch item to send_whatsapp_message keyword arguments."""
+        if isinstance(item, dict):
+            return {
+                'to_number': item.get('to') or item.get('to_number'),
+                'body': item.get('body'),
+                'content_sid': item.get('content_sid'),
+                'content_variables': item.get('content_variables') or item.get('variables'),
+            }
+        if len(item) == 2:
+            return {'to_number': item[0], 'body': item[1]}
+        to_number, content_sid, content_variables = item
+        return {'to_number': to_number, 'content_sid': content_sid, 'content_variables': content_variables}
+    
+    def send_batch(self, items, max_workers=None):
+        """
+        Send many WhatsApp messages concurrently through the shared client
+        
+        Args:
+            items (list): ``(to, body)`` or ``(to, content_sid, content_variables)``
+                tuples, or dicts with ``to`` and ``body`` or ``content_sid``/``content_variables``
+            max_workers (int, optional): Concurrent sends (default TWILIO_BATCH_CONCURRENCY)
+            
+        Returns:
+            list: One response dict per item, in order, each with the ``recipient`` it was for
+        """
+        items = [self._batch_item(item) for item in items]
+        if not items:
+            return []
+        max_workers = min(max_workers or getattr(settings, 'TWILIO_BATCH_CONCURRENCY', 8), len(items))
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='twilio-batch') as executor:
+            results = list(executor.map(lambda kwargs: self.send_whatsapp_message(**kwargs), items))
+        
+        for item, result in zip(items, results):
+            result['recipient'] = item['to_number']
+        sent = sum(1 for result in results if result.get('success'))
+        logger.info(f"Twilio batch: {sent} of {len(results)} WhatsApp messages sent")
+        return results
+    
     def is_configured(self):
         """
         Check if Twilio service is properly configured
@@ -8,10 +8,11 @@ from django.conf import settings
 from django.shortcuts import redirect
 from django.contrib import messages
 from .models import Notification
+from .principal import get_principal
 
 def user_in_group(user, group_name):
-    """Check if user is in a specific group"""
-    return user.is_authenticated and (user.is_superuser or user.groups.filter(name=group_name).exists())
+    """Check if user is in a specific group (served from the cached principal)"""
+    return get_principal(user).in_group(group_name)
 
 def group_required(group_names):
     """
@@ -110,35 +111,26 @@ def create_notification(recipient, title, message, notification_type='info', rel
         notification_data['related_object_id'] = related_object.id
         notification_data['related_object_type'] = related_object.__class__.__name__
     
-    return Notification.objects.create(**notification_data)
+    # A repeat of a recent unread notification about the same object updates that one instead
+    from .notification_fanout import coalesce
+    notification = Notification(**notification_data)
+    if coalesce([notification]):
+        notification.save()
+    return notification
 
 def create_bulk_notifications(recipients, title, message, notification_type='info', related_object=None):
     """
     Create notifications for multiple users
     
     Args:
-        recipients: List or QuerySet of User objects
+        recipients: QuerySet of User objects (only their ids are loaded), or a list of users or user ids
         title: Title of the notification
         message: Message content of the notification
         notification_type: Type of notification
         related_object: Optional related object
     """
-    notifications = []
-    for recipient in recipients:
-        notification_data = {
-            'recipient': recipient,
-            'title': title,
-            'message': message,
-            'notification_type': notification_type
-        }
-        
-        if related_object:
-            notification_data['related_object_id'] = related_object.id
-            notification_data['related_object_type'] = related_object.__class__.__name__
-        
-        notifications.append(Notification(**notification_data))
-    
-    return Notification.objects.bulk_create(notifications)
+    from .notification_fanout import fan_out
+    return fan_out(recipients, title, message, notification_type, related_object)
 
 def mark_notification_as_read(notification_id, user):
     """
@@ -150,8 +142,7 @@ def mark_notification_as_read(notification_id, user):
     """
     try:
         notification = Notification.objects.get(id=notification_id, recipient=user)
-        notification.is_read = True
-        notification.save()
+        notification.mark_as_read()
         return True
     except Notification.DoesNotExist:
         return False
@@ -163,4 +154,5 @@ def mark_all_notifications_as_read(user):
     Args:
         user: User object
     """
-    return Notification.objects.filter(recipient=user, is_read=False).update(is_read=True)
\ No newline at end of file
+    from .notification_counters import mark_all_read
+    return mark_all_read(user)
\ No newline at end of file
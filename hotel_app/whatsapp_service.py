@@ -3,15 +3,64 @@ WhatsApp Integration Service for Hotel Voucher System
 Mock implementation - replace with actual WhatsApp Business API
 """
 
+import base64
+import binascii
+import hashlib
 import logging
+import threading
+import uuid
+from datetime import timedelta
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
 from django.utils import timezone
-from .models import Voucher
+from .circuit_breaker import get_breaker, is_provider_failure, provider_health
+from .models import Voucher, WhatsAppMedia
 from .utils import generate_voucher_qr_base64
 
 logger = logging.getLogger(__name__)
 
+_session = None
+_session_lock = threading.Lock()
+
+
+def build_session(pool_size=None, retries=None):
+    """
+    requests.Session with a sized keep-alive connection pool and safe retries.
+    Connection failures are retried for every method (the request never reached
+    the server); 429/5xx responses only for idempotent methods, so a message
+    POST is never sent twice.
+    """
+    pool_size = pool_size or getattr(settings, 'WHATSAPP_HTTP_POOL_SIZE', 20)
+    retries = getattr(settings, 'WHATSAPP_HTTP_RETRIES', 2) if retries is None else retries
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """The process-wide pooled session shared by all WhatsAppService instances."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
 class WhatsAppService:
     """Mock WhatsApp Business API integration"""
     
@@ -19,6 +68,45 @@ class WhatsAppService:
         self.api_url = getattr(settings, 'WHATSAPP_API_URL', 'https://graph.facebook.com/v17.0')
         self.access_token = getattr(settings, 'WHATSAPP_ACCESS_TOKEN', 'mock_token')
         self.phone_number_id = getattr(settings, 'WHATSAPP_PHONE_NUMBER_ID', 'mock_phone_id')
+        self.session = get_session()
+        self.timeout = (
+            getattr(settings, 'WHATSAPP_CONNECT_TIMEOUT', 3.05),
+            getattr(settings, 'WHATSAPP_READ_TIMEOUT', 10),
+        )
+    
+    def _post(self, url, payload=None, **kwargs):
+        """POST to the Graph API over the pooled session; returns a response dict with ``success``.
+
+        ``payload`` is sent as JSON; extra keyword arguments (e.g. ``files``) go to requests.
+        """
+        breaker = get_breaker('whatsapp')
+        if not breaker.allow():
+            # Fail fast while the Graph API is down instead of waiting for a timeout
+            return {'success': False, 'error': 'WhatsApp API unavailable (circuit open)', 'circuit_open': True}
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+        try:
+            response = self.session.post(url, json=payload, headers=headers, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            breaker.record_failure(e)
+            raise
+        # Rejected requests (4xx) mean the API is up; refused tokens, throttling and server errors count against it
+        if is_provider_failure(response.status_code):
+            breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            breaker.record_success()
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        if not isinstance(data, dict):
+            data = {'data': data}
+        # The Graph API answers {"messages": [{"id": ...}]} or {"error": {...}}
+        data.setdefault('success', response.ok and 'error' not in data)
+        if data['success'] and not data.get('message_id') and data.get('messages'):
+            data['message_id'] = data['messages'][0].get('id')
+        if not data['success'] and 'error' not in data:
+            data['error'] = f"HTTP {response.status_code}"
+        return data
     
     def send_guest_qr(self, guest, recipient_phone=None):
         """Send guest QR code with details via WhatsApp"""
@@ -80,12 +168,77 @@ class WhatsAppService:
         if not phone.startswith('+'):
             phone = '+91' + phone.replace('-', '').replace(' ', '').replace('(', '').replace(')', '')
         
-        # In production, you would first upload the base64 image to WhatsApp Media API
-        # and get a media_id, then send it
+        try:
+            png = base64.b64decode(qr_base64_data.split(',', 1)[-1])
+        except (binascii.Error, ValueError):
+            return {'success': False, 'error': 'Invalid QR image data'}
+        
+        # The image is uploaded to the Media API once per distinct PNG and sent by media id
+        media_id = self.get_media_id(png)
+        if not media_id:
+            return {'success': False, 'error': 'Media upload failed'}
+        
+        if self.access_token == 'mock_token':
+            return self._mock_send_image(phone, qr_base64_data, guest)
+        
         url = f"{self.api_url}/{self.phone_number_id}/messages"
+        payload = {
+            "messaging_product": "whatsapp",
+            "to": phone,
+            "type": "image",
+            "image": {"id": media_id}
+        }
+        try:
+            return self._post(url, payload)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def get_media_id(self, content, mime_type='image/png'):
+        """Media id for ``content``: from the cache keyed by phone number and SHA-256, or uploaded now and cached."""
+        if self.access_token == 'mock_token':
+            # Mock ids must never be reused once real credentials are configured
+            return self._upload_media(content, mime_type)
+        
+        digest = hashlib.sha256(content).hexdigest()
+        # Re-upload a little before the provider drops the media
+        still_valid = timezone.now() + timedelta(hours=1)
+        media_id = WhatsAppMedia.objects.filter(
+            phone_number_id=self.phone_number_id, sha256=digest, expires_at__gt=still_valid
+        ).values_list('media_id', flat=True).first()
+        if media_id:
+            return media_id
+        
+        media_id = self._upload_media(content, mime_type)
+        if media_id:
+            now = timezone.now()
+            WhatsAppMedia.objects.update_or_create(phone_number_id=self.phone_number_id, sha256=digest, defaults={
+                'media_id': media_id,
+                'mime_type': mime_type,
+                'uploaded_at': now,
+                'expires_at': now + timedelta(days=getattr(settings, 'WHATSAPP_MEDIA_TTL_DAYS', 29)),
+            })
+        return media_id
+    
+    def _upload_media(self, content, mime_type):
+        """Upload ``content`` to the WhatsApp Media API; returns the media id or None."""
+        if self.access_token == 'mock_token':
+            logger.info(f"MOCK: Uploading {len(content)} bytes of {mime_type}")
+            return f"mock-media-{uuid.uuid4().hex[:12]}"
         
-        # For now, return mock success - implement actual media upload in production
-        return self._mock_send_image(phone, qr_base64_data, guest)
+        url = f"{self.api_url}/{self.phone_number_id}/media"
+        try:
+            response = self._post(
+                url,
+                data={'messaging_product': 'whatsapp', 'type': mime_type},
+                files={'file': ('qr.png', content, mime_type)},
+            )
+        except Exception as e:
+            logger.error(f"WhatsApp media upload failed: {str(e)}")
+            return None
+        if not response.get('success') or not response.get('id'):
+            logger.error(f"WhatsApp media upload failed: {response.get('error')}")
+            return None
+        return response['id']
     
     def _send_text_message(self, phone, message):
         """Send text message via WhatsApp"""
@@ -104,16 +257,10 @@ class WhatsAppService:
             }
         }
         
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
         try:
             # In production environment
             if self.access_token != 'mock_token':
-                response = requests.post(url, json=payload, headers=headers)
-                return response.json()
+                return self._post(url, payload)
             else:
                 # Mock response for development
                 return self._mock_send_text(phone, message)
@@ -128,11 +275,24 @@ class WhatsAppService:
             return resp.get('success', False)
         except Exception:
             return False
+
+    def is_connected(self):
+        """Configured and not failing, from the cached circuit state (no API call)."""
+        if self.access_token == 'mock_token':
+            return False
+        health = provider_health('whatsapp')
+        return not health or health['state'] != 'open'
+
+    def send_text_message(self, phone, message):
+        """Public method: send a text message and return the response dict (success, message_id or error)."""
+        try:
+            return self._send_text_message(phone, message)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
     
     def _mock_send_image(self, phone, qr_base64_data, guest):
         """Mock image sending for development"""
-        import uuid
-        logger.info(f"MOCK: Sending QR image for guest {guest.guest_id} to {phone} (Base64 data: {len(qr_base64_data) if qr_base64_data else 0} chars)")
+        logger.info(f"MOCK: Sending QR image for {guest} to {phone} (Base64 data: {len(qr_base64_data) if qr_base64_data else 0} chars)")
         return {
             'success': True,
             'message_id': str(uuid.uuid4()),
@@ -153,8 +313,8 @@ class WhatsAppService:
     
     def send_voucher(self, voucher, recipient_phone):
         try:
-            # Generate QR code for voucher
-            qr_base64 = generate_voucher_qr_base64(voucher, size="medium")
+            # Reuse the stored QR code; generate (and store) it only the first time
+            qr_base64 = self._voucher_qr(voucher)
 
             # Format voucher details text (optional, alongside QR image)
             message = (
@@ -192,6 +352,15 @@ class WhatsAppService:
             logger.error(f"WhatsApp voucher QR service error: {str(e)}")
             return False
 
+    def _voucher_qr(self, voucher):
+        """Base64 PNG of the voucher's QR code, generated once and kept on the voucher."""
+        if voucher.qr_image:
+            return voucher.qr_image
+        voucher.qr_image = generate_voucher_qr_base64(voucher, size="medium")
+        if voucher.pk:
+            type(voucher).objects.filter(pk=voucher.pk).update(qr_image=voucher.qr_image)
+        return voucher.qr_image
+
     def _mock_send_message(self, phone, message, voucher):
         """Mock WhatsApp API call - replace with actual implementation"""
         # Simulate API response
@@ -232,14 +401,8 @@ class WhatsAppService:
             }
         }
         
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
         try:
-            response = requests.post(url, json=payload, headers=headers)
-            return response.json()
+            return self._post(url, payload)
         except Exception as e:
             return {"success": False, "error": str(e)}
 